@@ -0,0 +1,290 @@
+"""
+@Author - Adam Pinkos
+@File   - backtest.py
+@Date   - 12/14/2025
+@Brief  - Replay every game in 2025_cbb_results.csv through the model in one
+          vectorized pass and score it (MAE, RMSE, Brier, log-loss, calibration).
+"""
+
+import argparse
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+CALIBRATION_BINS = 10
+LOGLOSS_EPS = 1e-15
+DAY_KEYS = 100_000_000    # team ID * DAY_KEYS + yyyymmdd sorts listings by team, then date
+
+# Column order of design_matrix()
+DESIGN_COLUMNS = ["offense_diff", "defense_diff", "barthag_diff", "rank_diff", "rating_diff", "location_sign"]
+
+
+class Backtest:
+    """
+    Builds the per-game feature arrays once (team IDs, stats, rating diffs,
+    location edges, scoring averages), then evaluate() runs the model's
+    vectorized formula over all games at once.
+
+    Every scored, non-canceled row is replayed. D1 vs D1 games appear once from
+    each side in the results file, which is fine since every metric is symmetric.
+
+    No look-ahead on the scoring averages: each game's team_total_avg /
+    opp_total_avg are season-to-date, from the games each team played on
+    earlier days only (a team's first game has none, same as a team with no
+    record). The league-wide average total is still the full season's, and
+    ratings and cbb25 stats are end-of-season numbers, so those still look ahead.
+    """
+
+    def __init__(self, predictor):
+        self.predictor = predictor
+        store = predictor.team_store
+        df = predictor.results_df
+
+        keep = df["total_points"].notna().to_numpy().copy()
+        for col in ["canceled", "postponed"]:
+            if col in df.columns:
+                keep &= ~df[col].fillna(False).astype(bool).to_numpy()
+        games = df[keep].reset_index(drop = True)
+
+        # What actually happened
+        self.games = games
+        self.actual_margin = (games["teamscore"] - games["oppscore"]).to_numpy(dtype = np.float64)
+        self.actual_total = (games["teamscore"] + games["oppscore"]).to_numpy(dtype = np.float64)
+        self.team_won = (self.actual_margin > 0).astype(np.float64)
+
+
+        # Feature matrix, built once
+        t_ids = store.team_ids(games["team"])
+        o_ids = store.team_ids(games["opponent"])
+        loc_codes, locs = pd.factorize(games["location"].fillna("N"))
+        loc_signs = np.array([predictor._location_sign(loc) for loc in locs], dtype = np.float64)
+
+        self.team_ids = t_ids
+        self.opponent_ids = o_ids
+        self.features = {
+            "t_feats": store.gather(t_ids),
+            "o_feats": store.gather(o_ids),
+            "rating_diff": np.asarray(predictor.rating_matrix[t_ids, o_ids], dtype = np.float64),
+            "loc_sign": loc_signs[loc_codes],   # times HOME_EDGE at evaluate time
+            "team_total_avg": self._season_to_date_totals(t_ids, games),
+            "opp_total_avg": self._season_to_date_totals(o_ids, games),
+        }
+
+
+        # Columns to slice results by
+        conf_by_id = np.full(len(store) + 1, "", dtype = object)
+        if "CONF" in predictor.adv_df.columns:
+            ids = store.team_ids(predictor.adv_df["Team"])
+            conf_by_id[ids[ids >= 0]] = predictor.adv_df["CONF"].fillna("").to_numpy()[ids >= 0]
+
+        self.slices = pd.DataFrame({
+            "month": games["month"].to_numpy() if "month" in games.columns else 0,
+            "day": games["day"].to_numpy() if "day" in games.columns else 0,
+            "location": games["location"].fillna("N").str.upper().to_numpy(),
+            "conf": conf_by_id[t_ids],
+        })
+
+        self._design = None
+
+
+
+    def _season_to_date_totals(self, ids: np.ndarray, games: pd.DataFrame) -> np.ndarray:
+        # team_total_avg for each game's team from only the games it had before that day.
+        # Same weighting as the summaries' listed_points / listed_games (team_summaries.py):
+        # every scored results row is one listing for each of its two teams
+        store = self.predictor.team_store
+        df = self.predictor.results_df
+        scored = df[df["teamscore"].notna() & df["oppscore"].notna()]
+        t = store.team_ids(scored["team"])
+        o = store.team_ids(scored["opponent"])
+        total = (scored["teamscore"] + scored["oppscore"]).to_numpy(dtype = np.float64)
+        day = _game_day(scored)
+
+        not_self = t != o
+        side_ids = np.concatenate([t, o[not_self]])
+        side_day = np.concatenate([day, day[not_self]])
+        side_points = np.concatenate([total, total[not_self]])
+        known = side_ids >= 0
+
+        # listings sorted by (team, day), then a running sum: a team's games before day d
+        # are one slice of it, found with two binary searches per game
+        key = side_ids[known] * DAY_KEYS + side_day[known]
+        order = np.argsort(key, kind = "stable")
+        key = key[order]
+        running = np.concatenate([[0.0], np.cumsum(side_points[known][order])])
+
+        first = np.searchsorted(key, ids * DAY_KEYS, side = "left")
+        before = np.searchsorted(key, ids * DAY_KEYS + _game_day(games), side = "left")
+        listed = before - first
+        with np.errstate(invalid = "ignore", divide = "ignore"):
+            out = (running[before] - running[first]) / listed
+        out[(listed <= 0) | (ids < 0)] = np.nan     # no earlier games: same as a team with no record
+        return out
+
+
+
+    def design_matrix(self):
+        """
+        (X, y) for fitting the margin formula: one row per game, columns in
+        DESIGN_COLUMNS order, y = actual margin. Built once, then cached.
+        """
+        if self._design is None:
+            f = self.features
+            t, o = f["t_feats"], f["o_feats"]
+            X = np.column_stack([
+                t["ADJOE"] - o["ADJOE"],     # offense_diff
+                o["ADJDE"] - t["ADJDE"],     # defense_diff
+                t["BARTHAG"] - o["BARTHAG"], # barthag_diff
+                o["RANK"] - t["RANK"],       # rank_diff
+                f["rating_diff"],            # rating_diff
+                f["loc_sign"],               # +1 home / -1 away / 0 neutral
+            ])
+            self._design = (X, self.actual_margin)
+        return self._design
+
+
+
+    def evaluate(self, params: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+        """
+        Model outputs for every replayed game (one vectorized pass).
+        params = model parameters to try instead of the predictor's own.
+        """
+        prm = self.predictor.params if params is None else params
+        f = self.features
+        scored = self.predictor._score_arrays(
+            f["t_feats"], f["o_feats"], f["rating_diff"], f["loc_sign"] * prm["HOME_EDGE"],
+            f["team_total_avg"], f["opp_total_avg"], params = prm,
+        )
+        return pd.DataFrame({
+            "pred_margin": scored["margin"],
+            "pred_total": scored["team_score"] + scored["opponent_score"],
+            "win_prob": scored["win_prob"],
+        })
+
+
+
+    def metrics(self, preds: Optional[pd.DataFrame] = None, mask: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """MAE / RMSE on margin and total, Brier score, log-loss and accuracy ({"games": 0} for an empty mask)."""
+        if preds is None:
+            preds = self.evaluate()
+        if mask is None:
+            mask = np.ones(len(self.games), dtype = bool)
+
+        return score_predictions(
+            preds["pred_margin"].to_numpy()[mask],
+            preds["pred_total"].to_numpy()[mask],
+            preds["win_prob"].to_numpy()[mask],
+            self.actual_margin[mask],
+            self.actual_total[mask],
+        )
+
+
+
+    def calibration(self, preds: Optional[pd.DataFrame] = None, mask: Optional[np.ndarray] = None,
+                    bins: int = CALIBRATION_BINS) -> pd.DataFrame:
+        """Predicted win prob vs actual win rate in equal-width probability bins."""
+        if preds is None:
+            preds = self.evaluate()
+        if mask is None:
+            mask = np.ones(len(self.games), dtype = bool)
+
+        p = preds["win_prob"].to_numpy()[mask]
+        won = self.team_won[mask]
+        edges = np.linspace(0.0, 1.0, bins + 1)
+        which = np.clip(np.digitize(p, edges) - 1, 0, bins - 1)
+
+        counts = np.bincount(which, minlength = bins)
+        safe = np.maximum(counts, 1)
+        table = pd.DataFrame({
+            "bin_low": edges[:-1],
+            "bin_high": edges[1:],
+            "games": counts,
+            "mean_pred": np.bincount(which, weights = p, minlength = bins) / safe,
+            "actual_rate": np.bincount(which, weights = won, minlength = bins) / safe,
+        })
+        return table[table["games"] > 0].reset_index(drop = True)
+
+
+
+    def by(self, column: str, preds: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Metrics for each value of one slice column (month, day, location or conf)."""
+        if preds is None:
+            preds = self.evaluate()
+
+        rows = []
+        for value, idx in self.slices.groupby(column, sort = True).indices.items():
+            mask = np.zeros(len(self.games), dtype = bool)
+            mask[idx] = True
+            rows.append({column: value, **self.metrics(preds, mask)})
+        return pd.DataFrame(rows)
+
+
+
+def _game_day(df: pd.DataFrame) -> np.ndarray:
+    # yyyymmdd from the results file's year / month / day columns (0 when a part is missing)
+    parts = []
+    for col in ["\\", "month", "day"]:
+        values = df[col] if col in df.columns else pd.Series(0, index = df.index)
+        parts.append(pd.to_numeric(values, errors = "coerce").fillna(0).to_numpy(dtype = np.int64))
+    return parts[0] * 10_000 + parts[1] * 100 + parts[2]
+
+
+
+def score_predictions(pred_margin, pred_total, win_prob, actual_margin, actual_total) -> Dict[str, float]:
+    # All the error numbers for one set of games
+    if len(actual_margin) == 0:
+        return {"games": 0}
+
+    won = (actual_margin > 0).astype(np.float64)
+    p = np.clip(win_prob, LOGLOSS_EPS, 1.0 - LOGLOSS_EPS)
+    margin_err = pred_margin - actual_margin
+    total_err = pred_total - actual_total
+
+    return {
+        "games": int(len(actual_margin)),
+        "margin_mae": float(np.mean(np.abs(margin_err))),
+        "margin_rmse": float(np.sqrt(np.mean(margin_err ** 2))),
+        "total_mae": float(np.mean(np.abs(total_err))),
+        "brier": float(np.mean((win_prob - won) ** 2)),
+        "log_loss": float(-np.mean(won * np.log(p) + (1.0 - won) * np.log(1.0 - p))),
+        "accuracy": float(np.mean((win_prob > 0.5) == (won == 1.0))),
+    }
+
+
+
+if __name__ == "__main__":
+    from prediction import MatchupPredictor
+
+    parser = argparse.ArgumentParser(description = "Backtest the model against 2025_cbb_results.csv")
+    parser.add_argument("--by", choices = ["month", "day", "location", "conf"],
+                        help = "also break the metrics down by this column")
+    parser.add_argument("--month", type = int, help = "only games in this month")
+    parser.add_argument("--location", choices = ["H", "V", "N"], help = "only games at this location")
+    parser.add_argument("--conf", help = "only games where Team 1 is in this conference")
+    args = parser.parse_args()
+
+    bt = Backtest(MatchupPredictor())
+    preds = bt.evaluate()
+
+    mask = np.ones(len(bt.games), dtype = bool)
+    if args.month is not None:
+        mask &= bt.slices["month"].to_numpy() == args.month
+    if args.location:
+        mask &= bt.slices["location"].to_numpy() == args.location
+    if args.conf:
+        mask &= bt.slices["conf"].to_numpy() == args.conf
+    if not mask.any():
+        parser.exit(1, "no games match those filters\n")
+
+    print("team scoring averages are season-to-date (no look-ahead); ratings / cbb25 stats are end of season")
+    for name, value in bt.metrics(preds, mask).items():
+        print(f"{name:12} {value:10.4f}")
+
+    print()
+    print(bt.calibration(preds, mask).to_string(index = False))
+
+    if args.by:
+        print()
+        print(bt.by(args.by, preds).to_string(index = False))
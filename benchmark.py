@@ -0,0 +1,347 @@
+"""
+@Author - Adam Pinkos
+@File   - benchmark.py
+@Date   - 12/28/2025
+@Brief  - Benchmark harness (cold start, single prediction latency, batch throughput,
+          all-pairs grid, peak memory) against the real Data/ files and synthetic
+          cbb25 / results / wp-matrix shaped files at 10x / 100x scale.
+          Every run is appended to a JSONL file tagged with the git commit,
+          so two commits can be compared line for line.
+
+python benchmark.py                          real data + 10x + 100x
+python benchmark.py --scales 10 --json       just 10x, print the records
+python benchmark.py --compare abc1234        latest run vs the records from commit abc1234
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REAL_DATA_DIR = os.path.join(BASE_DIR, "Data", "2025")
+SYNTH_DIR = os.path.join(BASE_DIR, "bench_data")           # synthetic files land in bench_data/x10 ...
+RESULTS_FILE = os.path.join(BASE_DIR, "benchmark_results.jsonl")
+
+# Real file sizes the synthetic generator scales up
+BASE_TEAMS = 364
+BASE_RESULT_ROWS = 11600
+BASE_RATING_ROWS = 4624
+
+SINGLE_CALLS = 2000        # predict_matchup calls timed one by one
+BATCH_ROWS = 100_000       # matchups in the predict_many throughput run
+GRID_MAX_TEAMS = 2000      # bigger grids (3 x n x n, several arrays) don't fit in a few GB
+
+# Timing metrics where lower is better (everything else in a record is context)
+METRICS = ["cold_start_csv_s", "cold_start_snapshot_s", "predict_us_p50", "predict_us_p95",
+           "batch_s", "grid_s", "peak_rss_mb"]
+
+CBB25_STAT_COLUMNS = {
+    # column: (mean, std) roughly matching cbb25.csv
+    "EFG_O": (50.8, 3.0), "EFG_D": (50.9, 2.7), "TOR": (17.3, 2.0), "TORD": (17.3, 2.3),
+    "ORB": (29.7, 4.2), "DRB": (29.9, 2.7), "FTR": (33.1, 4.6), "FTRD": (33.2, 5.3),
+    "2P_O": (51.0, 3.5), "2P_D": (51.0, 3.2), "3P_O": (33.7, 2.5), "3P_D": (33.8, 2.1),
+    "3PR": (39.0, 5.4), "3PRD": (39.1, 4.1),
+}
+
+
+
+# Synthetic data
+def generate_synthetic(out_dir: str, scale: float, seed: int = 0) -> Dict[str, int]:
+    """
+    Write cbb25.csv, 2025_cbb_results.csv and ncaa_wp_matrix_2025.csv shaped files
+    with scale x the real row counts.
+
+    Results and rating rows grow by scale. The team count grows by sqrt(scale), so the
+    dense team x team arrays stay buildable at 100x (3,640 teams) and the extra rows
+    show up as more games per team, like several seasons of history.
+    """
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok = True)
+
+    n = max(2, int(round(BASE_TEAMS * math.sqrt(scale))))
+    names = np.array([f"Team {i:05d}" for i in range(n)], dtype = object)
+    strength = rng.standard_normal(n)
+
+
+    # cbb25.csv
+    barthag = 1.0 / (1.0 + np.exp(-1.6 * strength))
+    rank = np.empty(n, dtype = np.int64)
+    rank[np.argsort(-barthag)] = np.arange(1, n + 1)
+    seed_col = np.where(rank <= 68, np.minimum(16, (rank - 1) // 4 + 1), np.nan)
+
+    adv = {
+        "RK": rank,
+        "Team": names,
+        "CONF": [f"C{i % 32:02d}" for i in range(n)],
+        "G": rng.integers(27, 37, n),
+        "W": np.clip(np.round(17 + 5.5 * strength), 0, 36).astype(np.int64),
+        "ADJOE": np.round(106.4 + 5.5 * strength + rng.normal(0, 3.5, n), 1),
+        "ADJDE": np.round(106.4 - 4.5 * strength + rng.normal(0, 3.0, n), 1),
+        "BARTHAG": np.round(barthag, 4),
+    }
+    for col, (mean, std) in CBB25_STAT_COLUMNS.items():
+        adv[col] = np.round(rng.normal(mean, std, n), 1)
+    adv["ADJ_T"] = np.round(rng.normal(67.2, 2.4, n), 1)
+    adv["WAB"] = np.round(-8.5 + 7.0 * strength, 2)
+    adv["SEED"] = seed_col
+    pd.DataFrame(adv).to_csv(os.path.join(out_dir, "cbb25.csv"), index = False)
+
+
+    # 2025_cbb_results.csv: D1 games listed from both sides, non-D1 games once
+    rows = int(BASE_RESULT_ROWS * scale)
+    non_d1 = max(1, n // 4)
+    n_other = rows // 20                          # ~5% of rows vs non-D1 teams
+    n_games = (rows - n_other) // 2
+
+    t = rng.integers(0, n, n_games)
+    o = (t + rng.integers(1, n, n_games)) % n     # never the same team
+    loc = rng.choice(np.array(["H", "V", "N"]), n_games, p = [0.47, 0.43, 0.10])
+    edge = np.select([loc == "H", loc == "V"], [3.5, -3.5], 0.0)
+    margin = np.round(8.0 * (strength[t] - strength[o]) + edge + rng.normal(0, 10, n_games))
+    margin[margin == 0] = 1
+    total = np.round(rng.normal(145, 15, n_games))
+    t_score = np.round((total + margin) / 2).astype(np.int64)
+    o_score = (t_score - margin).astype(np.int64)
+
+    month = rng.choice(np.array([11, 12, 1, 2, 3]), rows)
+    games = pd.DataFrame({
+        "\\": np.where(month >= 11, 2024, 2025),
+        "month": month,
+        "day": rng.integers(1, 29, rows),
+        "team": np.concatenate([names[t], names[o], names[rng.integers(0, n, n_other)]]),
+        "opponent": np.concatenate([
+            names[o], names[t],
+            np.array([f"Non-D1 {k:04d}" for k in rng.integers(0, non_d1, n_other)], dtype = object),
+        ]),
+        "location": np.concatenate([loc, np.select([loc == "H", loc == "V"], ["V", "H"], "N"),
+                                    np.full(n_other, "H")]),
+        "teamscore": np.concatenate([t_score, o_score, rng.integers(75, 100, n_other)]),
+        "oppscore": np.concatenate([o_score, t_score, rng.integers(45, 70, n_other)]),
+        "canceled": False,
+        "postponed": False,
+        "OT": np.nan,
+        "D1": np.concatenate([np.full(2 * n_games, 2), np.full(n_other, 1)]),
+    })
+    games.to_csv(os.path.join(out_dir, "2025_cbb_results.csv"), index = False)
+
+
+    # ncaa_wp_matrix_2025.csv: distinct (team, opponent) pairs
+    rating = 15.0 * strength + 5.0
+    pairs = min(int(BASE_RATING_ROWS * scale), n * (n - 1))
+    keys = np.unique(rng.integers(0, n, 2 * pairs) * n + rng.integers(0, n, 2 * pairs))
+    keys = keys[keys // n != keys % n]
+    keys = rng.permutation(keys)[:pairs]
+    ti, oi = keys // n, keys % n
+    diff = rating[ti] - rating[oi]
+    pd.DataFrame({
+        "team": names[ti],
+        "opponent": names[oi],
+        "rating_team": rating[ti],
+        "rating_opponent": rating[oi],
+        "pred_score_diff": diff,
+        "win_prob": 1.0 / (1.0 + np.exp(-diff / 7.0)),
+    }).to_csv(os.path.join(out_dir, "ncaa_wp_matrix_2025.csv"), index = False)
+
+    return {"teams": n, "result_rows": len(games), "rating_rows": len(ti)}
+
+
+
+# One benchmark case (run in its own process so cold start / peak memory are clean)
+def run_case(data_dir: str, single_calls: int = SINGLE_CALLS, batch_rows: int = BATCH_ROWS,
+             grid_max_teams: int = GRID_MAX_TEAMS, seed: int = 0) -> Dict[str, Any]:
+    from file_loader import SNAPSHOT_NAME, use_data_dir
+    from prediction import MatchupPredictor
+
+    out: Dict[str, Any] = {}
+
+    # cold start from the CSVs (no snapshot), then again from the snapshot it wrote
+    snapshot = os.path.join(data_dir, SNAPSHOT_NAME)
+    if os.path.exists(snapshot):
+        os.remove(snapshot)
+    use_data_dir(data_dir)
+    start = time.perf_counter()
+    MatchupPredictor()
+    out["cold_start_csv_s"] = time.perf_counter() - start
+
+    use_data_dir(data_dir)      # fresh catalog, nothing parsed yet
+    start = time.perf_counter()
+    predictor = MatchupPredictor()
+    out["cold_start_snapshot_s"] = time.perf_counter() - start
+
+    store = predictor.team_store
+    teams = store.names[:store.num_adv_teams]
+    out["teams"] = len(teams)
+    out["result_rows"] = len(predictor.results_df)
+
+    rng = np.random.default_rng(seed)
+    def random_matchups(k):
+        t = rng.integers(0, len(teams), k)
+        o = (t + rng.integers(1, len(teams), k)) % len(teams)
+        loc = rng.choice(np.array(["H", "V", "N"]), k)
+        return [(teams[a], teams[b], c) for a, b, c in zip(t, o, loc)]
+
+
+    # single prediction latency
+    matchups = random_matchups(single_calls)
+    for m in matchups[:50]:
+        predictor.predict_matchup(*m)      # warm up
+    lat = np.empty(len(matchups))
+    for i, m in enumerate(matchups):
+        start = time.perf_counter()
+        predictor.predict_matchup(*m)
+        lat[i] = time.perf_counter() - start
+    out["predict_us_p50"] = float(np.percentile(lat, 50) * 1e6)
+    out["predict_us_p95"] = float(np.percentile(lat, 95) * 1e6)
+
+
+    # batch throughput
+    matchups = random_matchups(batch_rows)
+    start = time.perf_counter()
+    predictor.predict_many(matchups)
+    out["batch_s"] = time.perf_counter() - start
+    out["batch_rows_per_s"] = batch_rows / out["batch_s"]
+
+
+    # all-pairs grid
+    if len(teams) <= grid_max_teams:
+        start = time.perf_counter()
+        predictor.project_all_pairs()
+        out["grid_s"] = time.perf_counter() - start
+    else:
+        out["grid_s"] = None
+        out["grid_skipped"] = f"{len(teams)} teams > grid_max_teams {grid_max_teams}"
+
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    out["peak_rss_mb"] = peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return out
+
+
+
+def _run_case_subprocess(data_dir: str, args) -> Dict[str, Any]:
+    cmd = [sys.executable, os.path.abspath(__file__), "--case", data_dir,
+           "--single-calls", str(args.single_calls), "--batch-rows", str(args.batch_rows),
+           "--grid-max-teams", str(args.grid_max_teams), "--seed", str(args.seed)]
+    done = subprocess.run(cmd, capture_output = True, text = True, cwd = BASE_DIR)
+    if done.returncode != 0:
+        return {"error": done.stderr.strip().splitlines()[-1] if done.stderr.strip() else "failed"}
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        done = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output = True,
+                              text = True, cwd = BASE_DIR)
+        return done.stdout.strip() or None
+    except OSError:
+        return None
+
+
+
+# Results file
+def read_results(path: str = RESULTS_FILE) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> pd.DataFrame:
+    """new / old for every metric, per dataset (last record of each dataset wins). > 1 = slower."""
+    old_by = {r["dataset"]: r for r in old}
+    rows = []
+    for rec in {r["dataset"]: r for r in new}.values():
+        base = old_by.get(rec["dataset"])
+        if base is None:
+            continue
+        for metric in METRICS:
+            a, b = base.get(metric), rec.get(metric)
+            if a and b:
+                rows.append({"dataset": rec["dataset"], "metric": metric,
+                             "old": a, "new": b, "ratio": b / a})
+    return pd.DataFrame(rows, columns = ["dataset", "metric", "old", "new", "ratio"])
+
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description = "Benchmark the predictor on real and synthetic data")
+    parser.add_argument("--data", default = REAL_DATA_DIR, help = "folder with the real CSVs")
+    parser.add_argument("--scales", type = float, nargs = "*", default = [10, 100],
+                        help = "synthetic scale factors (none = real data only)")
+    parser.add_argument("--no-real", action = "store_true", help = "skip the real data run")
+    parser.add_argument("--synth-dir", default = SYNTH_DIR)
+    parser.add_argument("--regenerate", action = "store_true", help = "rewrite the synthetic files")
+    parser.add_argument("--single-calls", type = int, default = SINGLE_CALLS)
+    parser.add_argument("--batch-rows", type = int, default = BATCH_ROWS)
+    parser.add_argument("--grid-max-teams", type = int, default = GRID_MAX_TEAMS)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--out", default = RESULTS_FILE, help = "JSONL file the records are appended to")
+    parser.add_argument("--json", action = "store_true", help = "print the records as JSON lines")
+    parser.add_argument("--compare", metavar = "COMMIT", help = "compare this run against a commit's records")
+    parser.add_argument("--case", help = argparse.SUPPRESS)   # internal: one case, in this process
+    args = parser.parse_args(argv)
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.single_calls, args.batch_rows,
+                                  args.grid_max_teams, args.seed)))
+        return 0
+
+    datasets = [] if args.no_real else [("real", args.data, None)]
+    for scale in args.scales:
+        label = f"x{scale:g}"
+        folder = os.path.join(args.synth_dir, label)
+        if args.regenerate or not os.path.exists(os.path.join(folder, "2025_cbb_results.csv")):
+            generate_synthetic(folder, scale, args.seed)
+        datasets.append((label, folder, scale))
+
+    run = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+    }
+    records = []
+    for label, folder, scale in datasets:
+        rec = dict(run, dataset = label, scale = scale)
+        rec.update(_run_case_subprocess(folder, args))
+        records.append(rec)
+
+        if args.json:
+            print(json.dumps(rec))
+        else:
+            shown = {k: rec.get(k) for k in ["teams", "result_rows"] + METRICS}
+            print(label, "  ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}"
+                                   for k, v in shown.items()))
+            if "error" in rec:
+                print("   error:", rec["error"])
+
+    # earlier records only, read before this run is appended
+    old = [r for r in read_results(args.out) if r.get("commit") == args.compare] if args.compare else []
+
+    with open(args.out, "a") as f:
+        for rec in records:
+            f.write(json.dumps(rec) + "\n")
+
+    if args.compare:
+        print()
+        print(compare(old, records).to_string(index = False) if old else f"no records for {args.compare}")
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
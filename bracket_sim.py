@@ -0,0 +1,149 @@
+"""
+@Author - Adam Pinkos
+@File   - bracket_sim.py
+@Date   - 12/10/2025
+@Brief  - Monte Carlo NCAA tournament simulator. Seeds the 68 team field
+          from the SEED column in cbb25.csv and plays the bracket many times
+          with vectorized win-probability draws.
+"""
+
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+# Seed order down one region of the bracket (1 plays 16, winner plays 8/9 winner, ...)
+REGION_SEED_ORDER = [1, 16, 8, 9, 5, 12, 4, 13, 6, 11, 3, 14, 7, 10, 2, 15]
+NUM_REGIONS = 4
+
+# Regions in bracket order: neighbours meet in the Final Four, so the #1 overall
+# region (0) gets #4 (3) and #2 gets #3, the two best teams can only meet in the final
+FINAL_FOUR_ORDER = [0, 3, 1, 2]
+
+# Column names for "reached this round" odds, in order
+ROUND_NAMES = ["R64", "R32", "S16", "E8", "F4", "Final", "Champion"]
+
+
+# A bracket slot is either one field team or a First Four pair
+Slot = Union[int, Tuple[int, int]]
+
+
+class BracketSimulator:
+    """
+    Build the field once, then simulate() as many tournaments as needed.
+
+    Every game reads its probability from one precomputed win-probability matrix
+    (by default the predictor's neutral-site win_prob_matrix), never from predict_matchup.
+    """
+
+    def __init__(self, predictor, win_prob: Optional[np.ndarray] = None):
+
+        store = predictor.team_store
+        seeds = store.seed[:store.num_adv_teams]
+
+        # Field = every cbb25 team with a SEED
+        field_ids = np.flatnonzero(~np.isnan(seeds))
+        if len(field_ids) == 0:
+            raise ValueError("No seeded teams in cbb25.csv (SEED column is empty)")
+
+        self.field_ids = field_ids
+        self.teams: List[str] = [store.names[i] for i in field_ids]
+        self.seeds = seeds[field_ids].astype(int)
+        self.ranks = store.rank[field_ids]
+
+        self.regions = np.full(len(field_ids), -1, dtype=np.int64)
+        self.slots: List[Slot] = self._build_slots()
+
+
+        # Pairwise win probabilities between field teams only (small, dense, float64)
+        if win_prob is None:
+            win_prob = predictor.win_prob_matrix("N")
+        self.win_prob = np.asarray(win_prob, dtype=np.float64)[np.ix_(field_ids, field_ids)]
+
+
+
+    def _build_slots(self) -> List[Slot]:
+        """
+        Lay the field out into 64 bracket slots.
+        Each seed line is S-curved across the 4 regions by rank (better rank, earlier region,
+        direction flips every line). A line with 6 teams gives its 4 lowest-ranked teams
+        two First Four games for the last 2 regions. Regions go down the bracket in
+        FINAL_FOUR_ORDER.
+        """
+
+        region_slots = {}   # (region, seed) -> slot
+
+        for seed in range(1, 17):
+            line = np.flatnonzero(self.seeds == seed)
+            line = line[np.argsort(self.ranks[line], kind="stable")]
+
+            if len(line) == NUM_REGIONS:
+                entries: List[Slot] = [int(i) for i in line]
+            elif len(line) == NUM_REGIONS + 2:
+                entries = [int(line[0]), int(line[1]),
+                           (int(line[2]), int(line[5])), (int(line[3]), int(line[4]))]
+            else:
+                raise ValueError(
+                    f"Seed line {seed} has {len(line)} teams, expected {NUM_REGIONS} or {NUM_REGIONS + 2}"
+                )
+
+            order = range(NUM_REGIONS) if seed % 2 == 1 else reversed(range(NUM_REGIONS))
+            for region, entry in zip(order, entries):
+                region_slots[(region, seed)] = entry
+                for team in (entry if isinstance(entry, tuple) else (entry,)):
+                    self.regions[team] = region
+
+        return [region_slots[(region, seed)]
+                for region in FINAL_FOUR_ORDER for seed in REGION_SEED_ORDER]
+
+
+
+    def simulate(self, n_sims: int = 100_000, seed: Optional[int] = None,
+                 chunk_size: int = 100_000) -> pd.DataFrame:
+        """
+        Play the tournament n_sims times and return each team's odds of reaching every round.
+        Same seed = same results. Sims run in chunks so memory stays flat for millions of brackets.
+        """
+
+        rng = np.random.default_rng(seed)
+        n_field = len(self.teams)
+        counts = np.zeros((len(ROUND_NAMES), n_field), dtype=np.int64)
+        probs = self.win_prob
+
+        play_ins = [(slot, entry) for slot, entry in enumerate(self.slots) if isinstance(entry, tuple)]
+        fixed = np.array([-1 if isinstance(e, tuple) else e for e in self.slots], dtype=np.int16)
+
+        done = 0
+        while done < n_sims:
+            m = min(chunk_size, n_sims - done)
+            done += m
+
+            # First Four, then fill the 64 slots
+            alive = np.tile(fixed, (m, 1))
+            for slot, (a, b) in play_ins:
+                alive[:, slot] = np.where(rng.random(m) < probs[a, b], a, b)
+            counts[0] += np.bincount(alive.ravel(), minlength=n_field)
+
+            # Each round: neighbours play, winners move on
+            rnd = 1
+            while alive.shape[1] > 1:
+                top = alive[:, 0::2]
+                bottom = alive[:, 1::2]
+                alive = np.where(rng.random(top.shape) < probs[top, bottom], top, bottom)
+                counts[rnd] += np.bincount(alive.ravel(), minlength=n_field)
+                rnd += 1
+
+        odds = pd.DataFrame(counts.T / n_sims, columns=ROUND_NAMES)
+        odds.insert(0, "region", self.regions)
+        odds.insert(0, "seed", self.seeds)
+        odds.insert(0, "team", self.teams)
+        return odds.sort_values(["Champion", "Final", "F4"], ascending=False, ignore_index=True)
+
+
+
+if __name__ == "__main__":
+    from prediction import MatchupPredictor
+
+    sim = BracketSimulator(MatchupPredictor())
+    print(sim.simulate(100_000, seed=2025).head(25).to_string(index=False))
@@ -0,0 +1,692 @@
+"""
+@Author - Adam Pinkos
+@File   - cbb_database.py
+@Date   - 12/30/2025
+@Brief  - Embedded SQLite version of tables_for_CBB_Prediction.sql (no server needed).
+          Bulk-imports the season CSVs and serves each season back to the
+          predictor (season_id range scans, parameterized, over a small
+          connection pool). The predictor still does its own per-team work
+          in memory on those frames.
+
+python cbb_database.py build                   import every Data/<season> folder
+python cbb_database.py build --season 2025     just one season
+python prediction.py matchups.csv --database Data/cbb.sqlite3
+"""
+
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from file_loader import DATA_DIR, DataCatalog, available_seasons, get_catalog, handout, season_key
+from team_store import TeamFeatureStore
+from team_summaries import TeamSummaries, side_rows
+
+
+DB_PATH = os.path.join(DATA_DIR, "cbb.sqlite3")
+POOL_SIZE = 4              # connections shared by the GUI worker / server / main thread
+STATEMENT_CACHE = 128      # compiled statements kept per connection (the "prepared" part)
+
+
+# MySQL schema -> SQLite: INT AUTO_INCREMENT PRIMARY KEY -> INTEGER PRIMARY KEY,
+# DECIMAL -> REAL, VARCHAR / JSON -> TEXT. Same tables, columns and keys otherwise.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seasons (
+    season_id      INTEGER PRIMARY KEY,
+    season_name    TEXT NOT NULL UNIQUE,
+    year_start     INTEGER NOT NULL,
+    year_end       INTEGER NOT NULL,
+    is_active      INTEGER NOT NULL DEFAULT 0,
+    CHECK (year_end >= year_start)
+);
+
+CREATE TABLE IF NOT EXISTS conferences (
+    conference_id  INTEGER PRIMARY KEY,
+    conf_code      TEXT NOT NULL UNIQUE,
+    conf_name      TEXT NULL
+);
+
+CREATE TABLE IF NOT EXISTS teams (
+    team_id        INTEGER PRIMARY KEY,
+    team_name      TEXT NOT NULL UNIQUE,
+    conference_id  INTEGER NULL REFERENCES conferences(conference_id) ON UPDATE CASCADE ON DELETE SET NULL,
+    nickname       TEXT NULL,
+    home_city      TEXT NULL,
+    home_state     TEXT NULL,
+    created_at     TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS team_season_advanced_stats (
+    team_season_id INTEGER PRIMARY KEY,
+    team_id        INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    season_id      INTEGER NOT NULL REFERENCES seasons(season_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    rk             INTEGER,
+    games_played   INTEGER,
+    wins           INTEGER,
+    ADJOE REAL, ADJDE REAL, BARTHAG REAL,
+    EFG_O REAL, EFG_D REAL, TOR REAL, TORD REAL, ORB REAL, DRB REAL, FTR REAL, FTRD REAL,
+    P2_O REAL, P2_D REAL, P3_O REAL, P3_D REAL, P3R REAL, P3RD REAL,
+    ADJ_T REAL, WAB REAL, SEED REAL,
+    UNIQUE (team_id, season_id)
+);
+
+CREATE TABLE IF NOT EXISTS game_results (
+    game_id            INTEGER PRIMARY KEY,
+    season_id          INTEGER NOT NULL REFERENCES seasons(season_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    game_date          TEXT NOT NULL,
+    primary_team_id    INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    opponent_team_id   INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    location_code      TEXT NOT NULL,
+    primary_team_score INTEGER,
+    opponent_score     INTEGER,
+    canceled           INTEGER NOT NULL DEFAULT 0,
+    postponed          INTEGER NOT NULL DEFAULT 0,
+    went_overtime      INTEGER NOT NULL DEFAULT 0,
+    d1_level           INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS rating_matrix (
+    rating_id       INTEGER PRIMARY KEY,
+    season_id       INTEGER NOT NULL REFERENCES seasons(season_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    team_id         INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    opponent_id     INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    rating_team     REAL,
+    rating_opponent REAL,
+    pred_score_diff REAL,
+    win_prob        REAL,
+    UNIQUE (season_id, team_id, opponent_id)
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id        INTEGER PRIMARY KEY,
+    email          TEXT NOT NULL UNIQUE,
+    password_hash  TEXT NOT NULL,
+    display_name   TEXT NOT NULL,
+    created_at     TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    is_admin       INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS matchup_predictions (
+    prediction_id              INTEGER PRIMARY KEY,
+    user_id                    INTEGER NOT NULL REFERENCES users(user_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    season_id                  INTEGER NOT NULL REFERENCES seasons(season_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    team_id                    INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    opponent_id                INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    rating_id_used             INTEGER NULL REFERENCES rating_matrix(rating_id) ON UPDATE CASCADE ON DELETE SET NULL,
+    predicted_team_score       INTEGER,
+    predicted_opponent_score   INTEGER,
+    predicted_win_prob         REAL,
+    created_at                 TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS favorite_teams (
+    user_id   INTEGER NOT NULL REFERENCES users(user_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    team_id   INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    added_at  TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, team_id)
+);
+
+CREATE TABLE IF NOT EXISTS audit_log (
+    audit_id      INTEGER PRIMARY KEY,
+    user_id       INTEGER NULL REFERENCES users(user_id) ON UPDATE CASCADE ON DELETE SET NULL,
+    action_type   TEXT NOT NULL,
+    action_detail TEXT NULL,
+    created_at    TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS team_scoring_summaries (
+    season_id          INTEGER NOT NULL REFERENCES seasons(season_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    team_id            INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    games_played       INTEGER NOT NULL DEFAULT 0,
+    points_for         INTEGER NOT NULL DEFAULT 0,
+    points_against     INTEGER NOT NULL DEFAULT 0,
+    avg_points_for     REAL,
+    avg_points_against REAL,
+    avg_margin         REAL,
+    PRIMARY KEY (season_id, team_id)
+);
+
+CREATE TABLE IF NOT EXISTS team_location_splits (
+    season_id          INTEGER NOT NULL REFERENCES seasons(season_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    team_id            INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    location_code      TEXT NOT NULL,
+    games_played       INTEGER NOT NULL DEFAULT 0,
+    points_for         INTEGER NOT NULL DEFAULT 0,
+    points_against     INTEGER NOT NULL DEFAULT 0,
+    wins               INTEGER NOT NULL DEFAULT 0,
+    losses             INTEGER NOT NULL DEFAULT 0,
+    avg_points_for     REAL,
+    avg_points_against REAL,
+    avg_margin         REAL,
+    PRIMARY KEY (season_id, team_id, location_code)
+);
+
+CREATE TABLE IF NOT EXISTS matchup_history_summary (
+    season_id          INTEGER NOT NULL REFERENCES seasons(season_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    team_id            INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    opponent_id        INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    games_played       INTEGER NOT NULL DEFAULT 0,
+    wins               INTEGER NOT NULL DEFAULT 0,
+    losses             INTEGER NOT NULL DEFAULT 0,
+    points_for         INTEGER NOT NULL DEFAULT 0,
+    points_against     INTEGER NOT NULL DEFAULT 0,
+    avg_points_for     REAL,
+    avg_points_against REAL,
+    avg_margin         REAL,
+    PRIMARY KEY (season_id, team_id, opponent_id)
+);
+
+CREATE TABLE IF NOT EXISTS model_versions (
+    model_id         INTEGER PRIMARY KEY,
+    model_name       TEXT NOT NULL,
+    description      TEXT NULL,
+    algorithm_name   TEXT NULL,
+    created_at       TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    is_active        INTEGER NOT NULL DEFAULT 0,
+    hyperparams_json TEXT NULL
+);
+
+CREATE TABLE IF NOT EXISTS model_features (
+    feature_id       INTEGER PRIMARY KEY,
+    model_id         INTEGER NOT NULL REFERENCES model_versions(model_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    feature_name     TEXT NOT NULL,
+    source_table     TEXT NULL,
+    source_column    TEXT NULL,
+    description      TEXT NULL,
+    is_active        INTEGER NOT NULL DEFAULT 1,
+    importance_score REAL NULL
+);
+
+CREATE TABLE IF NOT EXISTS training_samples (
+    sample_id         INTEGER PRIMARY KEY,
+    model_id          INTEGER NOT NULL REFERENCES model_versions(model_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    game_id           INTEGER NOT NULL REFERENCES game_results(game_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    season_id         INTEGER NOT NULL REFERENCES seasons(season_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    team_id           INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    opponent_id       INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    location_code     TEXT NOT NULL,
+    label_team_score  INTEGER NOT NULL,
+    label_opp_score   INTEGER NOT NULL,
+    label_margin      INTEGER NOT NULL,
+    created_at        TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS prediction_feature_values (
+    pred_feature_id  INTEGER PRIMARY KEY,
+    prediction_id    INTEGER NOT NULL REFERENCES matchup_predictions(prediction_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    model_id         INTEGER NOT NULL REFERENCES model_versions(model_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    feature_name     TEXT NOT NULL,
+    feature_value    REAL NULL,
+    created_at       TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS precomputed_matchup_projections (
+    projection_id            INTEGER PRIMARY KEY,
+    season_id                INTEGER NOT NULL REFERENCES seasons(season_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    model_id                 INTEGER NOT NULL REFERENCES model_versions(model_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    team_id                  INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    opponent_id              INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    location_code            TEXT NOT NULL,
+    projected_team_score     REAL,
+    projected_opponent_score REAL,
+    projected_margin         REAL,
+    projected_win_prob       REAL,
+    last_computed_at         TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (season_id, model_id, team_id, opponent_id, location_code)
+);
+
+CREATE TABLE IF NOT EXISTS schedule_strength (
+    season_id             INTEGER NOT NULL REFERENCES seasons(season_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    team_id               INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    overall_sos           REAL NULL,
+    non_conf_sos          REAL NULL,
+    conf_sos              REAL NULL,
+    avg_opponent_rating   REAL NULL,
+    computed_at           TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (season_id, team_id)
+);
+
+CREATE TABLE IF NOT EXISTS team_recent_form (
+    form_id              INTEGER PRIMARY KEY,
+    season_id            INTEGER NOT NULL REFERENCES seasons(season_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    team_id              INTEGER NOT NULL REFERENCES teams(team_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    window_size_games    INTEGER NOT NULL,
+    games_played_window  INTEGER NOT NULL DEFAULT 0,
+    avg_points_for       REAL,
+    avg_points_against   REAL,
+    avg_margin           REAL,
+    offensive_rating     REAL NULL,
+    defensive_rating     REAL NULL,
+    last_game_date       TEXT NULL,
+    computed_at          TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Indexes for the season reads and the prediction log. The UNIQUE constraints already index
+# advanced stats (team_id, season_id), rating_matrix (season_id, team_id, opponent_id)
+# and teams.team_name.
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_advanced_season    ON team_season_advanced_stats (season_id, team_season_id);
+CREATE INDEX IF NOT EXISTS idx_games_season       ON game_results (season_id, game_id);
+CREATE INDEX IF NOT EXISTS idx_ratings_season     ON rating_matrix (season_id, rating_id);
+CREATE INDEX IF NOT EXISTS idx_predictions_pair   ON matchup_predictions (season_id, team_id, opponent_id);
+CREATE INDEX IF NOT EXISTS idx_predictions_time   ON matchup_predictions (created_at);
+CREATE INDEX IF NOT EXISTS idx_feature_values     ON prediction_feature_values (prediction_id);
+CREATE INDEX IF NOT EXISTS idx_training_game      ON training_samples (game_id);
+CREATE INDEX IF NOT EXISTS idx_teams_conference   ON teams (conference_id);
+"""
+
+# cbb25.csv column -> team_season_advanced_stats column
+ADVANCED_COLUMNS = {
+    "RK": "rk", "G": "games_played", "W": "wins",
+    "ADJOE": "ADJOE", "ADJDE": "ADJDE", "BARTHAG": "BARTHAG",
+    "EFG_O": "EFG_O", "EFG_D": "EFG_D", "TOR": "TOR", "TORD": "TORD",
+    "ORB": "ORB", "DRB": "DRB", "FTR": "FTR", "FTRD": "FTRD",
+    "2P_O": "P2_O", "2P_D": "P2_D", "3P_O": "P3_O", "3P_D": "P3_D",
+    "3PR": "P3R", "3PRD": "P3RD", "ADJ_T": "ADJ_T", "WAB": "WAB", "SEED": "SEED",
+}
+
+
+# Every query is a constant string with ? parameters, so each pooled connection
+# compiles it once and reuses it from its statement cache
+SQL_SEASON_ID = "SELECT season_id FROM seasons WHERE year_end = ?"
+
+SQL_SEASON_RESULTS = """
+SELECT CAST(substr(g.game_date, 1, 4) AS INTEGER) AS "\\",
+       CAST(substr(g.game_date, 6, 2) AS INTEGER) AS month,
+       CAST(substr(g.game_date, 9, 2) AS INTEGER) AS day,
+       t.team_name AS team, o.team_name AS opponent, g.location_code AS location,
+       g.primary_team_score AS teamscore, g.opponent_score AS oppscore,
+       g.canceled, g.postponed, g.went_overtime AS OT, g.d1_level AS D1
+FROM game_results g
+JOIN teams t ON t.team_id = g.primary_team_id
+JOIN teams o ON o.team_id = g.opponent_team_id
+WHERE g.season_id = ?
+ORDER BY g.game_id
+"""
+
+SQL_SEASON_RATINGS = """
+SELECT t.team_name AS team, o.team_name AS opponent,
+       r.rating_team, r.rating_opponent, r.pred_score_diff, r.win_prob
+FROM rating_matrix r
+JOIN teams t ON t.team_id = r.team_id
+JOIN teams o ON o.team_id = r.opponent_id
+WHERE r.season_id = ?
+ORDER BY r.rating_id
+"""
+
+# (teams the season's rows use, how many of them have a cbb25 stats row), import_season's sanity check
+SQL_SEASON_TEAM_COUNTS = """
+SELECT COUNT(*), COUNT(a.team_id)
+FROM (SELECT primary_team_id AS team_id FROM game_results WHERE season_id = ?
+      UNION SELECT opponent_team_id FROM game_results WHERE season_id = ?
+      UNION SELECT team_id FROM rating_matrix WHERE season_id = ?
+      UNION SELECT opponent_id FROM rating_matrix WHERE season_id = ?
+      UNION SELECT team_id FROM team_season_advanced_stats WHERE season_id = ?) u
+LEFT JOIN team_season_advanced_stats a ON a.team_id = u.team_id AND a.season_id = ?
+"""
+
+SQL_SEASON_ADVANCED = (
+    "SELECT a.rk AS RK, t.team_name AS Team, c.conf_code AS CONF, "
+    + ", ".join(f'a.{col} AS "{csv}"' for csv, col in ADVANCED_COLUMNS.items() if csv != "RK")
+    + """
+FROM team_season_advanced_stats a
+JOIN teams t ON t.team_id = a.team_id
+LEFT JOIN conferences c ON c.conference_id = t.conference_id
+WHERE a.season_id = ?
+ORDER BY a.team_season_id
+""")
+
+
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    # one configured connection (WAL so readers don't block the writer)
+    conn = sqlite3.connect(path, check_same_thread = False, cached_statements = STATEMENT_CACHE)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+
+class ConnectionPool:
+    """
+    A few long-lived connections handed out one caller at a time.
+    Connections are opened on demand up to size; past that callers wait for one back.
+    """
+
+    def __init__(self, path: str = DB_PATH, size: int = POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._opened) < self.size:
+                conn = connect(self.path)
+                self._opened.append(conn)
+                return conn
+        return self._idle.get()
+
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._opened:
+                conn.close()
+            self._opened = []
+            self._idle = queue.LifoQueue()
+
+
+
+class CBBDatabase:
+    """The SQLite file: schema, CSV import, and per-season reads."""
+
+    def __init__(self, path: str = DB_PATH, pool_size: int = POOL_SIZE):
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        self._catalogs: Dict[int, DatabaseCatalog] = {}
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA + INDEXES)
+
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+    def query(self, sql: str, params = ()) -> pd.DataFrame:
+        with self.pool.connection() as conn:
+            return pd.read_sql_query(sql, conn, params = params)
+
+
+    def season_id(self, season = None) -> Optional[int]:
+        with self.pool.connection() as conn:
+            row = conn.execute(SQL_SEASON_ID, (season_key(season),)).fetchone()
+        return row[0] if row else None
+
+
+    def seasons(self) -> List[int]:
+        with self.pool.connection() as conn:
+            return [r[0] for r in conn.execute("SELECT year_end FROM seasons ORDER BY year_end")]
+
+
+
+    # Import
+    def import_season(self, season = None, catalog: Optional[DataCatalog] = None) -> Dict[str, int]:
+        """
+        Load one season's 3 CSVs (through the shared data catalog) into the tables,
+        plus the 3 summary tables built from the results (team_summaries.py).
+        Everything runs in one transaction with executemany; re-importing a season
+        replaces its rows. Returns row counts per table.
+        """
+
+        y = season_key(season)
+        catalog = catalog or get_catalog(y)
+        results, ratings, advanced = catalog.results, catalog.ratings, catalog.advanced
+        advanced = advanced.drop_duplicates("Team", keep = "first")
+
+        # One teams row per team, not per spelling: every name goes through the same alias
+        # mapping the predictor uses ("UConn" -> Connecticut), so game_results, rating_matrix
+        # and the summaries share team IDs with team_season_advanced_stats
+        store = TeamFeatureStore(advanced, pd.concat([
+            results["team"], results["opponent"], ratings["team"], ratings["opponent"],
+        ]).dropna())
+        results = results.assign(team = store.canonical_names(results["team"]),
+                                 opponent = store.canonical_names(results["opponent"]))
+        ratings = ratings.assign(team = store.canonical_names(ratings["team"]),
+                                 opponent = store.canonical_names(ratings["opponent"]))
+        names = store.names     # cbb25 teams first, then teams cbb25 doesn't list (non-D1)
+
+        with self.pool.connection() as conn, conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO seasons (season_name, year_start, year_end, is_active) VALUES (?, ?, ?, 0)",
+                (f"{y - 1}-{y % 100:02d}", y - 1, y),
+            )
+            season_id = conn.execute(SQL_SEASON_ID, (y,)).fetchone()[0]
+
+            # conferences + teams
+            confs = advanced["CONF"].dropna().unique().tolist() if "CONF" in advanced.columns else []
+            conn.executemany("INSERT OR IGNORE INTO conferences (conf_code) VALUES (?)", [(c,) for c in confs])
+            conf_ids = dict(conn.execute("SELECT conf_code, conference_id FROM conferences"))
+
+            conn.executemany("INSERT OR IGNORE INTO teams (team_name) VALUES (?)", [(n,) for n in names])
+            if confs:
+                conn.executemany(
+                    "UPDATE teams SET conference_id = ? WHERE team_name = ?",
+                    [(conf_ids.get(c), t) for t, c in zip(advanced["Team"], advanced["CONF"]) if isinstance(c, str)],
+                )
+            team_ids = dict(conn.execute("SELECT team_name, team_id FROM teams"))
+
+            # replace this season's rows
+            for table in ["team_season_advanced_stats", "game_results", "rating_matrix",
+                          "team_scoring_summaries", "team_location_splits", "matchup_history_summary"]:
+                conn.execute(f"DELETE FROM {table} WHERE season_id = ?", (season_id,))
+
+            cols = [c for c in ADVANCED_COLUMNS if c in advanced.columns]
+            conn.executemany(
+                f"INSERT INTO team_season_advanced_stats (team_id, season_id, "
+                f"{', '.join(ADVANCED_COLUMNS[c] for c in cols)}) "
+                f"VALUES (?, ?{', ?' * len(cols)})",
+                _rows(advanced["Team"].map(team_ids), season_id, *[advanced[c] for c in cols]),
+            )
+
+            dates = (results["\\"].astype(str) + "-" + results["month"].map("{:02d}".format)
+                     + "-" + results["day"].map("{:02d}".format))
+            conn.executemany(
+                "INSERT INTO game_results (season_id, game_date, primary_team_id, opponent_team_id, location_code, "
+                "primary_team_score, opponent_score, canceled, postponed, went_overtime, d1_level) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                _rows(season_id, dates, results["team"].map(team_ids), results["opponent"].map(team_ids),
+                      results["location"].fillna("N"), results["teamscore"], results["oppscore"],
+                      results["canceled"].fillna(False).astype(int), results["postponed"].fillna(False).astype(int),
+                      results["OT"].notna().astype(int), results["D1"]),
+            )
+
+            conn.executemany(
+                "INSERT OR IGNORE INTO rating_matrix (season_id, team_id, opponent_id, rating_team, "
+                "rating_opponent, pred_score_diff, win_prob) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                _rows(season_id, ratings["team"].map(team_ids), ratings["opponent"].map(team_ids),
+                      ratings["rating_team"], ratings["rating_opponent"],
+                      ratings["pred_score_diff"], ratings["win_prob"]),
+            )
+
+            # materialized summaries, keyed by the same canonical team IDs
+            summaries = TeamSummaries(side_rows(results))
+            scoring = summaries.scoring
+            conn.executemany(
+                "INSERT INTO team_scoring_summaries (season_id, team_id, games_played, points_for, points_against, "
+                "avg_points_for, avg_points_against, avg_margin) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                _rows(season_id, scoring.index.to_series().map(team_ids), *_summary_columns(scoring, False)),
+            )
+            splits = summaries.location_splits
+            conn.executemany(
+                "INSERT INTO team_location_splits (season_id, team_id, location_code, games_played, points_for, "
+                "points_against, wins, losses, avg_points_for, avg_points_against, avg_margin) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                _rows(season_id, _level(splits, "team").map(team_ids), _level(splits, "location"),
+                      *_summary_columns(splits, True)),
+            )
+            history = summaries.matchup_history
+            conn.executemany(
+                "INSERT INTO matchup_history_summary (season_id, team_id, opponent_id, games_played, points_for, "
+                "points_against, wins, losses, avg_points_for, avg_points_against, avg_margin) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                _rows(season_id, _level(history, "team").map(team_ids), _level(history, "opponent").map(team_ids),
+                      *_summary_columns(history, True)),
+            )
+
+            # every team this season refers to is one of the store's teams, and no cbb25 team is split
+            used = conn.execute(SQL_SEASON_TEAM_COUNTS, (season_id,) * 6).fetchone()
+            if used != (len(names), store.num_adv_teams):
+                raise ValueError(f"season {y}: {used[0]} teams / {used[1]} with cbb25 stats after import, "
+                                 f"expected {len(names)} / {store.num_adv_teams}")
+
+        # the cached catalog for this season still holds the pre-import frames
+        self._catalogs.pop(y, None)
+
+        return {"teams": len(names), "cbb25_teams": store.num_adv_teams, "team_season_advanced_stats": len(advanced),
+                "game_results": len(results), "rating_matrix": len(ratings),
+                "team_scoring_summaries": len(scoring), "team_location_splits": len(splits),
+                "matchup_history_summary": len(history)}
+
+
+
+    # Reads
+    def catalog(self, season = None) -> "DatabaseCatalog":
+        """A DataCatalog whose frames come from this database instead of the CSVs (one per season)."""
+        y = season_key(season)
+        catalog = self._catalogs.get(y)
+        if catalog is None:
+            catalog = self._catalogs[y] = DatabaseCatalog(self, y)
+        return catalog
+
+
+    def season_frames(self, season = None) -> Dict[str, pd.DataFrame]:
+        """The season's 3 datasets in CSV column layout (season_id index range scans)."""
+        season_id = self.season_id(season)
+        if season_id is None:
+            raise KeyError(f"season {season_key(season)} is not in {self.path} (run: python cbb_database.py build)")
+        return {name: self._season_frame(name, season_id) for name in ["results", "ratings", "advanced"]}
+
+
+    def _season_frame(self, name: str, season_id: int) -> pd.DataFrame:
+        sql = {"results": SQL_SEASON_RESULTS, "ratings": SQL_SEASON_RATINGS, "advanced": SQL_SEASON_ADVANCED}[name]
+        df = self.query(sql, (season_id,))
+        if name == "results":
+            # same dtypes the CSV gives
+            df["canceled"] = df["canceled"].astype(bool)
+            df["postponed"] = df["postponed"].astype(bool)
+            df["OT"] = np.where(df["OT"] == 1, 1.0, np.nan)
+            df["teamscore"] = df["teamscore"].astype("float64")
+            df["oppscore"] = df["oppscore"].astype("float64")
+        return df
+
+
+
+class DatabaseCatalog(DataCatalog):
+    """
+    Same interface as file_loader.DataCatalog (results / ratings / advanced /
+    team_list / prepared frames), backed by one season of the SQLite database.
+    Each frame is queried once; prepared frames are only kept in memory.
+    """
+
+    def __init__(self, db: CBBDatabase, season: int):
+        super().__init__(db.path, db.path, db.path, season = season)
+        self.db = db
+
+
+    def _get(self, name: str) -> pd.DataFrame:
+        frame = self._frames.get(name)
+        if frame is None:
+            with self._lock:
+                frame = self._frames.get(name)
+                if frame is None:
+                    season_id = self.db.season_id(self.season)
+                    if season_id is None:
+                        raise KeyError(f"season {self.season} is not in {self.db.path}")
+                    frame = self._frames[name] = self.db._season_frame(name, season_id)
+        return handout(frame)
+
+
+    def load_prepared(self):
+        if self._prepared is None:
+            return None
+        return {name: handout(frame) for name, frame in self._prepared.items()}
+
+
+    def save_prepared(self, frames) -> None:
+        self._prepared = {name: handout(frame) for name, frame in frames.items()}
+
+
+
+def _rows(*columns) -> Iterator[tuple]:
+    # executemany rows from Series / scalars, NaN -> NULL, numpy numbers -> python
+    n = max(len(c) for c in columns if isinstance(c, pd.Series))
+    cols = []
+    for c in columns:
+        if isinstance(c, pd.Series):
+            values = c.astype(object).where(c.notna(), None).tolist()
+            cols.append([v.item() if isinstance(v, np.generic) else v for v in values])
+        else:
+            cols.append([c] * n)
+    return zip(*cols)
+
+
+
+def _level(table: pd.DataFrame, name: str) -> pd.Series:
+    return pd.Series(table.index.get_level_values(name), index = table.index)
+
+
+def _summary_columns(table: pd.DataFrame, with_record: bool) -> List[pd.Series]:
+    # the summary table columns in INSERT order (wins / losses only on the split + history tables)
+    cols = ["games_played", "points_for", "points_against"]
+    if with_record:
+        cols += ["wins", "losses"]
+    return [table[c] for c in cols + ["avg_points_for", "avg_points_against", "avg_margin"]]
+
+
+
+# One open database per path for the whole process
+_databases: Dict[str, CBBDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path: str = DB_PATH) -> CBBDatabase:
+    path = os.path.abspath(path)
+    with _databases_lock:
+        db = _databases.get(path)
+        if db is None:
+            db = _databases[path] = CBBDatabase(path)
+    return db
+
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description = "Build / inspect the SQLite version of the project schema")
+    sub = parser.add_subparsers(dest = "command", required = True)
+    build = sub.add_parser("build", help = "import season CSVs into the database")
+    build.add_argument("--db", default = DB_PATH)
+    build.add_argument("--season", action = "append", help = "season to import (repeatable, default: all)")
+    info = sub.add_parser("info", help = "row counts per table")
+    info.add_argument("--db", default = DB_PATH)
+    args = parser.parse_args(argv)
+
+    db = CBBDatabase(args.db)
+    if args.command == "build":
+        for season in args.season or available_seasons():
+            counts = db.import_season(season)
+            print(season_key(season), "  ".join(f"{k}={v}" for k, v in counts.items()))
+    else:
+        with db.pool.connection() as conn:
+            tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")]
+            for table in tables:
+                print(f"{table:34} {conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]:10d}")
+    db.close()
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,23 +3,326 @@
 @File - file_loader.py
 @Date - 11/23/2025
 @Brief - Load all 3 datasets from the project folder
+
+Data layout, one folder per season (named by the year the season ends):
+    Data/2025/2025_cbb_results.csv
+    Data/2025/ncaa_wp_matrix_2025.csv
+    Data/2025/cbb25.csv
+    Data/2024/...
+A season's files are only read when something asks for that season.
 """
 
+import json
 import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 
+from profiling import PROFILER
+
 # Directory this file lives in
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Exact filenames as shown in your screenshot
+# Season folders live here
+DATA_DIR = os.path.join(BASE_DIR, "Data")
+
+DEFAULT_SEASON = 2025     # 2024-25, the active season in the schema's seasons table
+SEASON_CACHE_SIZE = 3     # seasons kept in memory at once, least recently used goes first
+
+# File names inside a season folder ({y} = end year, {yy} = last 2 digits)
+SEASON_FILES = {
+    "results":  "{y}_cbb_results.csv",
+    "ratings":  "ncaa_wp_matrix_{y}.csv",
+    "advanced": "cbb{yy:02d}.csv",
+}
+
+# Old flat layout (CSVs right next to the code), still read for the default season
+# if there's no season folder
 PATH_RESULTS  = os.path.join(BASE_DIR, "2025_cbb_results.csv")
 PATH_RATING   = os.path.join(BASE_DIR, "ncaa_wp_matrix_2025.csv")
 PATH_ADVANCED = os.path.join(BASE_DIR, "cbb25.csv")
 
+# Prepared binary snapshot, written beside the CSVs
+SNAPSHOT_NAME    = "prepared_snapshot.npz"
+SNAPSHOT_VERSION = 1   # bump when the predictor's _prepare_* steps change
+
+# pandas 3 is always copy-on-write, so the catalog can hand out shallow views and a
+# caller changing a column only copies that column. On pandas 2.x (unless the app turned
+# copy-on-write on itself) a shallow view could write into the shared frames, so callers
+# get a real copy there instead. The global pandas option is left alone either way
+COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3
+
+def handout(frame: pd.DataFrame) -> pd.DataFrame:
+    """A frame for a caller to keep: shallow view under copy-on-write, a copy otherwise."""
+    cow = COPY_ON_WRITE or pd.get_option("mode.copy_on_write") is True
+    return frame.copy(deep = not cow)
+
+
+# Column names that might hold the team name in cbb25.csv
+TEAM_COLUMNS = ["Team", "TEAM", "team", "TeamName", "School"]
+
+
+class DataCatalog:
+    """
+    Load-once home for the 3 datasets.
+
+    Each CSV is parsed the first time someone asks for it and never again.
+    Callers get shallow views (no data copied); with pandas copy-on-write,
+    a caller that changes a column gets its own copy of just that column,
+    so the catalog's frames stay untouched (pandas 2.x: a full copy, see handout()).
+    """
+
+    def __init__(self, results_path = PATH_RESULTS, rating_path = PATH_RATING,
+                 advanced_path = PATH_ADVANCED, season: Optional[int] = None):
+        self.season = season
+        self.paths = {
+            "results": results_path,
+            "ratings": rating_path,
+            "advanced": advanced_path,
+        }
+        self._frames = {}
+        self._team_list = None
+        self._prepared = None    # prepared frames, kept once loaded / saved
+
+        # the GUI can load from a background thread, so only one thread parses a file
+        self._lock = threading.Lock()
+
+
+    def _get(self, name: str) -> pd.DataFrame:
+        frame = self._frames.get(name)
+        if frame is None:
+            with self._lock:
+                frame = self._frames.get(name)
+                if frame is None:
+                    with PROFILER.stage(f"csv_load.{name}"):
+                        frame = pd.read_csv(self.paths[name])
+                    self._frames[name] = frame
+        return handout(frame)
+
+
+    @property
+    def results(self) -> pd.DataFrame:
+        """2025_cbb_results.csv (game results)."""
+        return self._get("results")
+
+
+    @property
+    def ratings(self) -> pd.DataFrame:
+        """ncaa_wp_matrix_2025.csv (team-vs-team rating matrix)."""
+        return self._get("ratings")
+
+
+    @property
+    def advanced(self) -> pd.DataFrame:
+        """cbb25.csv (advanced team stats)."""
+        return self._get("advanced")
+
+
+    def team_list(self):
+        """Sorted list of team names from cbb25.csv."""
+        if self._team_list is None:
+            df = self.advanced
+
+            # Try to determine team column automatically
+            team_col = None
+            for col in TEAM_COLUMNS:
+                if col in df.columns:
+                    team_col = col
+                    break
+
+            if not team_col:
+                raise ValueError("No recognized team column name in cbb25.csv")
+
+            self._team_list = sorted(df[team_col].dropna().unique().tolist())
+        return list(self._team_list)
+
+
+    def snapshot_path(self) -> str:
+        # The snapshot lives in the same folder as the CSVs it was built from
+        return os.path.join(os.path.dirname(self.paths["results"]), SNAPSHOT_NAME)
+
+
+    def load_prepared(self):
+        """
+        Prepared frames from memory or the binary snapshot, or None if there is no
+        snapshot or any CSV changed since it was written.
+        """
+        if self._prepared is None:
+            with PROFILER.stage("snapshot_load"):
+                self._prepared = load_snapshot(self.snapshot_path(), list(self.paths.values()))
+        if self._prepared is None:
+            return None
+        return {name: handout(frame) for name, frame in self._prepared.items()}
+
+
+    def save_prepared(self, frames) -> None:
+        """Write prepared frames to the binary snapshot so later starts skip the CSVs."""
+        with PROFILER.stage("snapshot_save"):
+            save_snapshot(self.snapshot_path(), frames, list(self.paths.values()))
+        self._prepared = {name: handout(frame) for name, frame in frames.items()}
+
+
+
+# Seasons
+def season_key(season = None) -> int:
+    """2025, "2025" or "2024-25" -> 2025 (the year the season ends). None = DEFAULT_SEASON."""
+    if season is None:
+        return DEFAULT_SEASON
+    if isinstance(season, str) and "-" in season:
+        start, end = season.split("-", 1)
+        return int(start[:-len(end)] + end) if len(end) < len(start) else int(end)
+    return int(season)
+
+
+def season_dir(season = None) -> str:
+    return os.path.join(DATA_DIR, str(season_key(season)))
+
+
+def season_paths(season = None, data_dir: Optional[str] = None) -> Tuple[str, str, str]:
+    """(results, ratings, advanced) file paths for a season."""
+    y = season_key(season)
+    folder = data_dir or season_dir(y)
+    paths = tuple(os.path.join(folder, SEASON_FILES[name].format(y = y, yy = y % 100))
+                  for name in ["results", "ratings", "advanced"])
+
+    # flat layout from before the season folders
+    if data_dir is None and y == DEFAULT_SEASON and not os.path.exists(paths[0]) \
+            and os.path.exists(PATH_RESULTS):
+        return PATH_RESULTS, PATH_RATING, PATH_ADVANCED
+    return paths
+
+
+def available_seasons() -> List[int]:
+    """Seasons that have a folder with a results file, oldest first (nothing is read)."""
+    if not os.path.isdir(DATA_DIR):
+        return []
+    found = []
+    for entry in os.listdir(DATA_DIR):
+        if entry.isdigit() and os.path.exists(season_paths(int(entry))[0]):
+            found.append(int(entry))
+    return sorted(found)
+
+
+
+# One catalog per season for the whole process, least recently used dropped
+# past SEASON_CACHE_SIZE (predictors already built keep their own frames)
+_catalogs: "OrderedDict[int, DataCatalog]" = OrderedDict()
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(season = None) -> DataCatalog:
+    """Return the process-wide catalog for a season (created on first use, nothing read yet)."""
+    y = season_key(season)
+    with _catalog_lock:
+        catalog = _catalogs.get(y)
+        if catalog is None:
+            paths = season_paths(y)
+            if not os.path.exists(paths[0]):
+                raise FileNotFoundError(f"no data for season {y} (expected {paths[0]})")
+            catalog = _catalogs[y] = DataCatalog(*paths, season = y)
+        _catalogs.move_to_end(y)
+        while len(_catalogs) > SEASON_CACHE_SIZE:
+            _catalogs.popitem(last = False)
+    return catalog
+
+
+def use_data_dir(data_dir, season = None) -> DataCatalog:
+    """
+    Point a season's catalog at another folder with that season's file names
+    (benchmark / synthetic data). Predictors made after this read from there.
+    """
+    y = season_key(season)
+    with _catalog_lock:
+        catalog = _catalogs[y] = DataCatalog(*season_paths(y, data_dir), season = y)
+        _catalogs.move_to_end(y)
+    return catalog
+
+
+def _source_signature(source_paths) -> list:
+    # size + modification time of every source CSV, plus the snapshot format version
+    sig = [SNAPSHOT_VERSION]
+    for path in source_paths:
+        st = os.stat(path)
+        sig.append([os.path.basename(path), st.st_size, st.st_mtime_ns])
+    return sig
+
+
+def save_snapshot(path, frames, source_paths) -> None:
+    """
+    Save a dict of {name: DataFrame} to one uncompressed .npz file.
+    Every column is stored as a plain NumPy array (text as int codes + unique values)
+    so loading never needs pickle. Failing to write (read-only folder) is not an error.
+    """
+    arrays = {}
+    layout = {}
+
+    for name, df in frames.items():
+        cols = []
+        for i, col in enumerate(df.columns):
+            series = df[col]
+            key = f"{name}__{i}"
+
+            if series.dtype.kind in "biuf":
+                arrays[key] = series.to_numpy()
+            else:
+                # text column: each distinct value stored once, -1 code = missing
+                codes, uniques = pd.factorize(series)
+                arrays[key] = codes.astype(np.int32)
+                arrays[key + "__text"] = np.asarray(uniques, dtype=str)
+
+            cols.append([str(col), str(series.dtype)])
+        layout[name] = cols
+
+    meta = {"signature": _source_signature(source_paths), "layout": layout}
+    arrays["__meta__"] = np.array(json.dumps(meta))
+
+    # write to a temp file first so a reader never sees half a snapshot
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_snapshot(path, source_paths):
+    """Load a snapshot written by save_snapshot, or None if it is missing or stale."""
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path, allow_pickle = False) as data:
+            meta = json.loads(str(data["__meta__"]))
+            if meta["signature"] != _source_signature(source_paths):
+                return None
+
+            frames = {}
+            for name, cols in meta["layout"].items():
+                columns = {}
+                for i, (col, dtype) in enumerate(cols):
+                    key = f"{name}__{i}"
+                    values = data[key]
+
+                    if key + "__text" in data:
+                        # append NaN so code -1 reads as missing
+                        uniques = np.append(data[key + "__text"].astype(object), np.nan)
+                        columns[col] = pd.Series(uniques[values]).astype(dtype)
+                    else:
+                        columns[col] = values
+                frames[name] = pd.DataFrame(columns)
+            return frames
+
+    except (OSError, ValueError, KeyError):
+        # unreadable / old format snapshot, just fall back to the CSVs
+        return None
+
 
-def load_all_data():
-    """Load all three datasets and return as dataframes."""
-    results = pd.read_csv(PATH_RESULTS)
-    ratings = pd.read_csv(PATH_RATING)
-    adv = pd.read_csv(PATH_ADVANCED)
-    return results, ratings, adv
+def load_all_data(season = None):
+    """Load all three datasets (one season, default 2025) and return as dataframes."""
+    catalog = get_catalog(season)
+    return catalog.results, catalog.ratings, catalog.advanced
@@ -7,12 +7,20 @@
 @Brief - GUI w
 """
 
+import argparse
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk, messagebox
 
 from team_logic import load_team_list
 from prediction import MatchupPredictor
 from prediction_explainer import build_breakdown_text
+import profiling
+from team_search import TeamSearchIndex
+
+
+POLL_MS = 50       # how often the Tk loop checks for finished background jobs
+DEBOUNCE_MS = 120  # wait for typing to pause before searching
 
 
 # Team selector 
@@ -21,9 +29,10 @@ class TeamSelector(ttk.Frame):
     def __init__(self, master, teams, title = "Team", *args, **kwargs):
         ttk.Frame.__init__(self, master, *args, **kwargs)
 
-        self.all_teams = sorted(teams)
-        self.filtered_teams = self.all_teams[:]
+        self.index = TeamSearchIndex(teams)
+        self.filtered_teams = self.index.search("")
         self.selected_team = None
+        self._search_after = None
 
         self.title_label = ttk.Label(
             self, text=title, font=("Times New Roman", 11, "bold")
@@ -37,7 +46,7 @@ class TeamSelector(ttk.Frame):
         self.search_var = tk.StringVar()
         self.search_entry = ttk.Entry(search_frame, textvariable = self.search_var)
         self.search_entry.pack(side = "left", fill = "x", expand = True, padx = (5, 0))
-        self.search_var.trace_add("write", self.update_filter)
+        self.search_var.trace_add("write", self.schedule_filter)
 
         self.listbox = tk.Listbox(self, height=12)
         self.listbox.pack(fill = "both", expand = True)
@@ -45,15 +54,29 @@ class TeamSelector(ttk.Frame):
 
         self.update_listbox()
 
+    def set_index(self, index):
+        # swap in the search index once the background load finishes
+        self.index = index
+        self.update_filter()
+
+    def schedule_filter(self, *args):
+        # debounce: only search once typing stops for DEBOUNCE_MS
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+        self._search_after = self.after(DEBOUNCE_MS, self.update_filter)
+
     def update_filter(self, *args):
-        q = self.search_var.get().lower()
-        self.filtered_teams = [t for t in self.all_teams if q in t.lower()]
-        self.update_listbox()
+        self._search_after = None
+        matches = self.index.search(self.search_var.get())
+        if matches != self.filtered_teams:
+            self.filtered_teams = matches
+            self.update_listbox()
 
     def update_listbox(self):
+        # one delete + one insert call instead of a Tk call per row
         self.listbox.delete(0, tk.END)
-        for t in self.filtered_teams:
-            self.listbox.insert(tk.END, t)
+        if self.filtered_teams:
+            self.listbox.insert(tk.END, *self.filtered_teams)
 
     def on_select(self, event):
         if not self.listbox.curselection():
@@ -69,27 +92,106 @@ class TeamSelector(ttk.Frame):
 # Prediction portion
 class PredictionApp(tk.Tk):
 
-    def __init__(self):
+    def __init__(self, record_path = None):
         tk.Tk.__init__(self)
 
         self.title("College Hoops Predictor")
         self.geometry("900x650")
 
-        try:
-            self.teams = load_team_list()
-        except Exception as e:
-            messagebox.showerror("Error loading teams", str(e))
-            self.destroy()
-            return
+        self.teams = []
+        self.predictor = None
+        self.record_path = record_path   # SQLite file to log predictions to (prediction_recorder.py)
 
-        try:
-            self.predictor = MatchupPredictor()
-        except Exception as e:
-            messagebox.showerror("Error loading prediction model", str(e))
-            self.destroy()
-            return
+        # One worker thread does the slow stuff (CSV loading, the model, predictions,
+        # any bulk work) in the order it was submitted. Tk widgets are only touched
+        # on the main thread, _poll_jobs() picks up finished results with after().
+        self.executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "predictor")
+        self._jobs = []           # (future, on_done, on_error)
+        self._predict_token = 0   # bumped on every click, older results are ignored
+        self._predict_future = None
+        self._closed = False
 
         self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self._poll_jobs()
+
+        # window is up right away, data fills in as it loads
+        self.run_in_background(lambda: TeamSearchIndex(load_team_list()),
+                               on_done = self._teams_loaded,
+                               on_error = lambda e: self._load_failed("Error loading teams", e))
+        self.run_in_background(MatchupPredictor,
+                               on_done = self._model_loaded,
+                               on_error = lambda e: self._load_failed("Error loading prediction model", e))
+
+
+
+    # Background jobs
+    def run_in_background(self, fn, *args, on_done = None, on_error = None, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the worker thread.
+        on_done(result) / on_error(exception) are called later on the Tk thread.
+        Returns the Future (cancel() drops it if it hasn't started yet).
+        """
+        future = self.executor.submit(fn, *args, **kwargs)
+        self._jobs.append((future, on_done, on_error))
+        return future
+
+    def _poll_jobs(self):
+        finished = []
+        running = []
+        for job in self._jobs:
+            (finished if job[0].done() else running).append(job)
+        self._jobs = running
+
+        for future, on_done, on_error in finished:
+            if self._closed:
+                return
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                if on_error is not None:
+                    on_error(error)
+                else:
+                    messagebox.showerror("Error", str(error))
+            elif on_done is not None:
+                on_done(future.result())
+
+        if not self._closed:
+            self._poll_id = self.after(POLL_MS, self._poll_jobs)
+
+    def on_close(self):
+        self._closed = True
+        self.after_cancel(self._poll_id)
+        self.executor.shutdown(wait = False, cancel_futures = True)
+        if self.predictor is not None and self.predictor.recorder is not None:
+            self.predictor.recorder.close()
+        self.destroy()
+
+
+
+    # Loading
+    def _teams_loaded(self, index):
+        self.teams = index.names
+        self.team1_selector.set_index(index)
+        self.team2_selector.set_index(index)
+        self.count_label.config(text = f"Teams loaded: {len(index)}")
+
+    def _model_loaded(self, predictor):
+        self.predictor = predictor
+        if self.record_path is not None:
+            from prediction_recorder import DB_PATH, PredictionRecorder
+            PredictionRecorder.for_predictor(predictor, self.record_path or DB_PATH)
+
+        # from here on the selectors use the predictor's own index (same names + aliases)
+        self.team1_selector.set_index(predictor.team_store.search)
+        self.team2_selector.set_index(predictor.team_store.search)
+        self.predict_button.state(["!disabled"])
+        self.result_label.config(text = "Pick two teams to start.", foreground = "")
+
+    def _load_failed(self, title, error):
+        messagebox.showerror(title, str(error))
+        self.on_close()
 
 
 
@@ -134,6 +236,7 @@ class PredictionApp(tk.Tk):
                                          text = "Predict Winner",
                                          command = self.predict)
         self.predict_button.pack(pady=15)
+        self.predict_button.state(["disabled"])   # until the model is loaded
 
 
 
@@ -162,8 +265,9 @@ class PredictionApp(tk.Tk):
         self.canvas.create_window((0, 0), window = self.inner_frame, anchor = "nw")
 
         self.result_label = ttk.Label(self.inner_frame,
-                                      text="Pick two teams to start.",
-                                      font=("Times New Roman", 14))
+                                      text="Loading prediction model...",
+                                      font=("Times New Roman", 14),
+                                      foreground = "gray")
         self.result_label.pack(anchor = "w", pady = (0, 10))
 
         self.breakdown_label = ttk.Label(self.inner_frame,
@@ -172,8 +276,7 @@ class PredictionApp(tk.Tk):
                                          justify = "left")
         self.breakdown_label.pack(anchor = "w")
 
-        teams_loaded_text = f"Teams loaded: {len(self.teams)}"
-        self.count_label = ttk.Label(self.predictor_tab, text = teams_loaded_text)
+        self.count_label = ttk.Label(self.predictor_tab, text = "Loading teams...")
         self.count_label.pack(pady = 5)
 
 
@@ -276,11 +379,37 @@ a logistic curve. Larger positive margin → higher win chance for Team 1.
             messagebox.showwarning("Error", "Pick two different teams.")
             return
 
-        try:
-            pred = self.predictor.predict_matchup(t1, t2, location = "N")
-        except Exception as e:
-            messagebox.showerror("Prediction error", str(e))
+        if self.predictor is None:
+            return
+
+        # a newer click makes any older request stale: drop it if it hasn't
+        # started, and ignore its result if it has
+        if self._predict_future is not None:
+            self._predict_future.cancel()
+        self._predict_token += 1
+        token = self._predict_token
+
+        self.result_label.config(text = f"Predicting {t1} vs {t2}...", foreground = "gray")
+        self._predict_future = self.run_in_background(
+            self._predict_job, t1, t2,
+            on_done = lambda result: self._show_prediction(token, *result),
+            on_error = lambda e: self._prediction_failed(token, e),
+        )
+
+    def _predict_job(self, t1, t2):
+        # worker thread: prediction + breakdown text, no widgets
+        pred = self.predictor.predict_matchup(t1, t2, location = "N")
+        return pred, build_breakdown_text(pred, self.predictor)
+
+    def _prediction_failed(self, token, error):
+        if token != self._predict_token:
             return
+        self.result_label.config(text = "", foreground = "")
+        messagebox.showerror("Prediction error", str(error))
+
+    def _show_prediction(self, token, pred, breakdown_text):
+        if token != self._predict_token:
+            return   # stale, a newer click is on its way
 
         score_text = f"{pred['team']} {pred['team_score']} - {pred['opponent_score']} {pred['opponent']}"
         prob_text = f"(Win prob {pred['win_prob']*100:.1f}% for {pred['team']})"
@@ -288,11 +417,22 @@ a logistic curve. Larger positive margin → higher win chance for Team 1.
         self.result_label.config(text = score_text + "  " + prob_text,
                                  foreground = "blue")
 
-        breakdown_text = build_breakdown_text(pred)
         self.breakdown_label.config(text=breakdown_text)
 
 
 
 if __name__ == "__main__":
-    app = PredictionApp()
+    parser = argparse.ArgumentParser(description = "College hoops matchup predictor")
+    parser.add_argument("--profile", action = "store_true", help = "print stage timings when the window closes")
+    parser.add_argument("--record", nargs = "?", const = "", metavar = "DB",
+                        help = "log every prediction to this SQLite file (default Data/cbb.sqlite3)")
+    args = parser.parse_args()
+
+    if args.profile:
+        profiling.enable()
+
+    app = PredictionApp(record_path = args.record)
     app.mainloop()
+
+    if args.profile:
+        print(profiling.PROFILER.report())
@@ -0,0 +1,151 @@
+"""
+@Author - Adam Pinkos
+@File   - load_test.py
+@Date   - 12/20/2025
+@Brief  - Load test for prediction_server.py: many concurrent keep-alive clients
+          hammering /predict (and optionally /predict_batch) over loopback.
+          Prints throughput, latency percentiles and how well the server coalesced.
+
+Start the server first:   python prediction_server.py
+Then:                      python load_test.py --clients 300 --requests 50
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from prediction_server import DEFAULT_HOST, DEFAULT_PORT
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection (standard library only)."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+
+    async def connect(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+
+    async def request(self, method: str, path: str, payload: Any = None) -> Tuple[int, Any]:
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        ).encode("latin-1")
+        self.writer.write(head + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            if key.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+
+async def _client_loop(host, port, teams, n_requests, batch_size, rng, latencies, errors) -> None:
+    client = Client(host, port)
+    await client.connect()
+    try:
+        for _ in range(n_requests):
+            if batch_size > 1:
+                matchups = [dict(zip(["team", "opponent"], rng.sample(teams, 2)),
+                                 location = rng.choice("HVN")) for _ in range(batch_size)]
+                method, path, payload = "POST", "/predict_batch", {"matchups": matchups}
+            else:
+                team, opp = rng.sample(teams, 2)
+                method, path, payload = "POST", "/predict", {"team": team, "opponent": opp,
+                                                             "location": rng.choice("HVN")}
+            start = time.perf_counter()
+            status, _ = await client.request(method, path, payload)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        await client.close()
+
+
+
+async def run_load_test(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, clients: int = 200,
+                        requests: int = 50, batch_size: int = 1, seed: int = 0) -> dict:
+    """Run the test and return the summary numbers (also printed by __main__)."""
+
+    probe = Client(host, port)
+    await probe.connect()
+    _, body = await probe.request("GET", "/teams")
+    _, before = await probe.request("GET", "/stats")
+    teams: List[str] = body["teams"]
+
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    errors: List[int] = []
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _client_loop(host, port, teams, requests, batch_size, random.Random(rng.random()), latencies, errors)
+        for _ in range(clients)
+    ])
+    elapsed = time.perf_counter() - start
+
+    _, after = await probe.request("GET", "/stats")
+    await probe.close()
+
+    lat_ms = np.array(latencies) * 1000.0
+    served = after["requests"] - before["requests"]
+    batches = after["batches"] - before["batches"]
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "requests_per_s": len(latencies) / elapsed,
+        "matchups_per_s": len(latencies) * batch_size / elapsed,
+        "latency_ms_p50": float(np.percentile(lat_ms, 50)),
+        "latency_ms_p95": float(np.percentile(lat_ms, 95)),
+        "latency_ms_p99": float(np.percentile(lat_ms, 99)),
+        "latency_ms_max": float(lat_ms.max()),
+        "server_batches": batches,
+        "requests_per_batch": served / batches if batches else 0.0,
+    }
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Load test the prediction service")
+    parser.add_argument("--host", default = DEFAULT_HOST)
+    parser.add_argument("--port", type = int, default = DEFAULT_PORT)
+    parser.add_argument("--clients", type = int, default = 200, help = "concurrent connections")
+    parser.add_argument("--requests", type = int, default = 50, help = "requests per client")
+    parser.add_argument("--batch-size", type = int, default = 1,
+                        help = "> 1 sends /predict_batch with this many matchups per request")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--json", action = "store_true", help = "print the summary as JSON")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_load_test(args.host, args.port, args.clients, args.requests,
+                                        args.batch_size, args.seed))
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        for key, value in summary.items():
+            print(f"{key:20} {value:12.2f}" if isinstance(value, float) else f"{key:20} {value:12}")
@@ -0,0 +1,165 @@
+"""
+@Author - Adam Pinkos
+@File   - matrix_file.py
+@Date   - 12/08/2025
+@Brief  - Read-only, memory-mapped N x N float32 matrix file
+          (rating diffs + win probabilities) that many processes can share.
+"""
+
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+
+
+# File layout
+#   8 bytes   magic  b"CBBMAT1\n"
+#   8 bytes   header length (little-endian uint64)
+#   header    JSON: format version, model version, team names (row order),
+#             matrix names, n
+#   padding   up to a 64 byte boundary
+#   data      one (n + 1) x (n + 1) float32 block per matrix, C order
+#
+# Row/column n is the "unknown team" slot, so team ID -1 can index the
+# matrix directly (same trick as the predictor's in-memory rating matrix).
+MAGIC          = b"CBBMAT1\n"
+FORMAT_VERSION = 1
+ALIGN          = 64
+
+# Value stored in the unknown-team slot for each matrix
+FILL_VALUES = {
+    "rating_diff": 0.0,   # no rating edge
+    "win_prob": 0.5,      # coin flip
+}
+
+
+def write_matrix_file(path: str, teams: List[str], matrices: Dict[str, np.ndarray],
+                      model_version: str) -> None:
+    """
+    Write square matrices indexed by position in teams.
+    Each matrix may be n x n or already padded to (n + 1) x (n + 1).
+    """
+
+    n = len(teams)
+    names = list(matrices)
+
+    header = json.dumps({
+        "format_version": FORMAT_VERSION,
+        "model_version": model_version,
+        "teams": list(teams),
+        "matrices": names,
+        "n": n,
+    }).encode("utf-8")
+
+    data_offset = len(MAGIC) + 8 + len(header)
+    padding = (-data_offset) % ALIGN
+
+    # write to a temp file first so a reader never maps half a file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        f.write(b"\0" * padding)
+
+        for name in names:
+            block = np.full((n + 1, n + 1), FILL_VALUES.get(name, 0.0), dtype=np.float32)
+            block[:n, :n] = np.asarray(matrices[name])[:n, :n]
+            f.write(block.tobytes(order="C"))
+
+    os.replace(tmp_path, path)
+
+
+
+class MatrixFile:
+    """
+    Memory-mapped view of a file written by write_matrix_file.
+
+    The data is mapped read-only, so every process that opens the same file
+    shares the same physical pages instead of holding its own copy.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a CBB matrix file")
+            header_len = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+        if header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported matrix file version {header.get('format_version')}")
+
+        self.model_version: str = header["model_version"]
+        self.teams: List[str] = header["teams"]
+        self.team_ids: Dict[str, int] = {name: i for i, name in enumerate(self.teams)}
+        self.matrix_names: List[str] = header["matrices"]
+
+        n = header["n"]
+        data_offset = len(MAGIC) + 8 + header_len
+        data_offset += (-data_offset) % ALIGN
+
+        self._data = np.memmap(
+            path, dtype=np.float32, mode="r", offset=data_offset,
+            shape=(len(self.matrix_names), n + 1, n + 1),
+        )
+
+
+    def __len__(self) -> int:
+        return len(self.teams)
+
+
+    def team_id(self, team_name: str) -> int:
+        # -1 = not in the file (reads the fill slot)
+        return self.team_ids.get(team_name, -1)
+
+
+    def matrix(self, name: str) -> np.ndarray:
+        """(n + 1) x (n + 1) read-only view of one matrix."""
+        return self._data[self.matrix_names.index(name)]
+
+
+
+def write_from_predictor(predictor, path: str, source: str = "model") -> None:
+    """
+    Save a predictor's rating diffs and win probabilities for every team it knows,
+    in team_store ID order (so a predictor built from the same data maps it without copying).
+
+    source = "model"   win_prob from the model at a neutral site
+    source = "ratings" win_prob column from ncaa_wp_matrix_2025.csv (0.5 where missing)
+    """
+
+    if source == "model":
+        win_prob = predictor.win_prob_matrix("N")
+    elif source == "ratings":
+        win_prob = _csv_win_probs(predictor)
+    else:
+        raise ValueError(f"unknown matrix source {source!r}")
+
+    write_matrix_file(
+        path,
+        predictor.team_store.names,
+        {"rating_diff": predictor.rating_matrix, "win_prob": win_prob},
+        model_version=predictor.model_version,
+    )
+
+
+def _csv_win_probs(predictor) -> np.ndarray:
+    # win_prob column laid out by team ID; reversed rows get 1 - p, direct rows win
+    n = len(predictor.team_store)
+    probs = np.full((n + 1, n + 1), 0.5, dtype=np.float64)
+
+    df = predictor.ratings_df
+    if "win_prob" not in df.columns:
+        return probs
+
+    rows = df.drop_duplicates(["team", "opponent"], keep="first")
+    t_ids = predictor.team_store.team_ids(rows["team"])
+    o_ids = predictor.team_store.team_ids(rows["opponent"])
+    p = rows["win_prob"].to_numpy(dtype=np.float64)
+
+    probs[o_ids, t_ids] = 1.0 - p
+    probs[t_ids, o_ids] = p
+    return probs
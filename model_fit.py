@@ -0,0 +1,159 @@
+"""
+@Author - Adam Pinkos
+@File   - model_fit.py
+@Date   - 12/16/2025
+@Brief  - Fit COEF_* / HOME_EDGE (least squares on margin) and MARGIN_SCALE
+          (logistic regression on wins) from the results, and save them as a
+          versioned model artifact MatchupPredictor can load.
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+
+ALGORITHM_NAME = "least_squares+logistic"
+
+# One entry per fitted margin coefficient, in backtest.DESIGN_COLUMNS order.
+# (param, feature_name, source_table, source_column, description) - same fields as model_features
+MARGIN_FEATURES = [
+    ("COEF_OFFENSE", "offense_diff", "team_season_advanced_stats", "ADJOE",
+     "ADJOE_team1 - ADJOE_team2"),
+    ("COEF_DEFENSE", "defense_diff", "team_season_advanced_stats", "ADJDE",
+     "ADJDE_team2 - ADJDE_team1"),
+    ("COEF_BARTHAG", "barthag_diff", "team_season_advanced_stats", "BARTHAG",
+     "BARTHAG_team1 - BARTHAG_team2"),
+    ("COEF_RANK", "rank_diff", "team_season_advanced_stats", "rk",
+     "RANK_team2 - RANK_team1"),
+    ("COEF_RATING", "rating_diff", "rating_matrix", "rating_team",
+     "rating_team1 - rating_team2"),
+    ("HOME_EDGE", "location_sign", "game_results", "location_code",
+     "+1 home, -1 away, 0 neutral"),
+]
+
+NEWTON_STEPS = 50
+
+
+
+def fit_model(backtest, model_name: str = "fitted", description: str = "") -> Dict[str, Any]:
+    """
+    Fit the margin coefficients and MARGIN_SCALE on every game in the backtest.
+    Parameters that aren't fitted (MAX_MARGIN, total clamp) keep the predictor's values.
+    Returns the artifact dict (see save_model_artifact).
+    """
+
+    X, y = backtest.design_matrix()
+    params = dict(backtest.predictor.params)
+
+
+    # 1) margin = X @ coefs  (no intercept: swapping Team 1 / Team 2 must flip the sign)
+    coefs, *_ = np.linalg.lstsq(X, y, rcond = None)
+    for (param, *_), value in zip(MARGIN_FEATURES, coefs):
+        params[param] = float(value)
+
+
+    # 2) win prob = 1 / (1 + exp(-margin / MARGIN_SCALE)), fit k = 1 / MARGIN_SCALE by Newton's method
+    margin = np.clip(X @ coefs, -params["MAX_MARGIN"], params["MAX_MARGIN"])
+    won = (y > 0).astype(np.float64)
+    k = 1.0 / params["MARGIN_SCALE"]
+    for _ in range(NEWTON_STEPS):
+        p = 1.0 / (1.0 + np.exp(-k * margin))
+        grad = np.sum((won - p) * margin)
+        hess = -np.sum(p * (1.0 - p) * margin ** 2)
+        if hess == 0.0:
+            break
+        step = grad / hess
+        k = max(k - step, 1e-6)
+        if abs(step) < 1e-12:
+            break
+    params["MARGIN_SCALE"] = float(1.0 / k)
+
+
+    # How much of the margin each feature moves (|coef| x feature spread), summing to 1
+    spread = np.abs(coefs) * X.std(axis = 0)
+    importance = spread / spread.sum() if spread.sum() > 0 else spread
+
+    created_at = datetime.now()
+    metrics = backtest.metrics(backtest.evaluate(params))
+
+    return {
+        "model_version": f"{model_name}-{created_at:%Y%m%d-%H%M%S}",
+        "model_name": model_name,
+        "description": description,
+        "algorithm_name": ALGORITHM_NAME,
+        "created_at": created_at.isoformat(timespec = "seconds"),
+        "is_active": 1,
+        "params": params,
+        "features": [
+            {
+                "feature_name": feature_name,
+                "source_table": table,
+                "source_column": column,
+                "description": desc,
+                "importance_score": round(float(imp), 4),
+            }
+            for (_, feature_name, table, column, desc), imp in zip(MARGIN_FEATURES, importance)
+        ],
+        "training": {"games": int(len(y))},
+        "metrics": metrics,
+    }
+
+
+
+def save_model_artifact(artifact: Dict[str, Any], path: Optional[str] = None) -> str:
+    """
+    Write the artifact as JSON (default models/<model_version>.json) and return the path.
+    Top-level keys line up with model_versions, "features" with model_features,
+    and "params" is what goes in hyperparams_json.
+    """
+
+    if path is None:
+        os.makedirs(MODELS_DIR, exist_ok = True)
+        path = os.path.join(MODELS_DIR, artifact["model_version"] + ".json")
+
+    with open(path, "w") as f:
+        json.dump(artifact, f, indent = 2)
+    return path
+
+
+
+def load_model_artifact(path: str) -> Dict[str, Any]:
+    """Read an artifact written by save_model_artifact."""
+
+    with open(path) as f:
+        artifact = json.load(f)
+
+    if "params" not in artifact or "model_version" not in artifact:
+        raise ValueError(f"{path} is not a model artifact (needs params + model_version)")
+    return artifact
+
+
+
+if __name__ == "__main__":
+    from backtest import Backtest
+    from prediction import MatchupPredictor
+
+    parser = argparse.ArgumentParser(description = "Fit the model constants from 2025_cbb_results.csv")
+    parser.add_argument("--name", default = "fitted", help = "model name (version gets a timestamp)")
+    parser.add_argument("--out", help = "artifact path (default models/<version>.json)")
+    args = parser.parse_args()
+
+    bt = Backtest(MatchupPredictor())
+    before = bt.metrics()
+    artifact = fit_model(bt, model_name = args.name)
+    path = save_model_artifact(artifact, args.out)
+
+    print(f"saved {path}")
+    for key, value in artifact["params"].items():
+        print(f"  {key:14} {value:10.4f}")
+    print()
+    print(f"{'metric':12} {'hard-coded':>10} {'fitted':>10}")
+    for key in before:
+        print(f"{key:12} {before[key]:10.4f} {artifact['metrics'][key]:10.4f}")
@@ -0,0 +1,226 @@
+"""
+@Author - Adam Pinkos
+@File   - param_search.py
+@Date   - 12/18/2025
+@Brief  - Grid / random search over the model constants (COEF_*, HOME_EDGE,
+          MAX_MARGIN, MARGIN_SCALE, total clamp) on a process pool.
+          The backtest feature matrix sits in shared memory, results stream
+          to a JSONL leaderboard and an interrupted search picks up where it left off.
+"""
+
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from backtest import score_predictions
+from prediction import score_arrays
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LEADERBOARD = os.path.join(BASE_DIR, "param_search_leaderboard.jsonl")
+
+# Shared feature matrix columns (one row per backtest game)
+STAT_COLUMNS = ["ADJOE", "ADJDE", "BARTHAG", "ADJ_T", "RANK"]
+COLUMNS = (
+    [f"t_{c}" for c in STAT_COLUMNS] + [f"o_{c}" for c in STAT_COLUMNS]
+    + ["rating_diff", "loc_sign", "team_total_avg", "opp_total_avg", "actual_margin", "actual_total"]
+)
+COL = {name: i for i, name in enumerate(COLUMNS)}
+
+# [low, high] ranges for random search
+DEFAULT_RANDOM_SPACE = {
+    "COEF_OFFENSE": [-1.0, 1.0],
+    "COEF_DEFENSE": [-1.0, 1.0],
+    "COEF_BARTHAG": [0.0, 80.0],
+    "COEF_RANK":    [-0.3, 0.3],
+    "COEF_RATING":  [0.0, 60.0],
+    "HOME_EDGE":    [0.0, 6.0],
+    "MAX_MARGIN":   [15.0, 40.0],
+    "MARGIN_SCALE": [4.0, 14.0],
+    "TOTAL_MIN":    [100.0, 130.0],
+    "TOTAL_MAX":    [160.0, 200.0],
+}
+
+# value lists for grid search
+DEFAULT_GRID_SPACE = {
+    "COEF_BARTHAG": [20.0, 40.0, 60.0, 70.0],
+    "COEF_RANK":    [-0.05, 0.0, 0.05, 0.25],
+    "HOME_EDGE":    [2.5, 3.5, 4.5, 5.5],
+    "MARGIN_SCALE": [6.0, 7.0, 8.0, 9.0],
+}
+
+BATCH_SIZE = 8   # candidates per pool task
+
+
+
+# Candidates
+def grid_candidates(space: Dict[str, List[float]], base: Dict[str, float]) -> Iterator[Dict[str, float]]:
+    # every combination of the listed values, everything else from base
+    names = list(space)
+    for values in itertools.product(*(space[n] for n in names)):
+        yield {**base, **dict(zip(names, values))}
+
+
+def random_candidates(space: Dict[str, List[float]], base: Dict[str, float],
+                      n: int, seed: Optional[int]) -> Iterator[Dict[str, float]]:
+    # n uniform draws inside each [low, high]; same seed = same candidates (needed to resume)
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        yield {**base, **{name: float(rng.uniform(lo, hi)) for name, (lo, hi) in space.items()}}
+
+
+def candidate_key(params: Dict[str, float]) -> str:
+    # identity of a candidate on the leaderboard
+    return json.dumps(params, sort_keys = True)
+
+
+
+# Shared memory feature matrix
+def pack_features(backtest) -> np.ndarray:
+    """All the backtest arrays the search needs as one (games x COLUMNS) float64 matrix."""
+    f = backtest.features
+    cols = (
+        [f["t_feats"][c] for c in STAT_COLUMNS] + [f["o_feats"][c] for c in STAT_COLUMNS]
+        + [f["rating_diff"], f["loc_sign"], f["team_total_avg"], f["opp_total_avg"],
+           backtest.actual_margin, backtest.actual_total]
+    )
+    return np.column_stack(cols).astype(np.float64)
+
+
+# set in each worker by _init_worker
+_worker = {}
+
+
+def _init_worker(shm_name: str, shape, league_avg_total_points: float, league_avg_tempo: float) -> None:
+    # Attach to the parent's shared block (no copy, no CSV loading in the worker)
+    shm = shared_memory.SharedMemory(name = shm_name)
+    _worker["shm"] = shm
+    _worker["matrix"] = np.ndarray(shape, dtype = np.float64, buffer = shm.buf)
+    _worker["league"] = (league_avg_total_points, league_avg_tempo)
+
+
+def _evaluate_batch(batch: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+    m = _worker["matrix"]
+    league_total, league_tempo = _worker["league"]
+    t_feats = {c: m[:, COL[f"t_{c}"]] for c in STAT_COLUMNS}
+    o_feats = {c: m[:, COL[f"o_{c}"]] for c in STAT_COLUMNS}
+
+    out = []
+    for params in batch:
+        scored = score_arrays(
+            t_feats, o_feats, m[:, COL["rating_diff"]], m[:, COL["loc_sign"]] * params["HOME_EDGE"],
+            m[:, COL["team_total_avg"]], m[:, COL["opp_total_avg"]],
+            params, league_total, league_tempo,
+        )
+        metrics = score_predictions(
+            scored["margin"], scored["team_score"] + scored["opponent_score"], scored["win_prob"],
+            m[:, COL["actual_margin"]], m[:, COL["actual_total"]],
+        )
+        out.append({"params": params, "metrics": metrics})
+    return out
+
+
+
+# Leaderboard
+def read_leaderboard(path: str) -> List[Dict[str, Any]]:
+    """Every finished candidate so far (a torn last line from a crash is skipped)."""
+    rows = []
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return rows
+
+
+def top(path: str, metric: str = "brier", n: int = 10) -> List[Dict[str, Any]]:
+    """Best n leaderboard rows, lowest metric first (accuracy: highest first)."""
+    sign = -1.0 if metric == "accuracy" else 1.0
+    return sorted(read_leaderboard(path), key = lambda r: sign * r["metrics"][metric])[:n]
+
+
+
+def run_search(backtest, candidates, leaderboard_path: str = DEFAULT_LEADERBOARD,
+               workers: Optional[int] = None, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Evaluate every candidate not already on the leaderboard across a process pool.
+    Each result is appended (and flushed) as soon as its batch finishes.
+    Returns how many candidates were evaluated this run.
+    """
+
+    done = {candidate_key(r["params"]) for r in read_leaderboard(leaderboard_path)}
+    todo = [c for c in candidates if candidate_key(c) not in done]
+    if not todo:
+        return 0
+
+    matrix = pack_features(backtest)
+    shm = shared_memory.SharedMemory(create = True, size = matrix.nbytes)
+    try:
+        np.ndarray(matrix.shape, dtype = np.float64, buffer = shm.buf)[:] = matrix
+        init_args = (shm.name, matrix.shape,
+                     backtest.predictor.league_avg_total_points, backtest.predictor.league_avg_tempo)
+
+        finished = 0
+        with ProcessPoolExecutor(max_workers = workers or os.cpu_count(),
+                                 initializer = _init_worker, initargs = init_args) as pool, \
+                open(leaderboard_path, "a") as board:
+
+            batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+            futures = [pool.submit(_evaluate_batch, b) for b in batches]
+
+            for future in as_completed(futures):
+                for row in future.result():
+                    board.write(json.dumps(row) + "\n")
+                    finished += 1
+                board.flush()
+        return finished
+
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+
+if __name__ == "__main__":
+    from backtest import Backtest
+    from prediction import MatchupPredictor
+
+    parser = argparse.ArgumentParser(description = "Parallel search over the model constants")
+    parser.add_argument("--mode", choices = ["random", "grid"], default = "random")
+    parser.add_argument("--space", help = "JSON file: param -> [low, high] (random) or value list (grid)")
+    parser.add_argument("--samples", type = int, default = 200, help = "random mode: number of candidates")
+    parser.add_argument("--seed", type = int, default = 0, help = "random mode: keep the same seed to resume")
+    parser.add_argument("--workers", type = int, help = "processes (default: all cores)")
+    parser.add_argument("--leaderboard", default = DEFAULT_LEADERBOARD)
+    parser.add_argument("--metric", default = "brier", help = "metric to rank the leaderboard by")
+    args = parser.parse_args()
+
+    bt = Backtest(MatchupPredictor())
+    base = dict(bt.predictor.params)
+
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    else:
+        space = DEFAULT_RANDOM_SPACE if args.mode == "random" else DEFAULT_GRID_SPACE
+
+    if args.mode == "random":
+        candidates = random_candidates(space, base, args.samples, args.seed)
+    else:
+        candidates = grid_candidates(space, base)
+
+    count = run_search(bt, candidates, args.leaderboard, args.workers)
+    print(f"evaluated {count} new candidates -> {args.leaderboard}")
+
+    for row in top(args.leaderboard, args.metric):
+        m = row["metrics"]
+        print(f"{args.metric} {m[args.metric]:.4f}   mae {m['margin_mae']:.2f}   "
+              + "  ".join(f"{k}={v:.3f}" for k, v in row["params"].items()))
@@ -6,12 +6,23 @@
 @Brief - Predict matchup scores using the 3 data files
 """
 
+import argparse
+import itertools
+import json
 import math
-from typing import Dict, Any
+import sys
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
 
+import numpy as np
 import pandas as pd
 
-from file_loader import load_all_data
+from file_loader import get_catalog
+from matrix_file import MatrixFile
+from model_fit import load_model_artifact
+import profiling
+from profiling import PROFILER
+from team_store import TeamFeatureStore
+from team_summaries import TeamSummaries, side_rows
 
 
 
@@ -26,24 +37,286 @@ HOME_EDGE      = 3.5    # Home game advantage
 MAX_MARGIN     = 30.0
 MARGIN_SCALE   = 7.0
 
+TOTAL_MIN      = 120.0  # realistic D1 game total range
+TOTAL_MAX      = 180.0
+
+MODEL_VERSION  = "cbb25-baseline-1"   # written into saved matrix files
+
+# Keys of the "parts" breakdown, in the order predict_matchup builds them
+PARTS_KEYS = [
+    "team1_ADJOE", "team1_ADJDE", "team1_BARTHAG", "team1_RANK", "team1_TEMPO",
+    "team2_ADJOE", "team2_ADJDE", "team2_BARTHAG", "team2_RANK", "team2_TEMPO",
+    "offense_diff", "defense_diff", "barthag_diff", "rank_diff", "rating_diff",
+    "margin_off_def", "margin_barth", "margin_rank", "margin_rating", "location_edge",
+    "raw_margin", "final_margin_clamped", "baseline_total_points", "tempo_adjusted_total",
+    "final_total_points",
+]
+
+CHUNK_SIZE     = 50_000   # rows per chunk for the streaming CLI
+
+
+def prediction_dtype(parts_dtype = np.float32, parts: bool = True) -> np.dtype:
+    """
+    Row layout of the columnar prediction tables (predict_table / project_all_pairs_table).
+    team_id / opponent_id are team_store IDs. Parts default to float32: a 400k-row
+    table is about 50 MB instead of the ~1 GB the same predictions take as dicts.
+    """
+    return np.dtype(
+        [("team_id", np.int32), ("opponent_id", np.int32), ("location", "U1"),
+         ("team_score", np.int16), ("opponent_score", np.int16), ("margin", np.int16),
+         ("win_prob", np.float64)]
+        + ([(key, parts_dtype) for key in PARTS_KEYS] if parts else [])
+    )
+
+
+def default_params() -> Dict[str, float]:
+    """The tunable constants above as one dict (what a fitted model artifact overrides)."""
+    return {
+        "COEF_OFFENSE": COEF_OFFENSE,
+        "COEF_DEFENSE": COEF_DEFENSE,
+        "COEF_BARTHAG": COEF_BARTHAG,
+        "COEF_RANK": COEF_RANK,
+        "COEF_RATING": COEF_RATING,
+        "HOME_EDGE": HOME_EDGE,
+        "MAX_MARGIN": MAX_MARGIN,
+        "MARGIN_SCALE": MARGIN_SCALE,
+        "TOTAL_MIN": TOTAL_MIN,
+        "TOTAL_MAX": TOTAL_MAX,
+    }
+
+
+
+
+
+# Vectorized scoring
+def score_arrays(
+    t_feats: Dict[str, np.ndarray], o_feats: Dict[str, np.ndarray],
+    rating_diff: np.ndarray, loc_edge: np.ndarray,
+    team_total_avg: np.ndarray, opp_total_avg: np.ndarray,
+    params: Dict[str, float], league_avg_total_points: float, league_avg_tempo: float,
+) -> Dict[str, np.ndarray]:
+    """
+    Same formula as MatchupPredictor.predict_matchup, but every input is a NumPy array.
+    Inputs only need to broadcast against each other, so this works for
+    a flat list of games or a (location, team, opponent) grid.
+    The order of operations matches predict_matchup so results are identical.
+
+    Needs no predictor, so worker processes can run it on shared arrays.
+    """
+
+    # a float32 rating file shouldn't drag the whole calculation down to float32
+    rating_diff = np.asarray(rating_diff, dtype=np.float64)
+
+    # Stat differences (Team1 - Team2)
+    offense_diff = t_feats["ADJOE"] - o_feats["ADJOE"]
+    defense_diff = o_feats["ADJDE"] - t_feats["ADJDE"]
+    barthag_diff = t_feats["BARTHAG"] - o_feats["BARTHAG"]
+    rank_diff    = o_feats["RANK"] - t_feats["RANK"]
+
+    # Points added to the spread
+    margin_off_def = params["COEF_OFFENSE"] * offense_diff + params["COEF_DEFENSE"] * defense_diff
+    margin_barth   = params["COEF_BARTHAG"] * barthag_diff
+    margin_rank    = params["COEF_RANK"] * rank_diff
+    margin_rating  = params["COEF_RATING"] * rating_diff
+
+    raw_margin = margin_off_def + margin_barth + margin_rank + margin_rating + loc_edge
+    final_margin_float = np.clip(raw_margin, -params["MAX_MARGIN"], params["MAX_MARGIN"])
+
+    baseline_total, tempo_total, final_total_float = total_arrays(
+        t_feats["ADJ_T"], o_feats["ADJ_T"], team_total_avg, opp_total_avg,
+        params, league_avg_total_points, league_avg_tempo,
+    )
+    team_score, opp_score = final_scores(final_total_float, final_margin_float)
+
+
+    # Win probability from margin
+    win_prob = 1.0 / (1.0 + np.exp(-final_margin_float / params["MARGIN_SCALE"]))
+    win_prob = np.clip(win_prob, 0.0, 1.0)
+
+    return {
+        "team_score": team_score,
+        "opponent_score": opp_score,
+        "margin": team_score - opp_score,
+        "win_prob": win_prob,
+
+        "team1_ADJOE": t_feats["ADJOE"],
+        "team1_ADJDE": t_feats["ADJDE"],
+        "team1_BARTHAG": t_feats["BARTHAG"],
+        "team1_RANK": t_feats["RANK"],
+        "team1_TEMPO": t_feats["ADJ_T"],
+
+        "team2_ADJOE": o_feats["ADJOE"],
+        "team2_ADJDE": o_feats["ADJDE"],
+        "team2_BARTHAG": o_feats["BARTHAG"],
+        "team2_RANK": o_feats["RANK"],
+        "team2_TEMPO": o_feats["ADJ_T"],
+
+        "offense_diff": offense_diff,
+        "defense_diff": defense_diff,
+        "barthag_diff": barthag_diff,
+        "rank_diff": rank_diff,
+        "rating_diff": rating_diff,
+
+        "margin_off_def": margin_off_def,
+        "margin_barth": margin_barth,
+        "margin_rank": margin_rank,
+        "margin_rating": margin_rating,
+        "location_edge": loc_edge,
+
+        "raw_margin": raw_margin,
+        "final_margin_clamped": final_margin_float,
+        "baseline_total_points": baseline_total,
+        "tempo_adjusted_total": tempo_total,
+        "final_total_points": final_total_float,
+    }
+
+
+
+
+def total_arrays(t_tempo, o_tempo, team_total_avg, opp_total_avg, params: Dict[str, float],
+                 league_avg_total_points: float, league_avg_tempo: float):
+    """
+    The expected-total half of score_arrays: (baseline_total, tempo_total, final_total).
+    The only part of a projection that depends on the game results, so a cached
+    projection can redo just this after new results come in (see ingest_results).
+    """
+
+    # Baseline total = average of league avg and whichever team averages exist
+    t_has = ~np.isnan(team_total_avg)
+    o_has = ~np.isnan(opp_total_avg)
+    total_sum = league_avg_total_points + np.where(t_has, team_total_avg, 0.0)
+    total_sum = total_sum + np.where(o_has, opp_total_avg, 0.0)
+    baseline_total = total_sum / (1.0 + t_has + o_has)
+
+
+    # Tempo adjustment
+    avg_tempo = (t_tempo + o_tempo) / 2.0
+    if league_avg_tempo > 0:
+        tempo_factor = avg_tempo / league_avg_tempo
+    else:
+        tempo_factor = np.ones_like(avg_tempo)
+
+    tempo_total = baseline_total * tempo_factor
+    final_total_float = np.clip(tempo_total, params["TOTAL_MIN"], params["TOTAL_MAX"])
+    return baseline_total, tempo_total, final_total_float
+
+
+def final_scores(final_total_float, final_margin_float):
+    # Scores from total + margin (np.rint rounds half to even, same as round())
+    team_score_f = (final_total_float + final_margin_float) / 2.0
+    opp_score_f  = (final_total_float - final_margin_float) / 2.0
+
+    team_score = np.rint(np.clip(team_score_f, 40.0, 115.0)).astype(np.int64)
+    opp_score  = np.rint(np.clip(opp_score_f, 40.0, 115.0)).astype(np.int64)
+    return team_score, opp_score
+
+
+
+
+def prepare_results_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Clean 2025_cbb_results.csv rows (the whole file at startup, or newly ingested rows)."""
+
+    # Make sure the team score column is numeric
+    # turns bad values into NaN instead of crashing.
+    df["teamscore"] = pd.to_numeric(df.get("teamscore"), errors = "coerce")
+
+
+    # Same thing for the opponent score.
+    df["oppscore"] = pd.to_numeric(df.get("oppscore"), errors = "coerce")
+
+
+    # Total points scored in the game 
+    # team + opponent
+    df["total_points"] = df["teamscore"] + df["oppscore"]
+
+
+    # Margin = points_for_team - points_for_opponent
+    # Positive margin means the primary team won
+    df["margin"] = df["teamscore"] - df["oppscore"]
+
+    return df
 
 
 
 
 class MatchupPredictor:
 
-    def __init__(self):
-        results_df, ratings_df, adv_df = load_all_data()  # load_all_data() gives us the 3 data sets
+    def __init__(self, rating_source = None, model = None, season = None, database = None):
+        """
+        season (optional) = which Data/<season> folder to predict from (2025, "2024-25", ...),
+        default file_loader.DEFAULT_SEASON. Only that season's files are read.
+
+        database (optional) = path to the SQLite file from cbb_database.py to read the
+        season from instead of the CSVs.
+
+        rating_source (optional) = path to a matrix_file.py file (or an open MatrixFile)
+        to use for rating diffs instead of ncaa_wp_matrix_2025.csv.
+
+        model (optional) = path to a fitted model artifact from model_fit.py (or its dict)
+        whose parameters replace the hard-coded COEF_* / HOME_EDGE / MARGIN_SCALE values.
+        """
+
+        # Stage timings / counters (see profiling.py), off unless --profile / profiling.enable()
+        self.profiler = PROFILER
+        prof = self.profiler
+
+        # PredictionRecorder that logs every prediction to SQLite (None = not logged)
+        self.recorder = None
+
+        # Model parameters: the module constants unless a fitted artifact is given
+        self.params = default_params()
+        self.model_version = MODEL_VERSION
+        if model is not None:
+            if isinstance(model, str):
+                model = load_model_artifact(model)
+            self.params.update(model["params"])
+            self.model_version = model["model_version"]
+
+        if isinstance(rating_source, str):
+            rating_source = MatrixFile(rating_source)
+        self.rating_source = rating_source
+
+        if database is not None:
+            from cbb_database import get_database
+            catalog = get_database(database).catalog(season)
+        else:
+            catalog = get_catalog(season)
+        self.season = catalog.season
 
-        # store copies of the 3 dataframes inside the class
-        self.results_df = results_df.copy()
-        self.ratings_df = ratings_df.copy()
-        self.adv_df = adv_df.copy()
+        # If the CSVs haven't changed since the last run, the already-prepared
+        # frames come straight from the binary snapshot (no CSV parsing, no _prepare_*)
+        prepared = catalog.load_prepared()
 
-        # clean  all 3 datasets
-        self._prepare_results()
-        self._prepare_advanced()
-        self._prepare_ratings()
+        if prepared is not None:
+            self.results_df = prepared["results"]
+            self.ratings_df = prepared["ratings"]
+            self.adv_df = prepared["advanced"]
+            self._index_advanced()
+
+        else:
+            results_df, ratings_df, adv_df = catalog.results, catalog.ratings, catalog.advanced  # the 3 data sets
+
+            # These are views of the shared catalog's frames, not copies.
+            # Copy-on-write (or a real copy on pandas 2.x, see file_loader.handout) keeps the
+            # _prepare_* column changes below private to this predictor
+            self.results_df = results_df
+            self.ratings_df = ratings_df
+            self.adv_df = adv_df
+
+            # clean  all 3 datasets
+            with prof.stage("prepare_results"):
+                self._prepare_results()
+            with prof.stage("prepare_advanced"):
+                self._prepare_advanced()
+            with prof.stage("prepare_ratings"):
+                self._prepare_ratings()
+
+            # save the cleaned frames so the next start can skip all of the above
+            catalog.save_prepared({
+                "results": self.results_df,
+                "ratings": self.ratings_df,
+                "advanced": self.adv_df,
+            })
 
         # compute the average total points per game
         self.league_avg_total_points = float(self.results_df["total_points"].mean())
@@ -56,32 +329,52 @@ class MatchupPredictor:
             # just assume a normal D1 tempo of about 67 possessions. This is found one KENPOM College basketball Ratings
             self.league_avg_tempo = 67.0
 
-    # Data prep
-    def _prepare_results(self) -> None:
+        # Integer team IDs + array-backed stats, shared by every lookup below
+        with prof.stage("build_team_store"):
+            self._build_team_store()
 
-        # Work with the dataframe that has actual game results
-        df = self.results_df
+        # Dense matrix so rating lookups don't scan the dataframe
+        with prof.stage("build_rating_matrix"):
+            self._build_rating_matrix()
 
-        # Make sure the team score column is numeric
-        # turns bad values into NaN instead of crashing.
-        df["teamscore"] = pd.to_numeric(df.get("teamscore"), errors = "coerce")
+        # materialized team / location / head-to-head summaries, built once so lookups don't rescan the results
+        with prof.stage("build_summaries"):
+            self._build_summaries()
 
 
-        # Same thing for the opponent score.
-        df["oppscore"] = pd.to_numeric(df.get("oppscore"), errors = "coerce")
+
+    # Profiling
+    def stats(self) -> Dict[str, Any]:
+        """
+        Stage timings + counters: csv_load.*, prepare_*, build_*, feature_lookup,
+        rating_lookup, totals_lookup, scoring (batch.* for predict_many / tables / grid),
+        explainer_render. Empty unless profiling is on. The profiler is process wide,
+        the CSV loads are shared between predictors the same way the catalog is.
+        """
+        return self.profiler.stats()
 
 
-        # Total points scored in the game 
-        # team + opponent
-        df["total_points"] = df["teamscore"] + df["oppscore"]
+    def reset_stats(self) -> None:
+        self.profiler.reset()
 
+    # Data prep
+    def _prepare_results(self) -> None:
+        self.results_df = prepare_results_frame(self.results_df)
 
-        # Margin = points_for_team - points_for_opponent
-        # Positive margin means the primary team won
-        df["margin"] = df["teamscore"] - df["oppscore"]
 
-        self.results_df = df
+    @property
+    def results_df(self) -> pd.DataFrame:
+        # Rows from ingest_results are only concatenated on the first read after them,
+        # so ingesting a night of games doesn't copy the whole season every time
+        if self._pending_results:
+            self._results = self._merge_pending_results()
+        return self._results
 
+    @results_df.setter
+    def results_df(self, df: pd.DataFrame) -> None:
+        self._results = df
+        self._pending_results: List[pd.DataFrame] = []
+        self._played_fixtures = set()
 
 
 
@@ -96,6 +389,13 @@ class MatchupPredictor:
                 df[col] = pd.to_numeric(df[col], errors="coerce")  # If the value is missing or invalid, errors = coerce will turn it into NaN
                 # instead of causing the code to crash
 
+        self.adv_df = df
+        self._index_advanced()
+
+
+
+    def _index_advanced(self) -> None:
+        df = self.adv_df
 
         # The model needs to quickly look up stats for a team by name
         if "Team" in df.columns:
@@ -103,8 +403,6 @@ class MatchupPredictor:
         else:
             self.adv_index = pd.DataFrame()
 
-        self.adv_df = df
-
 
     
     def _prepare_ratings(self) -> None:
@@ -120,137 +418,188 @@ class MatchupPredictor:
 
 
 
-    # 
-    # Look up
-    def _get_adv_features(self, team_name: str) -> Dict[str, float]:
-    
-        
-        # Check if the team exists in the adv_index (created earlier in _prepare_advanced
-        if team_name in self.adv_index.index:
+    def _build_team_store(self) -> None:
+        """
+        Give every team name in the 3 files an integer ID (cbb25 teams first)
+        and hold the cbb25 stats as arrays indexed by that ID.
+        """
 
-            # Grab that entire row of stats
-            row = self.adv_index.loc[team_name]
+        extra_names = []
+        for df in [self.ratings_df, self.results_df]:
+            for col in ["team", "opponent"]:
+                if col in df.columns:
+                    extra_names.extend(df[col].dropna().tolist())
 
+        self.team_store = TeamFeatureStore(
+            self.adv_df, extra_names, default_tempo=self.league_avg_tempo
+        )
 
-            # Get offensive efficiency (ADJOE)
-            adjoe   = float(row.get("ADJOE", 110.0))
 
-            # Get defensive efficiency (ADJDE)
-            adjde   = float(row.get("ADJDE", 100.0))
 
-            # BARTHAG = overall power rating (0.00 – 1.00)
-            barthag = float(row.get("BARTHAG", 0.50))
+    def _build_rating_matrix(self) -> None:
+        """
+        Load the ratings into a dense team x team array of (rating_team - rating_opponent),
+        indexed by team_store IDs. Both orders are filled in, so reversed rows are handled at build time.
+        """
 
-            # Tempo (ADJ_T) = estimated possessions per game
-            tempo   = float(row.get("ADJ_T", self.league_avg_tempo))
+        if self.rating_source is not None:
+            self._use_rating_file(self.rating_source)
+            return
 
+        df = self.ratings_df
 
+        # One extra zero row/column at the end: id -1 (unknown team) reads 0.0
+        n = len(self.team_store)
+        matrix = np.zeros((n + 1, n + 1), dtype=np.float64)
 
-        # Rankings
-        #   "rk" is the primary column in the file,
-        #   "RK" appears in some versions of cbb25 datasets
-            if not pd.isna(row.get("rk", float("nan"))):
-                rank = float(row["rk"])
-            elif not pd.isna(row.get("RK", float("nan"))):
-                rank = float(row["RK"])
-            else:
-                rank = 180.0  #### Kinda AVERAGE
+        if "rating_team" in df.columns and "rating_opponent" in df.columns:
+            # First row wins for each (team, opponent), same as .iloc[0] did
+            rows = df.drop_duplicates(["team", "opponent"], keep="first")
+            t_ids = self.team_store.team_ids(rows["team"])
+            o_ids = self.team_store.team_ids(rows["opponent"])
+            diff = (rows["rating_team"] - rows["rating_opponent"]).to_numpy(dtype=np.float64)
 
+            # reversed rows first, then direct rows so the direct order wins
+            matrix[o_ids, t_ids] = -diff
+            matrix[t_ids, o_ids] = diff
 
+        self.rating_matrix = matrix
 
-            # SEED (NCAA March Madness tournament projection)
-            seed    = float(row.get("SEED", 16.0))
 
 
-        # If the team name wasn't found at all in the advanced stats,
-        # we give them generic average D1 numbers so the model doesn’t break
-        #### JUST INCASE
-        else:
-            adjoe = 110.0
-            adjde = 100.0
-            barthag = 0.50
-            tempo = self.league_avg_tempo
-            rank = 180.0
-            seed = 16.0
+    def _use_rating_file(self, source: MatrixFile) -> None:
+        # Same team order as our team store: use the memory-mapped matrix as-is (shared, no copy)
+        if source.teams == self.team_store.names:
+            self.rating_matrix = source.matrix("rating_diff")
+            return
 
+        # Different team order: remap into our IDs (this one is a private copy)
+        n = len(self.team_store)
+        file_ids = np.array([source.team_id(name) for name in self.team_store.names] + [-1])
+        self.rating_matrix = np.asarray(source.matrix("rating_diff"), dtype=np.float64)[
+            np.ix_(file_ids, file_ids)
+        ]
+        self.rating_matrix[n, :] = 0.0
+        self.rating_matrix[:, n] = 0.0
 
-        # Return everything in a dictionary to the caller
-        return {
-            "ADJOE": adjoe,
-            "ADJDE": adjde,
-            "BARTHAG": barthag,
-            "ADJ_T": tempo,
-            "RANK": rank,
-            "SEED": seed,
-        }
-    
 
-    def _get_team_total_points_avg(self, team_name: str) -> float:
 
-        df = self.results_df
+    def _build_summaries(self) -> None:
+        """
+        Build the materialized summaries (team_summaries.py): team_scoring_summaries,
+        team_location_splits and matchup_history_summary, from one groupby.
+        Every scored results row counts for each team in it, from that team's side.
+        """
 
-        # Make a mask (filter) for all games where this team played
-        # Either as "team" or "opponent"
-        mask = (df["team"] == team_name) | (df["opponent"] == team_name)
+        self.summaries = TeamSummaries(self._team_side_rows(self.results_df))
 
-        # Pull only those games
-        subset = df[mask]
+        # Average game total by team ID (NaN = no games, including the unknown slot at -1)
+        self.team_total_avg = np.full(len(self.team_store) + 1, np.nan, dtype=np.float64)
+        self._update_team_total_avg(self.summaries.scoring.index)
 
-        # If the team has no recorded games, return NaN so the caller knows it's missing
-        if subset.empty:
-            return float("nan")
-        
-        # Compute and return the average total points in those gameess
-        return float(subset["total_points"].mean())
-    
+        # League running sums, so ingest_results can update the average without a rescan.
+        # Scores are whole numbers, so sum / count is exactly what .mean() gave
+        totals = self.results_df["total_points"]
+        self._league_points_sum = float(totals.sum())
+        self._league_games = int(totals.count())
 
+        # all-pairs projection cache (see project_all_pairs)
+        self._grid = None
 
-    def _get_rating_diff(self, team_name: str, opponent_name: str) -> float:
 
-        df = self.ratings_df
+    @property
+    def team_scoring(self) -> pd.DataFrame:
+        # per-team scoring summary (team_scoring_summaries), one row per canonical team name
+        return self.summaries.scoring
 
-        # If the expected numeric columns are missing, we can't compute anything
-        if "rating_team" not in df.columns or "rating_opponent" not in df.columns:
-            return 0.0
 
 
-        # Try to find the matchup exactly as written #   (team_name vs opponent_name)
-        direct = df[(df["team"] == team_name) & (df["opponent"] == opponent_name)]
+    def _team_side_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        side_rows() of df (every scored row once from each team's side) with team and
+        opponent names in their canonical spelling.
+        """
+        # one row per team, not per spelling ("UConn" rows count for Connecticut).
+        # Renamed on the results rows, before they're doubled up into side rows
+        names = {col: self.team_store.canonical_names(df[col]) for col in ["team", "opponent"]}
+        return side_rows(df.assign(**names))
 
-         # If this row exists in the file
-        if not direct.empty:
 
-            # rating_team is Team 1's rating
-            # rating_opponent is Team 2's rating
-            row = direct.iloc[0]
-            return float(row["rating_team"] - row["rating_opponent"])
 
+    def _update_team_total_avg(self, teams) -> None:
+        # team_total_avg for just these team_scoring rows
+        ids = self.team_store.team_ids(teams)
+        values = self.summaries.scoring.loc[teams, "avg_total_points"].to_numpy()
+        self.team_total_avg[ids[ids >= 0]] = values[ids >= 0]
 
-        # If the row wasn't stored in that order,
-        # make the file has it reversed (opponent vs team)
-        rev = df[(df["team"] == opponent_name) & (df["opponent"] == team_name)]
-        if not rev.empty:
-            row = rev.iloc[0]
 
 
-            # Instead of (rating_team - rating_opponent), do -(that value) to convert it into Team1 - Team2.
-            return float(-(row["rating_team"] - row["rating_opponent"]))
+    # Summaries (materialized, see team_summaries.py)
+    def team_summary(self, team: str) -> Optional[Dict[str, Any]]:
+        """Season games_played / wins / losses / points / averages for a team, None if no games."""
+        return self.summaries.team(self._canonical_name(team))
 
 
-        ### JUST INCASE
-        return 0.0
+    def location_split(self, team: str, location: str) -> Optional[Dict[str, Any]]:
+        """The team's numbers at home (H), away (V) or neutral (N)."""
+        return self.summaries.location_split(self._canonical_name(team), location)
+
+
+    def matchup_history(self, team: str, opponent: str) -> Optional[Dict[str, Any]]:
+        """This season's games between the two, from team's side. None if they haven't played."""
+        return self.summaries.history(self._canonical_name(team), self._canonical_name(opponent))
+
+
+    def _canonical_name(self, name: str) -> str:
+        i = self.team_store.team_id(name)
+        return self.team_store.names[i] if i >= 0 else name
+
 
+
+    # 
+    # Look up
+    def _get_adv_features(self, team_name: str) -> Dict[str, float]:
+
+        # ADJOE, ADJDE, BARTHAG, ADJ_T, RANK, SEED for one team from the team store.
+        # Teams that aren't in cbb25.csv get generic average D1 numbers (filled in by the store)
+        return self.team_store.features(self.team_store.team_id(team_name))
     
+
+    def _get_team_total_points_avg(self, team_name: str) -> float:
+
+        # Average total points (team + opponent) over every scored game this team played.
+        # Comes from the summary built in _build_summaries
+        # NaN if the team has no recorded games, so the caller knows it's missing
+        return float(self.team_total_avg[self.team_store.team_id(team_name)])
+    
+
+
+    def _get_rating_diff(self, team_name: str, opponent_name: str) -> float:
+
+        # rating_team - rating_opponent from Team 1's point of view (already flipped for reversed rows)
+        # An unknown team has ID -1, which reads the zero row/column, so no rating edge
+        i = self.team_store.team_id(team_name)
+        j = self.team_store.team_id(opponent_name)
+        return float(self.rating_matrix[i, j])
+
+
+
     # Location
-    def _location_edge_points(self, location: str) -> float:
+    def _location_sign(self, location: str) -> float:
+        # +1 home, -1 away (visitor), 0 neutral
         loc = (location or "").upper()
 
         if loc == "H":
-            return HOME_EDGE
+            return 1.0
         elif loc == "V":
-            return -HOME_EDGE
+            return -1.0
         
         return 0.0
+
+
+    def _location_edge_points(self, location: str) -> float:
+        # Home-court edge +HOME_EDGE for home, -HOME_EDGE for away, 0 for neutral
+        return self._location_sign(location) * self.params["HOME_EDGE"]
     
 
     # Main prediction
@@ -263,28 +612,34 @@ class MatchupPredictor:
         """
 
 
-        # Pull advanced stats (raw numbers) for both teams
-        # These come from cbb25.csv and include ADJOE, ADJDE, BARTHAG, tempo, etc.
-        t_adv = self._get_adv_features(team_name)
-        o_adv = self._get_adv_features(opponent_name)
+        # None unless profiling is on
+        mark = self.profiler.marker()
 
+        # Integer IDs for both teams (-1 = unknown, reads the default stats)
+        store = self.team_store
+        t_id = store.team_id(team_name)
+        o_id = store.team_id(opponent_name)
 
 
+        # Pull advanced stats (raw numbers) for both teams
+        # These come from cbb25.csv and include ADJOE, ADJDE, BARTHAG, tempo, etc.
+
         # Store Team 1  advanced stats
-        t_off   = t_adv["ADJOE"]      # offensive efficiency per 100 possessions
-        t_def   = t_adv["ADJDE"]      # defensive efficiency (lower = better)
-        t_barth = t_adv["BARTHAG"]    # overall power rating
-        t_tempo = t_adv["ADJ_T"]      # tempo / pace estimate
-        t_rank  = t_adv["RANK"]       # ranking number (lower = better)
+        t_off   = float(store.adjoe[t_id])      # offensive efficiency per 100 possessions
+        t_def   = float(store.adjde[t_id])      # defensive efficiency (lower = better)
+        t_barth = float(store.barthag[t_id])    # overall power rating
+        t_tempo = float(store.tempo[t_id])      # tempo / pace estimate
+        t_rank  = float(store.rank[t_id])       # ranking number (lower = better)
 
 
         # Store Team 2 advanced stats
-        o_off   = o_adv["ADJOE"]
-        o_def   = o_adv["ADJDE"]
-        o_barth = o_adv["BARTHAG"]
-        o_tempo = o_adv["ADJ_T"]
-        o_rank  = o_adv["RANK"]
+        o_off   = float(store.adjoe[o_id])
+        o_def   = float(store.adjde[o_id])
+        o_barth = float(store.barthag[o_id])
+        o_tempo = float(store.tempo[o_id])
+        o_rank  = float(store.rank[o_id])
 
+        if mark: mark("feature_lookup")
 
 
 
@@ -306,24 +661,27 @@ class MatchupPredictor:
 
         # Rating diff from ncaa_wp_matrix_2025.csv
         # Positive means Team 1 is rated higher.
-        rating_diff  = self._get_rating_diff(team_name, opponent_name)  
+        if mark: mark("scoring")
+        rating_diff  = float(self.rating_matrix[t_id, o_id])
+        if mark: mark("rating_lookup")
 
 
 
         # Convert each stat difference into points added to the spread.
-        # These COEF values were tuned earlier.
+        # These COEF values were tuned earlier (or come from a fitted model artifact).
+        prm = self.params
 
         # Points coming from offense + defense differences
-        margin_off_def = COEF_OFFENSE * offense_diff + COEF_DEFENSE * defense_diff
+        margin_off_def = prm["COEF_OFFENSE"] * offense_diff + prm["COEF_DEFENSE"] * defense_diff
 
         # Points from BARTHAG difference
-        margin_barth   = COEF_BARTHAG * barthag_diff
+        margin_barth   = prm["COEF_BARTHAG"] * barthag_diff
 
         # Points from ranking difference
-        margin_rank    = COEF_RANK * rank_diff
+        margin_rank    = prm["COEF_RANK"] * rank_diff
 
         # Points from rating difference (rating_team - rating_opponent)
-        margin_rating  = COEF_RATING * rating_diff
+        margin_rating  = prm["COEF_RATING"] * rating_diff
 
         # Home-court edge +3.5 for home, -3.5 for away, 0 for neutral
         loc_edge = self._location_edge_points(location)
@@ -338,18 +696,22 @@ class MatchupPredictor:
             + loc_edge
         )
 
-        final_margin_float = max(-MAX_MARGIN, min(MAX_MARGIN, raw_margin))
+        final_margin_float = max(-prm["MAX_MARGIN"], min(prm["MAX_MARGIN"], raw_margin))
 
 
         # Estimate total points for the game (scoring environment)
 
 
+        if mark: mark("scoring")
+
         # Average total points (team + opponent) in games played by Team 1
-        team_total_avg = self._get_team_total_points_avg(team_name)
+        team_total_avg = float(self.team_total_avg[t_id])
 
 
         # Same thing for Team 2
-        opp_total_avg = self._get_team_total_points_avg(opponent_name)
+        opp_total_avg = float(self.team_total_avg[o_id])
+
+        if mark: mark("totals_lookup")
 
 
         # We build a list of for estimating the base total points\
@@ -391,7 +753,7 @@ class MatchupPredictor:
         # Slower teams = lower total.
         tempo_total = baseline_total * tempo_factor
 
-        final_total_float = max(120.0, min(180.0, tempo_total))
+        final_total_float = max(prm["TOTAL_MIN"], min(prm["TOTAL_MAX"], tempo_total))
 
        
        
@@ -410,7 +772,8 @@ class MatchupPredictor:
         final_margin_rounded = team_score - opp_score
 
         # Win probability from margin 
-        win_prob = 1.0 / (1.0 + math.exp(-final_margin_float / MARGIN_SCALE))
+        # np.exp (not math.exp) so this matches the vectorized paths bit for bit
+        win_prob = float(1.0 / (1.0 + np.exp(-final_margin_float / prm["MARGIN_SCALE"])))
         win_prob = max(0.0, min(1.0, win_prob))
 
 
@@ -457,9 +820,14 @@ class MatchupPredictor:
         "final_total_points": final_total_float,         # clamped final expected total
 }
 
+        if mark:
+            mark("scoring")
+            mark.done()
+            self.profiler.count("predictions")
+
 # ------------------------------------------------------------
 # Return final prediction structure
-        return {
+        result = {
         "team": team_name,                 # Team 1 name
         "opponent": opponent_name,         # Team 2 name
         "location": location,              # 'H', 'V', or 'N'
@@ -470,8 +838,556 @@ class MatchupPredictor:
         "parts": parts,                    # Full breakdown dict (used in the GUI)
 }   
 
-if __name__ == "__main__":
-    predictor = MatchupPredictor()
+        # write-behind log (prediction_recorder.py), just a queue put
+        if self.recorder is not None:
+            self.recorder.record(result)
+        return result
+
+
+
+    # Vectorized scoring
+    def _score_arrays(
+        self, t_feats: Dict[str, np.ndarray], o_feats: Dict[str, np.ndarray],
+        rating_diff: np.ndarray, loc_edge: np.ndarray,
+        team_total_avg: np.ndarray, opp_total_avg: np.ndarray,
+        params: Dict[str, float] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        score_arrays() with this predictor's league averages.
+        params overrides self.params (used by the backtest / parameter search).
+        """
+
+        return score_arrays(
+            t_feats, o_feats, rating_diff, loc_edge, team_total_avg, opp_total_avg,
+            self.params if params is None else params,
+            self.league_avg_total_points, self.league_avg_tempo,
+        )
+
+
+
+    # Batch prediction
+    def predict_many(self, matchups, parts: bool = False) -> pd.DataFrame:
+        """
+        Predict a whole list of matchups in one vectorized pass.
+
+        matchups is either a list of (team, opponent) / (team, opponent, location)
+        tuples, or a DataFrame with "team", "opponent" and optional "location" columns.
+        Returns one row per matchup with the same values predict_matchup would give.
+        parts = True adds one column per predict_matchup "parts" key.
+        """
+
+        games, t_ids, o_ids, loc_edge = self._matchup_arrays(matchups)
+        scored = self._score_ids(t_ids, o_ids, loc_edge)
+
+        if self.recorder is not None:
+            self.recorder.record_scored(games["team"], games["opponent"], scored)
+
+        out = {
+            "team": games["team"],
+            "opponent": games["opponent"],
+            "location": games["location"],
+            "team_score": scored["team_score"],
+            "opponent_score": scored["opponent_score"],
+            "margin": scored["margin"],
+            "win_prob": scored["win_prob"],
+        }
+        if parts:
+            for key in PARTS_KEYS:
+                out[key] = np.broadcast_to(scored[key], (len(games),))
+        return pd.DataFrame(out)
+
+
+
+    def _matchup_arrays(self, matchups):
+        # (games frame, team IDs, opponent IDs, location edge points) for predict_many / predict_table
+        mark = self.profiler.marker()
+        if isinstance(matchups, pd.DataFrame):
+            games = pd.DataFrame({
+                "team": matchups["team"].to_numpy(),
+                "opponent": matchups["opponent"].to_numpy(),
+                "location": (matchups["location"].to_numpy()
+                             if "location" in matchups.columns else "N"),
+            })
+        else:
+            rows = [tuple(m) if len(m) == 3 else (m[0], m[1], "N") for m in matchups]
+            games = pd.DataFrame(rows, columns=["team", "opponent", "location"])
+
+
+        # Team IDs for every game (-1 = unknown team, reads the defaults)
+        t_ids = self.team_store.team_ids(games["team"])
+        o_ids = self.team_store.team_ids(games["opponent"])
+
+        # Home / away / neutral edge per game
+        loc_codes, locs = pd.factorize(games["location"].fillna("N"))
+        loc_edges = np.array([self._location_edge_points(loc) for loc in locs], dtype=np.float64)
+
+        if mark:
+            mark("batch.id_lookup")
+            mark.done()
+        return games, t_ids, o_ids, loc_edges[loc_codes]
+
+
+    def _score_ids(self, t_ids: np.ndarray, o_ids: np.ndarray, loc_edge) -> Dict[str, np.ndarray]:
+        # score_arrays() for arrays of team_store IDs
+        mark = self.profiler.marker()
+
+        t_feats = self.team_store.gather(t_ids)
+        o_feats = self.team_store.gather(o_ids)
+        if mark: mark("batch.feature_lookup")
+
+        rating_diff = self.rating_matrix[t_ids, o_ids]
+        if mark: mark("batch.rating_lookup")
+
+        team_total_avg = self.team_total_avg[t_ids]
+        opp_total_avg = self.team_total_avg[o_ids]
+        if mark: mark("batch.totals_lookup")
+
+        scored = self._score_arrays(t_feats, o_feats, rating_diff, loc_edge, team_total_avg, opp_total_avg)
+        if mark:
+            mark("batch.scoring")
+            mark.done()
+            self.profiler.count("batch_predictions", len(np.atleast_1d(t_ids)))
+        return scored
+
+
+
+    # New results
+    def ingest_results(self, new_rows) -> Dict[str, Any]:
+        """
+        Add finished games without rebuilding the predictor.
+
+        new_rows = DataFrame or list of dicts in the 2025_cbb_results.csv layout
+        (team, opponent, teamscore, oppscore, location, month, day, ...). Like the file,
+        a D1 vs D1 game is normally listed once from each side.
+
+        The league average, the summaries and team_total_avg are updated from running
+        sums, only the rows the new games touch (plus an append when a team or a
+        pairing shows up for the first time). A still-unscored fixture
+        for the same two teams on the same month/day is dropped from results_df.
+        Cached projections are refreshed for the affected teams only.
+        Returns {"rows", "games", "teams"} (teams = canonical names whose totals moved).
+        An empty batch (no games finished yet) changes nothing.
+        """
+
+        new = pd.DataFrame(new_rows)
+        if new.empty:
+            return {"rows": 0, "games": 0, "teams": []}
+        new = prepare_results_frame(new.reset_index(drop=True))
+
+        # teams never seen before get an ID (with the default stats)
+        names = pd.unique(pd.concat([new["team"], new["opponent"]]).dropna())
+        added = self.team_store.add_names(names)
+        if added:
+            self._grow_for_new_teams(len(added))
+
 
+        # League average from the running sums
+        totals = new["total_points"]
+        self._league_points_sum += float(totals.sum())
+        self._league_games += int(totals.count())
+        if self._league_games:
+            self.league_avg_total_points = self._league_points_sum / self._league_games
 
 
+        # Summary running sums, then the averages for just the rows they touched
+        affected = self.summaries.add(self._team_side_rows(new))
+        if affected:
+            self._update_team_total_avg(affected)
+
+
+        # Rows are merged into results_df lazily (see the results_df property)
+        self._pending_results.append(new)
+        self._played_fixtures.update(self._fixture_keys(new[new["total_points"].notna()]))
+
+        if self._grid is not None:
+            ids = self.team_store.team_ids(affected) if affected else np.array([], dtype=np.int64)
+            self._grid["stale"].update(int(i) for i in ids if i >= 0)
+
+        return {"rows": len(new), "games": int(totals.count()), "teams": affected}
+
+
+    def _grow_for_new_teams(self, k: int) -> None:
+        # make room for k new team IDs in the ID-indexed arrays (unknown slot stays last)
+        n_old = len(self.team_store) - k
+
+        matrix = np.zeros((n_old + k + 1, n_old + k + 1), dtype=np.float64)
+        matrix[:n_old, :n_old] = self.rating_matrix[:n_old, :n_old]
+        self.rating_matrix = matrix
+
+        total_avg = np.full(n_old + k + 1, np.nan, dtype=np.float64)
+        total_avg[:n_old] = self.team_total_avg[:n_old]
+        self.team_total_avg = total_avg
+
+
+    def _fixture_keys(self, df: pd.DataFrame) -> List[tuple]:
+        # (lower team ID, higher team ID, month, day) per row, same key from either side
+        t_ids = self.team_store.team_ids(df["team"])
+        o_ids = self.team_store.team_ids(df["opponent"])
+        cols = [np.minimum(t_ids, o_ids), np.maximum(t_ids, o_ids)]
+        for col in ["month", "day"]:
+            cols.append(df[col].to_numpy() if col in df.columns else np.zeros(len(df)))
+        return list(zip(*cols))
+
+
+    def _merge_pending_results(self) -> pd.DataFrame:
+        merged = pd.concat([self._results] + self._pending_results, ignore_index=True)
+        self._pending_results = []
+
+        # fixtures that have now been played
+        if self._played_fixtures:
+            unscored = merged[merged["total_points"].isna()]
+            played = [key in self._played_fixtures for key in self._fixture_keys(unscored)]
+            merged = merged.drop(unscored.index[played]).reset_index(drop=True)
+            self._played_fixtures = set()
+        return merged
+
+
+
+    # Columnar results
+    def predict_table(self, matchups, parts: bool = True, parts_dtype = np.float32) -> np.ndarray:
+        """
+        predict_many() as one structured NumPy array (see prediction_dtype) instead of
+        a frame of Python objects. Names become team_store IDs; use team_store.names[id]
+        or prediction_from_row() to get them back. pd.DataFrame(table) gives a frame.
+        parts = False leaves the parts columns out.
+        """
+
+        games, t_ids, o_ids, loc_edge = self._matchup_arrays(matchups)
+        locations = games["location"].fillna("N").astype(str).str.upper().str[:1].to_numpy()
+        return self._fill_table(t_ids, o_ids, locations, self._score_ids(t_ids, o_ids, loc_edge),
+                                parts, parts_dtype)
+
+
+    def _fill_table(self, t_ids, o_ids, locations, scored, parts, parts_dtype,
+                    out: np.ndarray = None) -> np.ndarray:
+        # copy one scored batch into a structured array (or into a slice of a bigger one)
+        if out is None:
+            out = np.empty(len(t_ids), dtype=prediction_dtype(parts_dtype, parts))
+
+        out["team_id"] = t_ids
+        out["opponent_id"] = o_ids
+        out["location"] = locations
+        for key in ["team_score", "opponent_score", "margin", "win_prob"]:
+            out[key] = scored[key]
+        if parts:
+            for key in PARTS_KEYS:
+                out[key] = scored[key]
+        return out
+
+
+    def prediction_from_row(self, table, row: int) -> Dict[str, Any]:
+        """
+        One row of a predict_table() / project_all_pairs_table() array (or a
+        DataFrame of one) as the same dict shape predict_matchup returns.
+        """
+
+        rec = table.iloc[row] if isinstance(table, pd.DataFrame) else table[row]
+        fields = rec.index if isinstance(table, pd.DataFrame) else table.dtype.names
+
+        def name(team_id):
+            return self.team_store.names[team_id] if team_id >= 0 else None
+
+        return {
+            "team": name(int(rec["team_id"])),
+            "opponent": name(int(rec["opponent_id"])),
+            "location": str(rec["location"]),
+            "team_score": int(rec["team_score"]),
+            "opponent_score": int(rec["opponent_score"]),
+            "margin": int(rec["margin"]),
+            "win_prob": float(rec["win_prob"]),
+            "parts": {key: float(rec[key]) for key in PARTS_KEYS if key in fields},
+        }
+
+
+
+    def win_prob_matrix(self, location: str = "N") -> np.ndarray:
+        """
+        Team 1 win probability for every pair of team_store IDs at one location,
+        shape (n + 1, n + 1). The last row/column is the unknown-team slot (ID -1).
+        """
+
+        ids = np.arange(-1, len(self.team_store))   # -1 first, moved to the end below
+        feats = self.team_store.gather(ids)
+        totals = self.team_total_avg[ids]
+
+        scored = self._score_arrays(
+            {k: v[:, None] for k, v in feats.items()},
+            {k: v[None, :] for k, v in feats.items()},
+            self.rating_matrix[np.ix_(ids, ids)],
+            np.float64(self._location_edge_points(location)),
+            totals[:, None],
+            totals[None, :],
+        )
+        return np.roll(scored["win_prob"], -1, axis=(0, 1))
+
+
+
+    # All-pairs projection grid
+    def project_all_pairs(self) -> Dict[str, Any]:
+        """
+        Project every ordered (team, opponent) pair of cbb25.csv teams at every
+        location (H, V, N) in one NumPy pass.
+
+        Every array is shaped (location, team, opponent) and indexed by the
+        position of the team in the returned "teams" list.
+
+        The grid is cached. After ingest_results only the expected totals (and the
+        scores built from them) are redone, for the affected teams' rows and columns,
+        or for every pair when the league average moved. Margins and win probabilities
+        don't depend on the results, so they stay warm.
+        """
+
+        grid = self._grid
+        if grid is None or grid["params"] != self.params:
+            with self.profiler.stage("grid_build"):
+                grid = self._grid = self._build_grid()
+        elif grid["stale"] or grid["league_avg"] != self.league_avg_total_points:
+            with self.profiler.stage("grid_refresh"):
+                self._refresh_grid_totals()
+
+        # read-only views, the cache itself is only changed in here
+        out = {"teams": list(grid["teams"]), "locations": list(grid["locations"])}
+        for key in ["team_score", "opponent_score", "margin", "win_prob"]:
+            out[key] = grid[key].view()
+            out[key].flags.writeable = False
+        out["total"] = np.broadcast_to(grid["total"], grid["team_score"].shape)
+        return out
+
+
+
+    def _build_grid(self) -> Dict[str, Any]:
+        # Full all-pairs computation behind project_all_pairs
+
+        # cbb25 teams are the first IDs in the team store
+        n = self.team_store.num_adv_teams
+        teams: List[str] = self.team_store.names[:n]
+        locations = ["H", "V", "N"]
+        ids = np.arange(n)
+
+        team_feats = self.team_store.gather(ids)
+        total_avgs = self.team_total_avg[ids]
+        rating_grid = self.rating_matrix[:n, :n]
+
+
+        loc_edge = np.array([self._location_edge_points(loc) for loc in locations])
+
+        scored = self._score_arrays(
+            {k: v[None, :, None] for k, v in team_feats.items()},
+            {k: v[None, None, :] for k, v in team_feats.items()},
+            rating_grid[None, :, :],
+            loc_edge[:, None, None],
+            total_avgs[None, :, None],
+            total_avgs[None, None, :],
+        )
+
+        shape = (len(locations), n, n)
+        full = lambda key: np.array(np.broadcast_to(scored[key], shape))
+        return {
+            "teams": teams,
+            "locations": locations,
+            "team_score": full("team_score"),
+            "opponent_score": full("opponent_score"),
+            "margin": full("margin"),
+            "win_prob": full("win_prob"),
+            "total": np.array(np.broadcast_to(scored["final_total_points"], shape)[0]),   # same at every location
+            "final_margin": full("final_margin_clamped"),
+            "params": dict(self.params),
+            "league_avg": self.league_avg_total_points,
+            "stale": set(),      # team IDs whose totals changed since the grid was built
+        }
+
+
+    def _refresh_grid_totals(self) -> None:
+        # Redo totals + scores for the stale rows / columns (everything if the league average moved)
+        grid = self._grid
+        n = len(grid["teams"])
+        every = np.arange(n)
+
+        if grid["league_avg"] != self.league_avg_total_points:
+            blocks = [(every, every)]
+        else:
+            stale = np.array(sorted(i for i in grid["stale"] if i < n), dtype=np.int64)
+            blocks = [(stale, every), (every, stale)] if len(stale) else []
+
+        tempo = self.team_store.tempo
+        for rows, cols in blocks:
+            _, _, total = total_arrays(
+                tempo[rows][:, None], tempo[cols][None, :],
+                self.team_total_avg[rows][:, None], self.team_total_avg[cols][None, :],
+                self.params, self.league_avg_total_points, self.league_avg_tempo,
+            )
+            cell = (slice(None), rows[:, None], cols[None, :])
+            team_score, opp_score = final_scores(total[None, :, :], grid["final_margin"][cell])
+
+            grid["total"][rows[:, None], cols[None, :]] = total
+            grid["team_score"][cell] = team_score
+            grid["opponent_score"][cell] = opp_score
+            grid["margin"][cell] = team_score - opp_score
+
+        grid["stale"] = set()
+        grid["league_avg"] = self.league_avg_total_points
+
+
+
+    def project_all_pairs_table(self, parts: bool = True, parts_dtype = np.float32) -> np.ndarray:
+        """
+        Every ordered pair of different cbb25 teams at H, V and N (~400k rows) as one
+        structured array (see prediction_dtype), parts included.
+        Scored one location at a time so the float64 temporaries stay small.
+        """
+
+        n = self.team_store.num_adv_teams
+        t_idx, o_idx = np.indices((n, n)).reshape(2, -1)
+        keep = t_idx != o_idx
+        t_ids, o_ids = t_idx[keep], o_idx[keep]
+        per_loc = len(t_ids)
+
+        locations = ["H", "V", "N"]
+        table = np.empty(per_loc * len(locations), dtype=prediction_dtype(parts_dtype, parts))
+
+        for k, loc in enumerate(locations):
+            edge = np.full(per_loc, self._location_edge_points(loc))
+            self._fill_table(t_ids, o_ids, loc, self._score_ids(t_ids, o_ids, edge),
+                             parts, parts_dtype, out=table[k * per_loc:(k + 1) * per_loc])
+        return table
+
+
+
+    def projection_grid_rows(self, grid: Dict[str, Any]) -> pd.DataFrame:
+        """
+        Flatten a project_all_pairs() grid into one row per (team, opponent, location),
+        using the column names of the precomputed_matchup_projections table.
+        team_id / opponent_id are positions in grid["teams"]. Same-team pairs are skipped.
+        """
+
+        n_loc, n, _ = grid["team_score"].shape
+        loc_idx, t_idx, o_idx = np.indices((n_loc, n, n)).reshape(3, -1)
+        keep = t_idx != o_idx
+
+        return pd.DataFrame({
+            "team_id": t_idx[keep],
+            "opponent_id": o_idx[keep],
+            "location_code": np.asarray(grid["locations"])[loc_idx[keep]],
+            "projected_team_score": grid["team_score"].reshape(-1)[keep],
+            "projected_opponent_score": grid["opponent_score"].reshape(-1)[keep],
+            "projected_margin": grid["margin"].reshape(-1)[keep],
+            "projected_win_prob": grid["win_prob"].reshape(-1)[keep],
+        })
+
+# Streaming batch prediction (CSV / JSONL in, CSV / JSONL out)
+def _detect_format(path: str, fallback: str = "csv") -> str:
+    if path.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    if path.endswith(".csv"):
+        return "csv"
+    return fallback
+
+
+def read_matchup_chunks(source: IO[str], fmt: str = "csv",
+                        chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Yield the input as DataFrames of at most chunk_size matchups
+    (team, opponent, optional location), so only one chunk is ever in memory.
+    """
+
+    if fmt == "csv":
+        reader = pd.read_csv(source, chunksize = chunk_size, dtype = str, skipinitialspace = True)
+        for chunk in reader:
+            yield chunk
+
+    elif fmt == "jsonl":
+        lines = (line for line in source if line.strip())
+        while True:
+            batch = [json.loads(line) for line in itertools.islice(lines, chunk_size)]
+            if not batch:
+                break
+            yield pd.DataFrame.from_records(batch)
+
+    else:
+        raise ValueError(f"unknown matchup format {fmt!r} (csv or jsonl)")
+
+
+def predict_chunks(predictor: "MatchupPredictor", chunks: Iterable[pd.DataFrame],
+                   parts: bool = False) -> Iterator[pd.DataFrame]:
+    """predict_many() over each input chunk as it arrives (missing location = neutral)."""
+    for chunk in chunks:
+        if "location" in chunk.columns:
+            chunk = chunk.assign(location = chunk["location"].fillna("N"))
+        else:
+            chunk = chunk.assign(location = "N")
+        yield predictor.predict_many(chunk, parts = parts)
+
+
+def write_prediction_chunks(chunks: Iterable[pd.DataFrame], out: IO[str], fmt: str = "csv") -> int:
+    """Write each chunk as soon as it's ready; returns the number of rows written."""
+
+    rows = 0
+    for chunk in chunks:
+        if fmt == "csv":
+            chunk.to_csv(out, header = (rows == 0), index = False, lineterminator = "\n")
+        elif fmt == "jsonl":
+            text = chunk.to_json(orient = "records", lines = True, double_precision = 15)
+            out.write(text if text.endswith("\n") else text + "\n")
+        else:
+            raise ValueError(f"unknown output format {fmt!r} (csv or jsonl)")
+        out.flush()
+        rows += len(chunk)
+    return rows
+
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description = "Predict a CSV / JSONL file of matchups (team, opponent, location) as a stream"
+    )
+    parser.add_argument("input", nargs = "?", default = "-", help = "matchup file (default: stdin)")
+    parser.add_argument("-o", "--output", default = "-", help = "prediction file (default: stdout)")
+    parser.add_argument("--format", choices = ["csv", "jsonl"],
+                        help = "input format (default: from the file extension, else csv)")
+    parser.add_argument("--output-format", choices = ["csv", "jsonl"],
+                        help = "output format (default: from the output extension, else the input format)")
+    parser.add_argument("--parts", action = "store_true", help = "add the full parts breakdown columns")
+    parser.add_argument("--chunk-size", type = int, default = CHUNK_SIZE, help = "matchups per chunk")
+    parser.add_argument("--model", help = "model artifact JSON (see model_fit.py)")
+    parser.add_argument("--ratings", help = "matrix file to map the rating diffs from (see matrix_file.py)")
+    parser.add_argument("--season", help = "Data/<season> folder to predict from (default 2025)")
+    parser.add_argument("--database", help = "read the season from this SQLite file (see cbb_database.py)")
+    parser.add_argument("--profile", action = "store_true", help = "print stage timings to stderr at the end")
+    parser.add_argument("--record", nargs = "?", const = "", metavar = "DB",
+                        help = "log every prediction to this SQLite file (default Data/cbb.sqlite3)")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        profiling.enable()
+
+    in_fmt = args.format or _detect_format(args.input)
+    out_fmt = args.output_format or _detect_format(args.output, fallback = in_fmt)
+
+    predictor = MatchupPredictor(rating_source = args.ratings, model = args.model, season = args.season,
+                                 database = args.database)
+    if args.record is not None:
+        from prediction_recorder import DB_PATH, PredictionRecorder
+        PredictionRecorder.for_predictor(predictor, args.record or DB_PATH)
+
+    source = sys.stdin if args.input == "-" else open(args.input, newline = "")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline = "")
+    try:
+        chunks = read_matchup_chunks(source, in_fmt, args.chunk_size)
+        rows = write_prediction_chunks(predict_chunks(predictor, chunks, args.parts), out, out_fmt)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+        if predictor.recorder is not None:
+            predictor.recorder.close()
+
+    print(f"{rows} predictions", file = sys.stderr)
+    if args.profile:
+        print(predictor.profiler.report(), file = sys.stderr)
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
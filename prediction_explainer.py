@@ -6,13 +6,21 @@
           that shows which team has the edge in each stat.
 """
 
-def build_breakdown_text(pred):
+from profiling import PROFILER
+
+
+def build_breakdown_text(pred, predictor = None):
     """
     Take the prediction dict from MatchupPredictor.predict_matchup()
     and build a multi-line numeric breakdown.
 
+    predictor (optional) = the MatchupPredictor that made it, adds a season_so_far
+    section from its materialized summaries (records, location splits, head to head).
+
     All values are numeric; labels indicate Team 1 vs Team 2.AQAQ
     """
+    mark = PROFILER.marker()   # None unless profiling is on
+
     parts = pred.get("parts", {})
     team1 = pred.get("team", "Team1")
     team2 = pred.get("opponent", "Team2")
@@ -91,4 +99,50 @@ def build_breakdown_text(pred):
     lines.append(f"tempo_total       = {tempo_total:7.2f}")
     lines.append(f"final_total_pts   = {final_total:7.2f}")
 
-    return "\n".join(lines)
+    if predictor is not None:
+        lines.append("")
+        lines.extend(_season_lines(predictor, team1, team2, pred.get("location", "N")))
+
+    text = "\n".join(lines)
+    if mark:
+        mark("explainer_render")
+        mark.done()
+    return text
+
+
+
+def _season_lines(predictor, team1, team2, location):
+    # Season numbers straight from the summary tables (no pass over the results)
+    flip = {"H": "V", "V": "H"}
+    loc1 = str(location or "N").upper()[:1]
+    loc2 = flip.get(loc1, "N")
+
+    lines = ["=== season_so_far ==="]
+    for team, loc in [(team1, loc1), (team2, loc2)]:
+        overall = predictor.team_summary(team)
+        if overall is None:
+            lines.append(f"{team:>15}  no games on record")
+            continue
+        split = predictor.location_split(team, loc)
+        at_loc = (f"{split['wins']}-{split['losses']} ({split['avg_margin']:+.1f})" if split else "0-0")
+        lines.append(f"{team:>15}  record = {overall['wins']}-{overall['losses']}   "
+                     f"ppg = {overall['avg_points_for']:5.1f}   opp_ppg = {overall['avg_points_against']:5.1f}   "
+                     f"avg_margin = {overall['avg_margin']:+5.1f}   at_{loc} = {at_loc}")
+
+    h2h = predictor.matchup_history(team1, team2)
+    if h2h is None:
+        lines.append("head_to_head      = no games this season")
+    else:
+        lines.append(f"head_to_head      = {team1} {h2h['wins']}-{h2h['losses']}   "
+                     f"avg_margin = {h2h['avg_margin']:+5.1f}")
+    return lines
+
+
+
+def build_row_breakdown_text(predictor, table, row):
+    """
+    Breakdown for one row of a columnar result (predictor.predict_table() /
+    project_all_pairs_table(), or a DataFrame made from one).
+    Only that row is turned into a dict, the rest of the table stays columnar.
+    """
+    return build_breakdown_text(predictor.prediction_from_row(table, row), predictor)
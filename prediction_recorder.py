@@ -0,0 +1,371 @@
+"""
+@Author - Adam Pinkos
+@File   - prediction_recorder.py
+@Date   - 12/31/2025
+@Brief  - Write-behind log of every prediction (matchup_predictions + its parts in
+          prediction_feature_values) to the local SQLite database.
+
+The predictor only drops a reference on an in-process queue (no copying, no I/O).
+A background thread writes whatever has queued up in multi-row INSERTs, one
+transaction per flush, once batch_size predictions are waiting or flush_interval
+seconds have passed. close() (also run at exit) writes everything still queued.
+
+Only predictions between two known teams are logged (canonical names from the
+predictor's team store), so a typo in the GUI / server never becomes a teams row.
+Several processes can log to the same file: each flush takes the write lock
+(BEGIN IMMEDIATE) before it picks prediction IDs, and a busy file is retried.
+"""
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from cbb_database import DB_PATH, CBBDatabase, connect
+from file_loader import season_key
+
+
+BATCH_SIZE = 2000          # predictions per flush (at most)
+FLUSH_INTERVAL = 1.0       # seconds a prediction can sit in the queue
+MAX_QUEUED = 10_000        # queued items (a batch call is 1 item); past this records are dropped, not waited on
+ROWS_PER_INSERT = 500      # rows per multi-row INSERT statement (well under SQLite's variable limit)
+WRITE_RETRIES = 5          # tries again this many times when another process holds the file
+RETRY_WAIT = 0.2           # seconds before the first retry (grows each try)
+
+LOCAL_USER_EMAIL = "local@cbb-predictor"   # predictions made without a login go to this users row
+
+_STOP = object()
+
+
+
+class PredictionRecorder:
+    """
+    Queue + writer thread for one database file, season and model version.
+
+    record(pred)             one predict_matchup() result
+    record_scored(...)       one predict_many() batch (the scored arrays, not copied)
+    """
+
+    def __init__(self, db_path: str = DB_PATH, season = None, model_version: str = "",
+                 batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 max_queued: int = MAX_QUEUED, team_store = None):
+        """
+        team_store (optional) = TeamFeatureStore the names are resolved through. Without
+        one, only names already in the database's teams table are logged.
+        """
+        from prediction import PARTS_KEYS
+
+        self.db_path = db_path
+        self.team_store = team_store
+        self.season = season_key(season)
+        self.model_version = model_version
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.parts_keys = list(PARTS_KEYS)
+
+        self.max_queued = max_queued
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()   # C put, no lock dance
+        self._closed = False
+
+        # counters
+        self.queued = 0          # predictions handed to record*()
+        self.written = 0         # predictions committed
+        self.dropped = 0         # predictions dropped because the queue was full (or the writer is gone)
+        self.skipped = 0         # unknown team names / missing scores, not logged
+        self.failed = 0          # predictions in batches that could not be written
+        self.flushes = 0
+        self.errors: List[str] = []
+
+        CBBDatabase(db_path).close()          # make sure the tables exist
+        self._thread = threading.Thread(target = self._run, name = "prediction-recorder", daemon = True)
+        self._thread.start()
+        atexit.register(self.close)
+
+
+    @classmethod
+    def for_predictor(cls, predictor, db_path: str = DB_PATH, **kwargs) -> "PredictionRecorder":
+        """A recorder for this predictor's season / model version, attached to it."""
+        recorder = cls(db_path, predictor.season, predictor.model_version,
+                       team_store = predictor.team_store, **kwargs)
+        predictor.recorder = recorder
+        return recorder
+
+
+
+    # Producer side (prediction threads): never blocks
+    def record(self, pred: Dict[str, Any]) -> None:
+        self._put(("one", pred), 1)
+
+
+    def record_scored(self, teams: Sequence[str], opponents: Sequence[str],
+                      scored: Dict[str, np.ndarray]) -> None:
+        self._put(("batch", teams, opponents, scored), len(teams))
+
+
+    def _put(self, item, n: int) -> None:
+        if self._closed:
+            return
+        if self._queue.qsize() >= self.max_queued or not self._thread.is_alive():
+            self.dropped += n
+            return
+        self._queue.put(item)
+        self.queued += n
+
+
+
+    # Writer thread
+    def _run(self) -> None:
+        conn = None
+        try:
+            conn = connect(self.db_path)
+            ids = self._setup(conn)
+            pending: List[Any] = []
+            size = 0
+            deadline = None
+            stopping = False
+
+            while not stopping:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout = timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is _STOP:
+                    stopping = True
+                elif item is not None:
+                    pending.append(item)
+                    size += 1 if item[0] == "one" else len(item[1])
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+
+                # flush on size, on time, or on the way out
+                if pending and (stopping or size >= self.batch_size or time.monotonic() >= deadline):
+                    self._flush(conn, ids, pending)
+                    pending, size, deadline = [], 0, None
+        except Exception as exc:
+            # can't open / set up the file: record() sees the dead thread and drops from here on
+            self.errors.append(f"{type(exc).__name__}: {exc}")
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+    def _setup(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        # the users / seasons / model_versions rows every prediction points at
+        y = self.season
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO users (email, password_hash, display_name) VALUES (?, '', 'local')",
+                         (LOCAL_USER_EMAIL,))
+            conn.execute("INSERT OR IGNORE INTO seasons (season_name, year_start, year_end) VALUES (?, ?, ?)",
+                         (f"{y - 1}-{y % 100:02d}", y - 1, y))
+            model = conn.execute("SELECT model_id FROM model_versions WHERE model_name = ?",
+                                 (self.model_version,)).fetchone()
+            if model is None:
+                conn.execute("INSERT INTO model_versions (model_name, is_active) VALUES (?, 1)", (self.model_version,))
+                model = conn.execute("SELECT last_insert_rowid()").fetchone()
+        return {
+            "user": conn.execute("SELECT user_id FROM users WHERE email = ?", (LOCAL_USER_EMAIL,)).fetchone()[0],
+            "season": conn.execute("SELECT season_id FROM seasons WHERE year_end = ?", (y,)).fetchone()[0],
+            "model": model[0],
+            "teams": dict(conn.execute("SELECT team_name, team_id FROM teams")),
+        }
+
+
+    def _flush(self, conn: sqlite3.Connection, ids: Dict[str, Any], pending: List[Any]) -> None:
+        # Never raises: a batch that can't be written is counted and the thread keeps going
+        n = sum(1 if item[0] == "one" else len(item[1]) for item in pending)
+        try:
+            columns = self._columns(pending, ids["teams"])
+        except Exception as exc:
+            self._batch_failed(exc, n)
+            return
+
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                self._write(conn, ids, *columns)
+                self.written += len(columns[0])
+                self.flushes += 1
+                return
+            except sqlite3.OperationalError as exc:
+                # another process has the file locked: wait and redo the whole transaction
+                if _is_busy(exc) and attempt < WRITE_RETRIES:
+                    time.sleep(RETRY_WAIT * (attempt + 1))
+                    continue
+                self._batch_failed(exc, len(columns[0]))
+                return
+            except Exception as exc:
+                self._batch_failed(exc, len(columns[0]))
+                return
+
+
+    def _batch_failed(self, exc: Exception, n: int) -> None:
+        # losing a log batch must never take the predictor (or the writer thread) down
+        self.failed += n
+        self.errors.append(f"{type(exc).__name__}: {exc}")
+
+
+    def _write(self, conn: sqlite3.Connection, ids: Dict[str, Any], teams: List[str], opps: List[str],
+               t_scores: List[int], o_scores: List[int], win_probs: List[float], parts: np.ndarray) -> None:
+        # one transaction: new team names, the prediction rows, then all their parts
+        n = len(teams)
+        if not n:
+            return
+        known = ids["teams"]
+        new_ids: Dict[str, int] = {}
+        with conn:
+            # write lock first, so the MAX below can't race another process doing the same
+            conn.execute("BEGIN IMMEDIATE")
+
+            # names here all resolved through the team store (real teams), the file may just not have them yet
+            new_names = [name for name in dict.fromkeys(teams + opps) if name not in known]
+            if new_names:
+                conn.executemany("INSERT OR IGNORE INTO teams (team_name) VALUES (?)", [(x,) for x in new_names])
+                new_ids = dict(conn.execute(
+                    f"SELECT team_name, team_id FROM teams WHERE team_name IN ({', '.join('?' * len(new_names))})",
+                    new_names))
+
+            first = conn.execute("SELECT COALESCE(MAX(prediction_id), 0) + 1 FROM matchup_predictions").fetchone()[0]
+            pred_ids = range(first, first + n)
+
+            t_ids = [known[x] if x in known else new_ids[x] for x in teams]
+            o_ids = [known[x] if x in known else new_ids[x] for x in opps]
+            season, user, model = ids["season"], ids["user"], ids["model"]
+            _insert_rows(conn,
+                "INSERT INTO matchup_predictions (prediction_id, user_id, season_id, team_id, opponent_id, "
+                "rating_id_used, predicted_team_score, predicted_opponent_score, predicted_win_prob) VALUES ",
+                "(?, ?, ?, ?, ?, (SELECT rating_id FROM rating_matrix WHERE season_id = ? AND team_id = ? "
+                "AND opponent_id = ?), ?, ?, ?)",
+                [(p, user, season, t, o, season, t, o, ts, os_, wp)
+                 for p, t, o, ts, os_, wp in zip(pred_ids, t_ids, o_ids, t_scores, o_scores, win_probs)])
+
+            # parts: (n, k) block -> n * k (prediction_id, model_id, name, value) rows
+            k = len(self.parts_keys)
+            _insert_rows(conn,
+                "INSERT INTO prediction_feature_values (prediction_id, model_id, feature_name, feature_value) VALUES ",
+                "(?, ?, ?, ?)",
+                zip(np.repeat(np.arange(first, first + n), k).tolist(), [model] * (n * k),
+                    self.parts_keys * n, parts.ravel().tolist()))
+
+        # only after the commit, a rolled back batch must not leave IDs behind
+        known.update(new_ids)
+
+
+    def _columns(self, pending: List[Any], known: Dict[str, int]):
+        # every queued item -> flat python lists + one (n, parts) float array, unloggable rows left out
+        teams: List[Any] = []
+        opps: List[Any] = []
+        t_scores: List[Any] = []
+        o_scores: List[Any] = []
+        win_probs: List[Any] = []
+        blocks = []
+        for item in pending:
+            if item[0] == "one":
+                try:
+                    pred = item[1]
+                    parts = pred.get("parts") or {}
+                    row = (pred["team"], pred["opponent"], _as_float(pred.get("team_score")),
+                           _as_float(pred.get("opponent_score")), _as_float(pred.get("win_prob")),
+                           [_as_float(parts.get(key)) for key in self.parts_keys])
+                except (AttributeError, KeyError, TypeError):
+                    self.skipped += 1     # not a prediction dict, skip just this one
+                    continue
+                teams.append(row[0])
+                opps.append(row[1])
+                t_scores.append(row[2])
+                o_scores.append(row[3])
+                win_probs.append(row[4])
+                blocks.append(np.array([row[5]], dtype = np.float64))
+            else:
+                _, t, o, scored = item
+                m = len(t)
+                teams.extend(t)
+                opps.extend(o)
+                t_scores.extend(np.broadcast_to(scored["team_score"], (m,)).tolist())
+                o_scores.extend(np.broadcast_to(scored["opponent_score"], (m,)).tolist())
+                win_probs.extend(np.broadcast_to(scored["win_prob"], (m,)).tolist())
+                blocks.append(np.column_stack([np.broadcast_to(scored[key], (m,)) for key in self.parts_keys]))
+        parts = np.concatenate(blocks) if blocks else np.empty((0, len(self.parts_keys)))
+
+        team_names, team_ok = self._resolve(teams, known)
+        opp_names, opp_ok = self._resolve(opps, known)
+        t_arr = np.asarray(t_scores, dtype = np.float64)
+        o_arr = np.asarray(o_scores, dtype = np.float64)
+        wp_arr = np.asarray(win_probs, dtype = np.float64)
+        keep = team_ok & opp_ok & np.isfinite(t_arr) & np.isfinite(o_arr) & np.isfinite(wp_arr)
+        self.skipped += int((~keep).sum())
+
+        return (team_names[keep].tolist(), opp_names[keep].tolist(),
+                t_arr[keep].astype(np.int64).tolist(), o_arr[keep].astype(np.int64).tolist(),
+                wp_arr[keep].tolist(), parts[keep])
+
+
+    def _resolve(self, names: List[Any], known: Dict[str, int]):
+        # (canonical names, resolved mask). No team store: the teams table is the list of known names
+        names = np.asarray(names, dtype = object)
+        if self.team_store is None:
+            return names, np.array([name in known for name in names], dtype = bool)
+        canonical = np.array(self.team_store.names, dtype = object)    # before the lookup, ingest may add names
+        ids = self.team_store.team_ids(names)
+        ok = (ids >= 0) & (ids < len(canonical))
+        return np.where(ok, canonical[np.where(ok, ids, 0)], names), ok
+
+
+
+    # Shutdown
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop taking records and write everything already queued."""
+        if self._closed:
+            return
+        self._closed = True
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)          # after every queued record, so they all get written
+        self._thread.join(timeout)
+
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": self.queued, "written": self.written, "dropped": self.dropped,
+                "skipped": self.skipped, "failed": self.failed, "flushes": self.flushes,
+                "errors": list(self.errors)}
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+
+def _as_float(value) -> float:
+    # one record's number, NaN if it isn't one (that record is then skipped, not the batch)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+
+def _is_busy(exc: sqlite3.OperationalError) -> bool:
+    msg = str(exc).lower()
+    return "locked" in msg or "busy" in msg
+
+
+
+def _insert_rows(conn: sqlite3.Connection, head: str, row_sql: str, rows: Iterator[tuple]) -> None:
+    # INSERT ... VALUES (...), (...), ... ROWS_PER_INSERT rows per statement
+    batch: List[tuple] = []
+    full_sql = head + ", ".join([row_sql] * ROWS_PER_INSERT)
+    for row in rows:
+        batch.append(row)
+        if len(batch) == ROWS_PER_INSERT:
+            conn.execute(full_sql, [v for r in batch for v in r])
+            batch = []
+    if batch:
+        conn.execute(head + ", ".join([row_sql] * len(batch)), [v for r in batch for v in r])
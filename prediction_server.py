@@ -0,0 +1,396 @@
+"""
+@Author - Adam Pinkos
+@File   - prediction_server.py
+@Date   - 12/20/2025
+@Brief  - Small local HTTP/JSON prediction service (standard library asyncio only).
+          One MatchupPredictor is loaded once and shared. Requests that arrive within
+          a few milliseconds of each other are coalesced into one predict_many() call.
+
+Endpoints
+  GET  /teams                                      cbb25 team list
+  GET  /teams?q=uconn&limit=10                     ranked search (aliases, typos)
+  GET  /predict?team=A&opponent=B&location=H       one matchup (location defaults to N)
+  POST /predict        {"team", "opponent", "location"}
+  POST /predict_batch  {"matchups": [{"team", "opponent", "location"}, ...]}
+  GET  /stats                                      request / batch counters (+ stage timings with --profile)
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+COALESCE_WINDOW_MS = 2.0   # how long the first request in a batch waits for company
+MAX_BATCH = 8192           # matchups per predict_many() call
+MAX_BODY = 4 * 1024 * 1024
+BACKLOG = 1024             # listen queue, sized for hundreds of clients connecting at once
+
+LOCATIONS = {"H", "V", "N"}
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    """Bad client input, turned into a JSON error response."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+
+class MatchupBatcher:
+    """
+    Collects matchups from concurrent requests and scores them together.
+
+    Each submit() puts (matchups, future) on a queue. The collector task takes the
+    first waiting submission, keeps pulling more for up to window_ms (or until
+    max_batch matchups), runs a single predict_many() over all of them and hands
+    each caller back its own slice.
+    """
+
+    def __init__(self, predictor, window_ms: float = COALESCE_WINDOW_MS, max_batch: int = MAX_BATCH):
+        self.predictor = predictor
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue: "asyncio.Queue[Tuple[List[tuple], asyncio.Future]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+        # counters for /stats
+        self.requests = 0
+        self.matchups = 0
+        self.batches = 0
+
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._collect())
+
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+    async def submit(self, matchups: List[tuple]) -> List[Dict[str, Any]]:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((matchups, future))
+        return await future
+
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.window
+
+            # keep pulling until the window closes or the batch is full
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            await self._run(pending)
+
+
+    async def _run(self, pending) -> None:
+        everything = [m for matchups, _ in pending for m in matchups]
+        try:
+            # scoring a big batch takes a while, do it on a worker thread so the loop keeps
+            # serving other connections. One batch at a time (_collect waits for this one)
+            out = None
+            if everything:
+                out = await asyncio.get_running_loop().run_in_executor(
+                    None, self.predictor.predict_many, everything)
+        except Exception as exc:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self.requests += len(pending)
+        self.matchups += len(everything)
+        self.batches += 1
+
+        # plain python lists once, then slice per caller
+        cols = {}
+        if out is not None:
+            cols = {c: out[c].tolist() for c in ["team_score", "opponent_score", "margin", "win_prob"]}
+        start = 0
+        for matchups, future in pending:
+            end = start + len(matchups)
+            rows = [
+                {
+                    "team": t, "opponent": o, "location": loc,
+                    "team_score": cols["team_score"][i],
+                    "opponent_score": cols["opponent_score"][i],
+                    "margin": cols["margin"][i],
+                    "win_prob": cols["win_prob"][i],
+                }
+                for i, (t, o, loc) in zip(range(start, end), matchups)
+            ]
+            start = end
+            if not future.done():   # caller may have disconnected
+                future.set_result(rows)
+
+
+
+class PredictionService:
+    """Request routing + validation on top of one predictor and its batcher."""
+
+    def __init__(self, predictor, window_ms: float = COALESCE_WINDOW_MS):
+        self.predictor = predictor
+        self.window_ms = window_ms
+        self.batcher: Optional[MatchupBatcher] = None
+        self.started = time.time()
+
+        store = predictor.team_store
+        self.teams = list(store.names[:store.num_adv_teams])
+        self._teams_body = json.dumps({"teams": self.teams}).encode("utf-8")
+
+
+    async def start(self) -> None:
+        self.batcher = MatchupBatcher(self.predictor, self.window_ms)
+        self.batcher.start()
+
+
+    async def stop(self) -> None:
+        if self.batcher is not None:
+            await self.batcher.stop()
+
+
+    def _matchup(self, item: Dict[str, Any]) -> tuple:
+        # (team, opponent, location) from one JSON object / query string, checked
+        if not isinstance(item, dict):
+            raise RequestError(400, "each matchup must be an object")
+        team, opponent = item.get("team"), item.get("opponent")
+        location = str(item.get("location") or "N").upper()
+        if not team or not opponent:
+            raise RequestError(400, "team and opponent are required")
+        store = self.predictor.team_store
+        resolved = []
+        for name in (team, opponent):
+            canonical = store.canonical_name(str(name))   # "UConn" -> "Connecticut"
+            if canonical is None:
+                guesses = store.search.search(str(name), limit = 3)
+                hint = f" (did you mean {', '.join(guesses)}?)" if guesses else ""
+                raise RequestError(404, f"unknown team {name!r}{hint}")
+            resolved.append(canonical)
+        if location not in LOCATIONS:
+            raise RequestError(400, f"location must be H, V or N (got {location!r})")
+        return (resolved[0], resolved[1], location)
+
+
+    async def handle(self, method: str, target: str, body: bytes) -> Tuple[int, bytes]:
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+
+        if path == "/teams":
+            if method != "GET":
+                raise RequestError(405, "use GET")
+            query = parse_qs(url.query)
+            if "q" not in query:
+                return 200, self._teams_body
+            try:
+                limit = int(query.get("limit", ["20"])[0])
+            except ValueError:
+                raise RequestError(400, "limit must be an integer")
+            return 200, _dumps({"teams": self.predictor.team_store.search.search(query["q"][0], limit)})
+
+        if path == "/predict":
+            if method == "GET":
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            elif method == "POST":
+                query = _json_body(body)
+            else:
+                raise RequestError(405, "use GET or POST")
+            rows = await self.batcher.submit([self._matchup(query)])
+            return 200, _dumps(rows[0])
+
+        if path == "/predict_batch":
+            if method != "POST":
+                raise RequestError(405, "use POST")
+            payload = _json_body(body)
+            items = payload.get("matchups") if isinstance(payload, dict) else payload
+            if not isinstance(items, list):
+                raise RequestError(400, "expected {\"matchups\": [...]}")
+            matchups = [self._matchup(item) for item in items]
+            rows = await self.batcher.submit(matchups) if matchups else []
+            return 200, _dumps({"predictions": rows})
+
+        if path == "/stats":
+            b = self.batcher
+            return 200, _dumps({
+                "model_version": self.predictor.model_version,
+                "uptime_s": round(time.time() - self.started, 1),
+                "requests": b.requests,
+                "matchups": b.matchups,
+                "batches": b.batches,
+                "mean_requests_per_batch": b.requests / b.batches if b.batches else 0.0,
+                "profile": self.predictor.stats() if self.predictor.profiler.enabled else None,
+            })
+
+        raise RequestError(404, f"no endpoint {path}")
+
+
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # HTTP/1.1 with keep-alive; one request at a time per connection
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await _respond(writer, 400, _error("malformed request line"), False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await _respond(writer, 400, _error("bad Content-Length"), False)
+                    break
+                if length > MAX_BODY:
+                    await _respond(writer, 413, _error("request body too large"), False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version != "HTTP/1.0"
+
+                try:
+                    status, payload = await self.handle(method.upper(), target, body)
+                except RequestError as exc:
+                    status, payload = exc.status, _error(str(exc))
+                except Exception as exc:
+                    status, payload = 500, _error(f"{type(exc).__name__}: {exc}")
+
+                await _respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+
+def _json_body(body: bytes) -> Any:
+    try:
+        return json.loads(body or b"{}")
+    except json.JSONDecodeError as exc:
+        raise RequestError(400, f"invalid JSON: {exc}")
+
+
+def _dumps(obj: Any) -> bytes:
+    # numpy scalars -> plain python numbers
+    def default(o):
+        if isinstance(o, np.generic):
+            return o.item()
+        raise TypeError(f"{type(o).__name__} is not JSON serializable")
+    return json.dumps(obj, default = default).encode("utf-8")
+
+
+def _error(message: str) -> bytes:
+    return json.dumps({"error": message}).encode("utf-8")
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int, payload: bytes, keep_alive: bool) -> None:
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    ).encode("latin-1")
+    writer.write(head + payload)
+    await writer.drain()
+
+
+
+async def serve(predictor, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                window_ms: float = COALESCE_WINDOW_MS) -> None:
+    """Run the service until cancelled (Ctrl+C)."""
+    service = PredictionService(predictor, window_ms)
+    await service.start()
+    server = await asyncio.start_server(service.serve_connection, host, port, backlog = BACKLOG)
+    print(f"serving {len(service.teams)} teams on http://{host}:{port}  (model {predictor.model_version})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+
+if __name__ == "__main__":
+    from prediction import MatchupPredictor
+
+    parser = argparse.ArgumentParser(description = "Local JSON prediction service")
+    parser.add_argument("--host", default = DEFAULT_HOST)
+    parser.add_argument("--port", type = int, default = DEFAULT_PORT)
+    parser.add_argument("--window-ms", type = float, default = COALESCE_WINDOW_MS,
+                        help = "how long to wait for more requests before scoring a batch")
+    parser.add_argument("--model", help = "model artifact JSON (see model_fit.py)")
+    parser.add_argument("--ratings", help = "matrix file to map the rating diffs from (see matrix_file.py)")
+    parser.add_argument("--season", help = "Data/<season> folder to predict from (default 2025)")
+    parser.add_argument("--database", help = "read the season from this SQLite file (see cbb_database.py)")
+    parser.add_argument("--profile", action = "store_true",
+                        help = "collect stage timings (shown in /stats, printed on exit)")
+    parser.add_argument("--record", nargs = "?", const = "", metavar = "DB",
+                        help = "log every prediction to this SQLite file (default Data/cbb.sqlite3)")
+    args = parser.parse_args()
+
+    if args.profile:
+        import profiling
+        profiling.enable()
+
+    # the one-time CSV load happens here, not per request
+    predictor = MatchupPredictor(rating_source = args.ratings, model = args.model, season = args.season,
+                                 database = args.database)
+    if args.record is not None:
+        from prediction_recorder import DB_PATH, PredictionRecorder
+        PredictionRecorder.for_predictor(predictor, args.record or DB_PATH)
+    try:
+        asyncio.run(serve(predictor, args.host, args.port, args.window_ms))
+    except KeyboardInterrupt:
+        pass
+    if predictor.recorder is not None:
+        predictor.recorder.close()      # write whatever is still queued
+        print(f"recorded {predictor.recorder.written} predictions")
+    if args.profile:
+        print(predictor.profiler.report())
@@ -0,0 +1,137 @@
+"""
+@Author - Adam Pinkos
+@File   - profiling.py
+@Date   - 12/27/2025
+@Brief  - Built-in stage timings + counters (CSV load, _prepare_*, lookups, scoring,
+          explainer) so we can see where a prediction's time goes without
+          attaching an outside profiler.
+
+Off by default. When off, the hot paths only pay an "if mark:" check per stage.
+Turn it on with the --profile flag on the entry points, or profiling.enable().
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+
+class StageMarker:
+    """
+    Times one call that is split into stages.
+
+    mark("stage") charges the time since the previous mark (or since the marker
+    was made) to that stage. A stage can be marked more than once per call, the
+    pieces add up and still count as one call. done() hands the totals to the profiler.
+    """
+
+    __slots__ = ("profiler", "last", "spent")
+
+    def __init__(self, profiler: "Profiler"):
+        self.profiler = profiler
+        self.spent: Dict[str, float] = {}
+        self.last = time.perf_counter()
+
+
+    def __call__(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.spent[stage] = self.spent.get(stage, 0.0) + (now - self.last)
+        self.last = now
+
+
+    def done(self) -> None:
+        self.profiler.record_many(self.spent)
+
+
+
+class Profiler:
+    """Per-stage call count / total / max time, plus plain counters. Thread safe."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()   # GUI worker thread + main thread, server threads
+        self.reset()
+
+
+    def reset(self) -> None:
+        with self._lock:
+            self.timings: Dict[str, list] = {}    # stage -> [calls, total seconds, max seconds]
+            self.counters: Dict[str, int] = {}
+
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.record_many({stage: seconds})
+
+
+    def record_many(self, spent: Dict[str, float]) -> None:
+        with self._lock:
+            for stage, seconds in spent.items():
+                t = self.timings.get(stage)
+                if t is None:
+                    self.timings[stage] = [1, seconds, seconds]
+                else:
+                    t[0] += 1
+                    t[1] += seconds
+                    if seconds > t[2]:
+                        t[2] = seconds
+
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+
+    def marker(self) -> Optional[StageMarker]:
+        # None when profiling is off, so callers just do "if mark: mark(...)"
+        return StageMarker(self) if self.enabled else None
+
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a whole block (one-off steps like a CSV load)."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot as plain numbers (JSON friendly)."""
+        with self._lock:
+            stages = {
+                stage: {
+                    "calls": calls,
+                    "total_ms": total * 1e3,
+                    "mean_us": total / calls * 1e6,
+                    "max_us": worst * 1e6,
+                }
+                for stage, (calls, total, worst) in self.timings.items()
+            }
+            return {"enabled": self.enabled, "stages": stages, "counters": dict(self.counters)}
+
+
+    def report(self) -> str:
+        """The stats as a small text table, slowest total first."""
+        snap = self.stats()
+        lines = [f"{'stage':28} {'calls':>9} {'total ms':>11} {'mean us':>11} {'max us':>11}"]
+        for stage, s in sorted(snap["stages"].items(), key = lambda kv: -kv[1]["total_ms"]):
+            lines.append(f"{stage:28} {s['calls']:9d} {s['total_ms']:11.2f} "
+                         f"{s['mean_us']:11.2f} {s['max_us']:11.2f}")
+        for name, n in sorted(snap["counters"].items()):
+            lines.append(f"{name:28} {n:9d}")
+        return "\n".join(lines)
+
+
+
+# One profiler for the whole process (the data catalog is shared too)
+PROFILER = Profiler()
+
+
+def enable(on: bool = True) -> Profiler:
+    PROFILER.enabled = on
+    return PROFILER
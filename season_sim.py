@@ -0,0 +1,327 @@
+"""
+@Author - Adam Pinkos
+@File   - season_sim.py
+@Date   - 12/12/2025
+@Brief  - Simulate the rest of the season many times with the model's
+          win probabilities. Reports final record distributions and
+          conference standings (CONF column in cbb25.csv).
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# First day of each conference tournament (month, day), by season (the year it ends).
+# Conference games on or after it are tournament games: they count in the overall
+# record, not the conference standings. Conferences missing from a season's table use
+# DEFAULT_TOURNAMENT_START; a season with no table gets its dates from its own schedule
+# (see _derived_tournament_start)
+CONF_TOURNAMENT_START = {
+    2025: {
+        "A10": (3, 12), "ACC": (3, 11), "AE": (3, 8), "ASun": (3, 3), "Amer": (3, 13),
+        "B10": (3, 12), "B12": (3, 11), "BE": (3, 12), "BSky": (3, 8), "BSth": (3, 5),
+        "BW": (3, 12), "CAA": (3, 7), "CUSA": (3, 11), "Horz": (3, 4), "Ivy": (3, 15),
+        "MAAC": (3, 11), "MAC": (3, 13), "MEAC": (3, 12), "MVC": (3, 6), "MWC": (3, 12),
+        "NEC": (3, 5), "OVC": (3, 5), "Pat": (3, 4), "SB": (3, 4), "SC": (3, 7),
+        "SEC": (3, 12), "SWAC": (3, 11), "Slnd": (3, 9), "Sum": (3, 5), "WAC": (3, 11),
+        "WCC": (3, 6),
+    },
+}
+DEFAULT_TOURNAMENT_START = (3, 4)   # earliest of 2024-25's, so nothing unlisted leaks in
+TOURNAMENT_MONTH = 3                # derived dates only look at March games
+NO_CUTOFF = 10_000                  # past any _season_day, every game is regular season
+
+
+def _flagged(df: pd.DataFrame, col: str) -> np.ndarray:
+    # canceled / postponed columns, missing column or blank cell = not flagged
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return df[col].fillna(False).astype(bool).to_numpy()
+
+
+def _season_day(month, day) -> np.ndarray:
+    # sortable date within a season that starts in November (Jan-Jun come after Dec)
+    month = np.asarray(month, dtype = np.int64)
+    return np.where(month < 7, month + 12, month) * 100 + np.asarray(day, dtype = np.int64)
+
+
+def _derived_tournament_start(df: pd.DataFrame, team_conf: np.ndarray,
+                              opp_conf: np.ndarray) -> Dict[str, Tuple[int, int]]:
+    # {conf: (month, day)} for a season with no table: the conference's first neutral-site
+    # conference game in March. Leagues that play their first rounds on campus get those
+    # rounds counted as regular season; a conference with no such game has no cutoff
+    if not {"location", "month", "day"} <= set(df.columns):
+        return {}
+    month = pd.to_numeric(df["month"], errors = "coerce").to_numpy()
+    day = pd.to_numeric(df["day"], errors = "coerce").to_numpy()
+    neutral = (df["location"].fillna("").astype(str).str.upper().str[:1] == "N").to_numpy()
+    mask = neutral & (team_conf != "") & (team_conf == opp_conf) & (month == TOURNAMENT_MONTH)
+    first = pd.Series(day[mask]).groupby(team_conf[mask]).min()
+    return {conf: (TOURNAMENT_MONTH, int(d)) for conf, d in first.items()}
+
+
+def _regular_season(df: pd.DataFrame, conf: np.ndarray, tournament_start: Dict[str, Tuple[int, int]],
+                    default: Optional[Tuple[int, int]] = DEFAULT_TOURNAMENT_START) -> np.ndarray:
+    # True for rows dated before their conference's tournament (rows without a date count as regular season).
+    # Conferences not in tournament_start use default (None = no cutoff)
+    if "month" not in df.columns or "day" not in df.columns or not len(df):
+        return np.ones(len(df), dtype = bool)
+    starts = {}
+    for c in np.unique(conf):
+        start = tournament_start.get(c, default)
+        starts[c] = NO_CUTOFF if start is None else _season_day(*start)
+    cutoff = np.array([starts[c] for c in conf], dtype = np.int64)
+    month = pd.to_numeric(df["month"], errors = "coerce").fillna(0).to_numpy()
+    day = pd.to_numeric(df["day"], errors = "coerce").fillna(0).to_numpy()
+    return (_season_day(month, day) < cutoff) | (month == 0)
+
+
+class SeasonSimulator:
+    """
+    Played games come from the predictor's results (2025_cbb_results.csv).
+    Remaining fixtures are a DataFrame with team / opponent / location columns;
+    by default they are the unscored rows of the results file.
+
+    Canceled or postponed games are never counted as played and never simulated,
+    and neither is a fixture unless both sides are cbb25 teams (bracket placeholders
+    like "Winner from  TBA" would otherwise play as a default-stats team).
+    """
+
+    def __init__(self, predictor, remaining: Optional[pd.DataFrame] = None,
+                 tournament_start: Optional[Dict[str, Tuple[int, int]]] = None):
+        """
+        tournament_start (optional) = {conf: (month, day)} first day of each conference
+        tournament, defaults to the predictor's season in CONF_TOURNAMENT_START (worked
+        out from the schedule for a season that isn't listed). Only conference games
+        before it go into the conference records / standings.
+        """
+        if tournament_start is None:
+            tournament_start = CONF_TOURNAMENT_START.get(getattr(predictor, "season", None))
+
+        store = predictor.team_store
+        results = predictor.results_df
+        skip = _flagged(results, "canceled") | _flagged(results, "postponed")
+
+
+        # Played games. The results file lists a D1 vs D1 game once from each side,
+        # so a row only counts toward its own "team" column
+        played = results[results["total_points"].notna() & ~skip]
+        played_ids = store.team_ids(played["team"])
+        won = (played["teamscore"] > played["oppscore"]).to_numpy()
+
+
+        # Remaining fixtures, one row per game
+        if remaining is None:
+            remaining = results[results["total_points"].isna() & ~skip]
+            pair = np.sort(remaining[["team", "opponent"]].to_numpy(dtype=str), axis=1)
+            key = pd.DataFrame(pair, index=remaining.index)
+            for col in ["\\", "month", "day"]:
+                if col in remaining.columns:
+                    key[col] = remaining[col]
+            remaining = remaining[~key.duplicated()]
+        else:
+            flagged = _flagged(remaining, "canceled") | _flagged(remaining, "postponed")
+            remaining = remaining[~flagged]
+
+        if "location" not in remaining.columns:
+            remaining = remaining.assign(location = "N")
+
+        # both sides have to be real cbb25 teams (IDs below num_adv_teams)
+        fix_team = store.team_ids(remaining["team"])
+        fix_opp = store.team_ids(remaining["opponent"])
+        real = (fix_team >= 0) & (fix_team < store.num_adv_teams) & (fix_opp >= 0) & (fix_opp < store.num_adv_teams)
+        remaining, fix_team, fix_opp = remaining[real], fix_team[real], fix_opp[real]
+        self.skipped_fixtures = int((~real).sum())
+
+        self.fixtures = remaining[["team", "opponent", "location"]].reset_index(drop = True)
+        fixture_dates = remaining.reset_index(drop = True)
+        self.fixture_win_prob = predictor.predict_many(self.fixtures)["win_prob"].to_numpy()
+
+
+        # Teams we track = anyone with a played row (as "team") or a fixture
+        tracked = np.unique(np.concatenate([played_ids, fix_team, fix_opp]))
+        tracked = tracked[tracked >= 0]
+        self.team_ids = tracked
+        self.teams = [store.names[i] for i in tracked]
+        slot = np.full(len(store) + 1, -1, dtype=np.int64)
+        slot[tracked] = np.arange(len(tracked))
+        n_teams = len(tracked)
+
+
+        # Conference by team (only cbb25 teams have one)
+        conf_by_id = np.full(len(store) + 1, "", dtype=object)
+        if "CONF" in predictor.adv_df.columns:
+            conf_ids = store.team_ids(predictor.adv_df["Team"])
+            ok = conf_ids >= 0
+            conf_by_id[conf_ids[ok]] = predictor.adv_df["CONF"].fillna("").to_numpy()[ok]
+        self.conf = conf_by_id[tracked]
+
+        # a season with no tournament table: first neutral-site conference game in March
+        default_start = DEFAULT_TOURNAMENT_START
+        if tournament_start is None:
+            listed = results[~skip]
+            tournament_start = _derived_tournament_start(
+                listed, conf_by_id[store.team_ids(listed["team"])], conf_by_id[store.team_ids(listed["opponent"])]
+            )
+            default_start = None
+        self.tournament_start = tournament_start
+
+
+        # Wins / losses already banked
+        played_slot = slot[played_ids]
+        ok = played_slot >= 0
+        self.base_wins = np.bincount(played_slot[ok & won], minlength = n_teams)
+        self.base_losses = np.bincount(played_slot[ok & ~won], minlength = n_teams)
+
+        # conference games = same conference, regular season only (not the conference tournament)
+        played_team_conf = conf_by_id[played_ids]
+        played_conf = (played_team_conf != "") & (
+            played_team_conf == conf_by_id[store.team_ids(played["opponent"])]
+        ) & _regular_season(played, played_team_conf, tournament_start, default_start)
+        self.base_conf_wins = np.bincount(played_slot[ok & won & played_conf], minlength = n_teams)
+        self.base_conf_losses = np.bincount(played_slot[ok & ~won & played_conf], minlength = n_teams)
+
+
+        # Fixture -> team incidence matrices (games x teams), so a batch of
+        # simulated outcomes turns into win counts with one matrix multiply
+        n_games = len(self.fixtures)
+        fix_team_slot = slot[fix_team]
+        fix_opp_slot = slot[fix_opp]
+        self._home = np.zeros((n_games, n_teams), dtype = np.float32)
+        self._away = np.zeros((n_games, n_teams), dtype = np.float32)
+        rows = np.arange(n_games)
+        self._home[rows[fix_team_slot >= 0], fix_team_slot[fix_team_slot >= 0]] = 1.0
+        self._away[rows[fix_opp_slot >= 0], fix_opp_slot[fix_opp_slot >= 0]] = 1.0
+
+        fixture_conf = (conf_by_id[fix_team] != "") & (conf_by_id[fix_team] == conf_by_id[fix_opp]) \
+            & _regular_season(fixture_dates, conf_by_id[fix_team], tournament_start, default_start)
+        self._home_conf = self._home * fixture_conf[:, None]
+        self._away_conf = self._away * fixture_conf[:, None]
+
+
+
+    def simulate(self, n_sims: int = 50_000, seed: Optional[int] = None,
+                 chunk_size: int = 5_000) -> Dict[str, pd.DataFrame]:
+        """
+        Simulate the remaining fixtures n_sims times (same seed = same results).
+
+        Returns
+          "records"          current record, mean final wins / losses, 10th / 50th / 90th pct wins
+          "win_distribution" P(final wins = k) per team (columns = k)
+          "standings"        conference record, mean final conference wins / losses / win pct,
+                             P(at least a share of 1st), and P(finishing in each place).
+                             Places go by conference win pct, random tiebreak
+        """
+
+        rng = np.random.default_rng(seed)
+        n_teams = len(self.teams)
+        n_games = len(self.fixtures)
+        max_wins = int((self.base_wins + self._home.sum(0) + self._away.sum(0)).max())
+
+        win_counts = np.zeros((n_teams, max_wins + 1), dtype = np.int64)
+        conf_win_sum = np.zeros(n_teams, dtype = np.float64)
+        conf_loss_sum = np.zeros(n_teams, dtype = np.float64)
+        conf_pct_sum = np.zeros(n_teams, dtype = np.float64)
+        share_first = np.zeros(n_teams, dtype = np.int64)
+
+        conferences = [c for c in np.unique(self.conf) if c != ""]
+        members = {c: np.flatnonzero(self.conf == c) for c in conferences}
+        max_size = max([len(m) for m in members.values()], default = 0)
+        place_counts = np.zeros((n_teams, max_size), dtype = np.int64)
+
+        done = 0
+        while done < n_sims:
+            m = min(chunk_size, n_sims - done)
+            done += m
+
+            # sims x games: did the "team" side win?
+            team_won = (rng.random((m, n_games)) < self.fixture_win_prob).astype(np.float32)
+            team_lost = 1.0 - team_won
+
+            wins = self.base_wins + np.rint(team_won @ self._home + team_lost @ self._away).astype(np.int64)
+            conf_wins = self.base_conf_wins + np.rint(
+                team_won @ self._home_conf + team_lost @ self._away_conf
+            ).astype(np.int64)
+            conf_losses = self.base_conf_losses + np.rint(
+                team_lost @ self._home_conf + team_won @ self._away_conf
+            ).astype(np.int64)
+            conf_pct = conf_wins / np.maximum(conf_wins + conf_losses, 1)
+
+            # final win totals -> histogram per team
+            flat = (np.arange(n_teams) * (max_wins + 1) + wins).ravel()
+            win_counts += np.bincount(flat, minlength = n_teams * (max_wins + 1)).reshape(n_teams, -1)
+            conf_win_sum += conf_wins.sum(0)
+            conf_loss_sum += conf_losses.sum(0)
+            conf_pct_sum += conf_pct.sum(0)
+
+            # conference standings: sort by conference win pct (so a team with a game
+            # canceled isn't behind on raw wins), random tiebreak well under 1 / games^2
+            tiebreak = rng.random((m, n_teams)) * 1e-6
+            for conf in conferences:
+                idx = members[conf]
+                cp = conf_pct[:, idx]
+                share_first[idx] += (cp == cp.max(1, keepdims = True)).sum(0)
+
+                order = np.argsort(-(cp + tiebreak[:, idx]), axis = 1)
+                places = np.empty_like(order)
+                np.put_along_axis(places, order, np.arange(len(idx))[None, :], axis = 1)
+                for place in range(len(idx)):
+                    place_counts[idx, place] += (places == place).sum(0)
+
+
+        dist = win_counts / n_sims
+        wins_axis = np.arange(max_wins + 1)
+        cdf = dist.cumsum(1)
+        pct = lambda q: (cdf < q).sum(1)   # smallest k with P(wins <= k) >= q
+
+        total_games = self._home.sum(0) + self._away.sum(0)
+        mean_wins = dist @ wins_axis
+
+        records = pd.DataFrame({
+            "team": self.teams,
+            "conf": self.conf,
+            "wins": self.base_wins,
+            "losses": self.base_losses,
+            "games_left": total_games.astype(np.int64),
+            "mean_final_wins": mean_wins,
+            "mean_final_losses": self.base_wins + self.base_losses + total_games - mean_wins,
+            "wins_p10": pct(0.10),
+            "wins_p50": pct(0.50),
+            "wins_p90": pct(0.90),
+        })
+
+        win_distribution = pd.DataFrame(dist, index = pd.Index(self.teams, name = "team"),
+                                        columns = wins_axis)
+
+        in_conf = self.conf != ""
+        standings = pd.DataFrame({
+            "team": self.teams,
+            "conf": self.conf,
+            "conf_wins": self.base_conf_wins,
+            "conf_losses": self.base_conf_losses,
+            "mean_final_conf_wins": conf_win_sum / n_sims,
+            "mean_final_conf_losses": conf_loss_sum / n_sims,
+            "mean_final_conf_pct": conf_pct_sum / n_sims,
+            "p_first_or_tied": share_first / n_sims,
+        })
+        for place in range(max_size):
+            standings[f"p_place_{place + 1}"] = place_counts[:, place] / n_sims
+        standings = standings[in_conf].sort_values(
+            ["conf", "mean_final_conf_pct"], ascending = [True, False], ignore_index = True
+        )
+
+        return {
+            "records": records,
+            "win_distribution": win_distribution,
+            "standings": standings,
+        }
+
+
+
+if __name__ == "__main__":
+    from prediction import MatchupPredictor
+
+    out = SeasonSimulator(MatchupPredictor()).simulate(50_000, seed = 2025)
+    print(out["standings"].head(20).iloc[:, :7].to_string(index = False))
@@ -0,0 +1,248 @@
+"""
+@Author - Adam Pinkos
+@File   - team_search.py
+@Date   - 12/22/2025
+@Brief  - Team name search index (prefix + trigram, ranked, typo tolerant) and
+          name resolution, so "UConn", "A&M-Corpus Christi" etc. from the other
+          files map to the one cbb25.csv team.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+
+# Other spellings -> cbb25.csv name.
+# First block: every D1 name in 2025_cbb_results.csv / ncaa_wp_matrix_2025.csv that
+# isn't spelled the cbb25 way. Second block: common names people type.
+TEAM_ALIASES: Dict[str, str] = {
+    "A&M-Corpus Christi": "Texas A&M Corpus Chris",
+    "Alcorn": "Alcorn St.",
+    "App State": "Appalachian St.",
+    "Ark.-Pine Bluff": "Arkansas Pine Bluff",
+    "Army West Point": "Army",
+    "Bethune-Cookman": "Bethune Cookman",
+    "Boston U.": "Boston University",
+    "CSU Bakersfield": "Cal St. Bakersfield",
+    "CSUN": "Cal St. Northridge",
+    "California Baptist": "Cal Baptist",
+    "Central Ark.": "Central Arkansas",
+    "Central Conn. St.": "Central Connecticut",
+    "Central Mich.": "Central Michigan",
+    "Charleston So.": "Charleston Southern",
+    "Col. of Charleston": "Charleston",
+    "ETSU": "East Tennessee St.",
+    "Eastern Ill.": "Eastern Illinois",
+    "Eastern Ky.": "Eastern Kentucky",
+    "Eastern Mich.": "Eastern Michigan",
+    "Eastern Wash.": "Eastern Washington",
+    "FGCU": "Florida Gulf Coast",
+    "Fla. Atlantic": "Florida Atlantic",
+    "Ga. Southern": "Georgia Southern",
+    "Gardner-Webb": "Gardner Webb",
+    "Grambling": "Grambling St.",
+    "Kansas City": "UMKC",
+    "LMU (CA)": "Loyola Marymount",
+    "Lamar University": "Lamar",
+    "Loyola Maryland": "Loyola MD",
+    "McNeese": "McNeese St.",
+    "Miami (FL)": "Miami FL",
+    "Miami (OH)": "Miami OH",
+    "Middle Tenn.": "Middle Tennessee",
+    "Mississippi Val.": "Mississippi Valley St.",
+    "N.C. A&T": "North Carolina A&T",
+    "N.C. Central": "North Carolina Central",
+    "NC State": "N.C. State",
+    "NIU": "Northern Illinois",
+    "Nicholls": "Nicholls St.",
+    "North Ala.": "North Alabama",
+    "Northern Ariz.": "Northern Arizona",
+    "Northern Colo.": "Northern Colorado",
+    "Northern Ky.": "Northern Kentucky",
+    "Ole Miss": "Mississippi",
+    "Omaha": "Nebraska Omaha",
+    "Prairie View": "Prairie View A&M",
+    "Queens (NC)": "Queens",
+    "SFA": "Stephen F. Austin",
+    "SIUE": "SIU Edwardsville",
+    "Saint Francis (PA)": "Saint Francis",
+    "Saint Mary's (CA)": "Saint Mary's",
+    "Sam Houston": "Sam Houston St.",
+    "Seattle U": "Seattle",
+    "South Fla.": "South Florida",
+    "Southeast Mo. St.": "Southeast Missouri St.",
+    "Southeastern La.": "Southeastern Louisiana",
+    "Southern California": "USC",
+    "Southern Ill.": "Southern Illinois",
+    "Southern Ind.": "Southern Indiana",
+    "Southern Miss.": "Southern Miss",
+    "Southern U.": "Southern",
+    "St. John's (NY)": "St. John's",
+    "St. Thomas (MN)": "St. Thomas",
+    "Tex. A&M-Commerce": "Texas A&M Commerce",
+    "UAlbany": "Albany",
+    "UConn": "Connecticut",
+    "UIC": "Illinois Chicago",
+    "UIW": "Incarnate Word",
+    "ULM": "Louisiana Monroe",
+    "UMES": "Maryland Eastern Shore",
+    "UNCW": "UNC Wilmington",
+    "UNI": "Northern Iowa",
+    "UT Martin": "Tennessee Martin",
+    "UTRGV": "UT Rio Grande Valley",
+    "West Ga.": "West Georgia",
+    "Western Caro.": "Western Carolina",
+    "Western Ill.": "Western Illinois",
+    "Western Ky.": "Western Kentucky",
+    "Western Mich.": "Western Michigan",
+
+    "Texas A&M-Corpus Christi": "Texas A&M Corpus Chris",
+    "North Carolina State": "N.C. State",
+    "UNC": "North Carolina",
+    "Pitt": "Pittsburgh",
+    "Mizzou": "Missouri",
+    "Cal": "California",
+    "UMass": "Massachusetts",
+}
+
+# Same word, different spelling (applied after lowercasing / stripping punctuation)
+WORD_SUBSTITUTIONS = {
+    "state": "st",
+    "saint": "st",
+    "university": "u",
+}
+
+FUZZY_MIN_SIMILARITY = 0.3   # trigram Jaccard needed for a typo match to show up
+
+# rank tiers, best first
+TIER_EXACT, TIER_PREFIX, TIER_WORD_PREFIX, TIER_SUBSTRING, TIER_FUZZY = range(5)
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, drop punctuation, unify St./State/Saint: "Ark.-Pine Bluff" -> "ark pine bluff"."""
+    s = re.sub(r"[-/]", " ", str(name).lower())
+    s = re.sub(r"[^a-z0-9& ]+", "", s)   # & stays: "S&T" is not "St."
+    return " ".join(WORD_SUBSTITUTIONS.get(w, w) for w in s.split())
+
+
+def _trigrams(key: str) -> List[str]:
+    # padded so word starts / ends count, and names shorter than 3 letters still get a gram
+    padded = f" {key} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+
+class TeamSearchIndex:
+    """
+    Built once over the canonical team names (cbb25.csv order) plus the aliases.
+
+    resolve() / resolve_id(): exact name, alias, or the same name once normalized
+    ("Michigan State", "st johns"). Never guesses, an unknown name stays unknown.
+
+    search(): ranked matches for a search box. Exact > prefix > word prefix >
+    substring > typo (trigram similarity). Aliases show up as their cbb25 name.
+    """
+
+    def __init__(self, names: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        self.names: List[str] = list(dict.fromkeys(names))
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.sorted_ids = sorted(range(len(self.names)), key = lambda i: self.names[i])
+
+        aliases = TEAM_ALIASES if aliases is None else aliases
+
+        # Searchable entries: (normalized key, canonical id). Aliases pointing at a team
+        # that isn't in this season's list are skipped.
+        self.entries = [(normalize_name(name), i) for i, name in enumerate(self.names)]
+        self.aliases: Dict[str, int] = {}
+        for alias, target in aliases.items():
+            if target in self.ids and alias not in self.ids:
+                self.aliases[alias] = self.ids[target]
+                self.entries.append((normalize_name(alias), self.ids[target]))
+
+        # normalized key -> id, a key shared by two different teams resolves to nothing
+        self.by_key: Dict[str, int] = {}
+        ambiguous = set()
+        for key, i in self.entries:
+            if key in self.by_key and self.by_key[key] != i:
+                ambiguous.add(key)
+            self.by_key.setdefault(key, i)
+        for key in ambiguous:
+            del self.by_key[key]
+
+        # trigram -> entries, and 1-2 letter word prefix -> entries (too short for trigrams)
+        self.postings: Dict[str, List[int]] = {}
+        self.prefixes: Dict[str, List[int]] = {}
+        self.gram_counts: List[int] = []
+        for e, (key, _) in enumerate(self.entries):
+            grams = set(_trigrams(key))
+            self.gram_counts.append(len(grams))
+            for g in grams:
+                self.postings.setdefault(g, []).append(e)
+            for word in key.split():
+                for n in (1, 2):
+                    if len(word) >= n:
+                        bucket = self.prefixes.setdefault(word[:n], [])
+                        if not bucket or bucket[-1] != e:
+                            bucket.append(e)
+
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+    def resolve_id(self, name: str) -> int:
+        # canonical position of a name / alias / normalized spelling, -1 if unknown
+        i = self.ids.get(name)
+        if i is None:
+            i = self.aliases.get(name)
+        if i is None:
+            i = self.by_key.get(normalize_name(name), -1)
+        return i
+
+
+    def resolve(self, name: str) -> Optional[str]:
+        i = self.resolve_id(name)
+        return self.names[i] if i >= 0 else None
+
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """Canonical names matching query, best first. Empty query = every team A-Z."""
+
+        q = normalize_name(query)
+        if not q:
+            return [self.names[i] for i in self.sorted_ids[:limit]]
+
+        q_grams = set(_trigrams(q))
+        shared = Counter()
+        for g in q_grams:
+            for e in self.postings.get(g, ()):
+                shared[e] += 1
+        if len(q) < 3:
+            for e in self.prefixes.get(q, ()):
+                shared[e] += 0
+
+        best: Dict[int, tuple] = {}
+        for e, hits in shared.items():
+            key, team = self.entries[e]
+            similarity = hits / (len(q_grams) + self.gram_counts[e] - hits)
+
+            if key == q:
+                tier = TIER_EXACT
+            elif key.startswith(q):
+                tier = TIER_PREFIX
+            elif f" {q}" in f" {key}":
+                tier = TIER_WORD_PREFIX
+            elif q in key:
+                tier = TIER_SUBSTRING
+            elif similarity >= FUZZY_MIN_SIMILARITY:
+                tier = TIER_FUZZY
+            else:
+                continue
+
+            # alphabetical inside the exact/prefix/substring tiers, most similar first for typos
+            rank = (tier, -similarity if tier == TIER_FUZZY else 0.0, self.names[team])
+            if team not in best or rank < best[team]:
+                best[team] = rank
+
+        ranked = sorted(best, key = best.get)
+        return [self.names[i] for i in ranked[:limit]]
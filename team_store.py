@@ -0,0 +1,189 @@
+"""
+@Author - Adam Pinkos
+@File   - team_store.py
+@Date   - 12/06/2025
+@Brief  - Integer team IDs + array-backed advanced stats (cbb25.csv)
+          shared by every prediction path.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from team_search import TeamSearchIndex
+
+
+# Generic average D1 numbers used when a team (or a column) is missing
+DEFAULT_ADJOE   = 110.0
+DEFAULT_ADJDE   = 100.0
+DEFAULT_BARTHAG = 0.50
+DEFAULT_RANK    = 180.0   #### Kinda AVERAGE
+DEFAULT_SEED    = 16.0
+
+FEATURE_COLUMNS = ["ADJOE", "ADJDE", "BARTHAG", "ADJ_T", "RANK", "SEED"]
+
+
+class TeamFeatureStore:
+    """
+    Every team name gets an integer ID once. cbb25.csv teams come first
+    (ID = row order in the file), then any extra names seen in the other files.
+    Other spellings of a cbb25 team ("UConn", "A&M-Corpus Christi") don't get
+    their own ID, they resolve to the cbb25 team's ID through the search index.
+
+    Each stat is one contiguous float64 array indexed by team ID. The arrays
+    have one extra slot at the end holding the default values, so ID -1
+    (unknown team) reads the defaults without any special casing.
+    """
+
+    def __init__(self, adv_df: pd.DataFrame, extra_names: Iterable[str] = (),
+                 default_tempo: float = 67.0):
+
+        # cbb25 teams, first row wins if a name is listed twice
+        if "Team" in adv_df.columns:
+            adv = adv_df.drop_duplicates("Team", keep="first")
+            adv_names = adv["Team"].tolist()
+        else:
+            adv = adv_df.iloc[0:0]
+            adv_names = []
+
+        self.num_adv_teams = len(adv_names)
+
+        # Shared name index (GUI search box, server, every lookup below)
+        self.search = TeamSearchIndex(adv_names)
+
+        names: List[str] = list(adv_names)
+        alias_ids: Dict[str, int] = {}
+        for name in dict.fromkeys(extra_names):
+            if name in alias_ids or name in self.search.ids:
+                continue
+            canonical = self.search.resolve_id(name)
+            if canonical >= 0:
+                alias_ids[name] = canonical      # another spelling of a cbb25 team
+            else:
+                names.append(name)               # a team cbb25 doesn't have (non-D1 etc.)
+
+        self.names = names
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(names)}
+        self.ids.update(alias_ids)
+
+        # Every known spelling -> ID, for vectorized lookups. The trailing -1 is
+        # where get_indexer's "not found" (-1) lands.
+        self.index = pd.Index(list(self.ids))
+        self._index_ids = np.array(list(self.ids.values()) + [-1], dtype=np.int64)
+
+        n = len(names)
+        self.default_tempo = default_tempo
+        defaults = {
+            "ADJOE": DEFAULT_ADJOE,
+            "ADJDE": DEFAULT_ADJDE,
+            "BARTHAG": DEFAULT_BARTHAG,
+            "ADJ_T": default_tempo,
+            "RANK": DEFAULT_RANK,
+            "SEED": DEFAULT_SEED,
+        }
+
+        # Start every slot at the default, then copy the cbb25 values over the first rows.
+        # A blank cell in a real column stays NaN (same as row.get used to return),
+        # only RANK falls back rk -> RK -> 180.
+        self.columns: Dict[str, np.ndarray] = {}
+        for col in FEATURE_COLUMNS:
+            arr = np.full(n + 1, defaults[col], dtype=np.float64)
+
+            if col == "RANK":
+                values = pd.Series(np.nan, index=adv.index)
+                for rank_col in ["RK", "rk"]:
+                    if rank_col in adv.columns:
+                        values = adv[rank_col].where(adv[rank_col].notna(), values)
+                arr[:self.num_adv_teams] = values.fillna(DEFAULT_RANK).to_numpy(dtype=np.float64)
+
+            elif col in adv.columns:
+                arr[:self.num_adv_teams] = adv[col].to_numpy(dtype=np.float64)
+
+            self.columns[col] = arr
+
+        self._bind_columns()
+
+
+    def _bind_columns(self) -> None:
+        # Short names for the hot path
+        self.adjoe   = self.columns["ADJOE"]
+        self.adjde   = self.columns["ADJDE"]
+        self.barthag = self.columns["BARTHAG"]
+        self.tempo   = self.columns["ADJ_T"]
+        self.rank    = self.columns["RANK"]
+        self.seed    = self.columns["SEED"]
+
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+    def team_id(self, team_name: str) -> int:
+        # -1 = not a known team (reads the default slot)
+        i = self.ids.get(team_name)
+        if i is None:
+            i = self.search.resolve_id(team_name)   # "Michigan State", "st johns", ...
+        return i
+
+
+    def team_ids(self, team_names) -> np.ndarray:
+        # Vectorized team_id, unknown names come back as -1
+        names = np.asarray(team_names, dtype=object)
+        ids = self._index_ids[self.index.get_indexer(names)]
+
+        missing = ids < 0
+        if missing.any():
+            # only the spellings we've never seen go through the resolver, once each
+            unknown, inverse = np.unique(names[missing].astype(str), return_inverse=True)
+            ids[missing] = np.array([self.search.resolve_id(n) for n in unknown], dtype=np.int64)[inverse]
+        return ids
+
+
+    def add_names(self, new_names: Iterable[str]) -> List[int]:
+        """
+        Give IDs to teams seen for the first time (new results rows).
+        They get the default stats, the default slot moves to the new end.
+        Returns the new IDs (empty if every name was already known).
+        """
+        added = [name for name in dict.fromkeys(new_names) if self.team_id(name) < 0]
+        if not added:
+            return []
+
+        n, k = len(self.names), len(added)
+        for col, arr in self.columns.items():
+            grown = np.full(n + k + 1, arr[n], dtype=np.float64)   # arr[n] = default slot
+            grown[:n] = arr[:n]
+            self.columns[col] = grown
+        self._bind_columns()
+
+        new_ids = list(range(n, n + k))
+        self.names.extend(added)
+        self.ids.update(zip(added, new_ids))
+        self.index = pd.Index(list(self.ids))
+        self._index_ids = np.array(list(self.ids.values()) + [-1], dtype=np.int64)
+        return new_ids
+
+
+    def canonical_name(self, team_name: str) -> Optional[str]:
+        # The cbb25 (or only) spelling of a team, None if unknown
+        i = self.team_id(team_name)
+        return self.names[i] if i >= 0 else None
+
+
+    def canonical_names(self, team_names) -> np.ndarray:
+        # Vectorized canonical_name, unknown names (and NaN) are kept as given
+        names = np.asarray(team_names, dtype=object)
+        ids = self.team_ids(names)
+        canonical = np.array(self.names, dtype=object)
+        return np.where(ids >= 0, canonical[np.maximum(ids, 0)], names)
+
+
+    def features(self, team_id: int) -> Dict[str, float]:
+        # One team's stats as a dict
+        return {col: float(self.columns[col][team_id]) for col in FEATURE_COLUMNS}
+
+
+    def gather(self, team_ids: np.ndarray) -> Dict[str, np.ndarray]:
+        # Every stat for a whole array of IDs at once
+        return {col: self.columns[col][team_ids] for col in FEATURE_COLUMNS}
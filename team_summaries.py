@@ -0,0 +1,209 @@
+"""
+@Author - Adam Pinkos
+@File   - team_summaries.py
+@Date   - 01/03/2026
+@Brief  - The schema's materialized summaries (team_scoring_summaries,
+          team_location_splits, matchup_history_summary) built from the
+          results in one groupby, and kept current as new games come in.
+
+Each scored results row is turned into one row per team in it (the opponent's
+row has the location flipped, H <-> V). Those side rows are grouped once by
+(team, opponent, location) and the three tables are roll-ups of that small
+frame, not three more passes over the results.
+
+A D1 vs D1 game is listed twice in 2025_cbb_results.csv (D1 = 2), once from each
+side, so the opponent-side copy of those rows is a mirror and is skipped for the
+per-game numbers. listed_games / listed_points still count every listing, that is
+the weighting the predictor's total points baseline has always used.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+
+# Summed columns (per game, mirrors skipped) + the every-listing pair for the totals baseline
+SUMS = ["games_played", "wins", "losses", "points_for", "points_against"]
+LISTED = ["listed_games", "listed_points"]
+
+LOCATIONS = ["H", "V", "N"]
+FLIP_LOCATION = {"H": "V", "V": "H", "N": "N"}
+
+
+
+def location_code(location) -> str:
+    # H / V / N, anything else (missing, "A", ...) is neutral like _location_sign treats it
+    loc = str(location or "").upper()[:1]
+    return loc if loc in FLIP_LOCATION else "N"
+
+
+
+def side_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Every scored row of a results frame once from each team's side:
+    team, opponent, location, points_for, points_against, mirror.
+    Works on the raw CSV layout too (scores are coerced like prepare_results_frame).
+    """
+
+    team_score = pd.to_numeric(df["teamscore"], errors = "coerce")
+    opp_score = pd.to_numeric(df["oppscore"], errors = "coerce")
+    scored = (team_score.notna() & opp_score.notna()).to_numpy()
+    played = df[scored]
+    team_score, opp_score = team_score[scored], opp_score[scored]
+
+    if "location" in played.columns:
+        loc = played["location"].fillna("N")
+        if not loc.isin(LOCATIONS).all():
+            # only clean up when the file has something other than H / V / N in it
+            loc = loc.astype(str).str.upper().str[:1]
+            loc = loc.where(loc.isin(LOCATIONS), "N")
+    else:
+        loc = pd.Series("N", index = played.index)
+
+    # the other side of a D1 vs D1 row is already its own row in the file
+    if "D1" in played.columns:
+        listed_twice = (pd.to_numeric(played["D1"], errors = "coerce") == 2).to_numpy()
+    else:
+        listed_twice = False
+
+    # Team-side rows, then opponent-side rows (skip a team playing itself so it counts once)
+    own = pd.DataFrame({
+        "team": played["team"],
+        "opponent": played["opponent"],
+        "location": loc,
+        "points_for": team_score,
+        "points_against": opp_score,
+        "mirror": False,
+    })
+    not_self = (played["opponent"] != played["team"]).to_numpy()
+    opp = pd.DataFrame({
+        "team": played["opponent"],
+        "opponent": played["team"],
+        "location": loc.replace(FLIP_LOCATION),
+        "points_for": opp_score,
+        "points_against": team_score,
+        "mirror": listed_twice,
+    })[not_self]
+
+    return pd.concat([own, opp], ignore_index = True)
+
+
+
+def _cells(sides: pd.DataFrame) -> pd.DataFrame:
+    # THE groupby: side rows -> (team, opponent, location) sums. Everything else rolls up from here
+    pf = sides["points_for"].to_numpy(dtype = "int64")
+    pa = sides["points_against"].to_numpy(dtype = "int64")
+    game = ~sides["mirror"].to_numpy(dtype = bool)
+
+    frame = pd.DataFrame({
+        "team": sides["team"].to_numpy(dtype = object),
+        "opponent": sides["opponent"].to_numpy(dtype = object),
+        "location": sides["location"].to_numpy(dtype = object),
+        "games_played": game.astype("int64"),
+        "wins": (game & (pf > pa)).astype("int64"),
+        "losses": (game & (pf < pa)).astype("int64"),
+        "points_for": pf * game,
+        "points_against": pa * game,
+        "listed_games": 1,
+        "listed_points": pf + pa,
+    })
+    return frame.groupby(["team", "opponent", "location"], sort = False)[SUMS + LISTED].sum()
+
+
+def _rollup(cells: pd.DataFrame, keys: List[str], columns: List[str]) -> pd.DataFrame:
+    table = cells.groupby(level = keys, sort = False)[columns].sum().astype("int64")
+    _fill_averages(table)
+    return table
+
+
+def _fill_averages(table: pd.DataFrame, rows = None) -> None:
+    # avg_* columns from the sums, for these row positions (all rows when rows is None)
+    part = table if rows is None else table.iloc[rows]
+    games = part["games_played"]
+    averages = {
+        "avg_points_for": part["points_for"] / games,
+        "avg_points_against": part["points_against"] / games,
+        "avg_margin": (part["points_for"] - part["points_against"]) / games,
+    }
+    if "listed_games" in table.columns:
+        # game total over every listing (the predictor's team_total_avg)
+        averages["avg_total_points"] = part["listed_points"] / part["listed_games"]
+
+    for col, values in averages.items():
+        if rows is None:
+            table[col] = values
+        else:
+            table.iloc[rows, table.columns.get_loc(col)] = values.to_numpy()
+
+
+def _add_into(table: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    # table += delta on the summed columns, only delta's rows are touched.
+    # Keys seen for the first time (a new team, a first meeting) are appended at zero first
+    sums = list(delta.columns)
+    new_keys = delta.index.difference(table.index)
+    if len(new_keys):
+        zeros = pd.DataFrame(0, index = new_keys, columns = sums, dtype = "int64")
+        table = pd.concat([table, zeros])
+        table.index.names = delta.index.names
+
+    rows = table.index.get_indexer(delta.index)
+    cols = table.columns.get_indexer(sums)
+    table.iloc[rows, cols] = table.iloc[rows, cols].to_numpy(dtype = "int64") + delta[sums].to_numpy(dtype = "int64")
+    _fill_averages(table, rows)
+    return table
+
+
+
+class TeamSummaries:
+    """
+    scoring          team                -> games_played, wins, losses, points_for, points_against,
+                                            avg_points_for/against, avg_margin, avg_total_points
+    location_splits  (team, location)    -> same per H / V / N
+    matchup_history  (team, opponent)    -> same per opponent, from team's side
+
+    Built from side_rows() output. Names are used as given, the predictor
+    passes canonical ones so every spelling of a team lands in one row.
+    """
+
+    def __init__(self, sides: pd.DataFrame):
+        cells = _cells(sides)
+        self.scoring = _rollup(cells, ["team"], SUMS + LISTED)
+        self.location_splits = _rollup(cells, ["team", "location"], SUMS)
+        self.matchup_history = _rollup(cells, ["team", "opponent"], SUMS)
+
+
+    def add(self, sides: pd.DataFrame) -> List[str]:
+        """Fold newly played games in (only their rows change). Returns the teams touched."""
+        if not len(sides):
+            return []
+        cells = _cells(sides)
+        scoring = cells.groupby(level = "team", sort = False)[SUMS + LISTED].sum()
+        self.scoring = _add_into(self.scoring, scoring)
+        self.location_splits = _add_into(self.location_splits,
+                                         cells.groupby(level = ["team", "location"], sort = False)[SUMS].sum())
+        self.matchup_history = _add_into(self.matchup_history,
+                                         cells.groupby(level = ["team", "opponent"], sort = False)[SUMS].sum())
+        return scoring.index.tolist()
+
+
+
+    # Look up (None = no games on record)
+    def team(self, team: str) -> Optional[Dict[str, Any]]:
+        return _row(self.scoring, team)
+
+
+    def location_split(self, team: str, location) -> Optional[Dict[str, Any]]:
+        return _row(self.location_splits, (team, location_code(location)))
+
+
+    def history(self, team: str, opponent: str) -> Optional[Dict[str, Any]]:
+        return _row(self.matchup_history, (team, opponent))
+
+
+
+def _row(table: pd.DataFrame, key) -> Optional[Dict[str, Any]]:
+    try:
+        row = table.loc[key]
+    except KeyError:
+        return None
+    return {col: (int(v) if col in SUMS or col in LISTED else float(v)) for col, v in row.items()}